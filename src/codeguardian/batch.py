@@ -0,0 +1,162 @@
+import re
+import json
+import time
+import logging
+from pathlib import Path
+from typing import List, Optional, Set
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from pydantic import BaseModel
+
+from codeguardian.config.settings import settings
+from codeguardian.crew import Codeguardian
+from codeguardian.workspace import open_workspace, close_workspace, empty_trash
+from codeguardian.tools.tools import ensure_repo_indexed, directory_search_tool, knowledge_store, ollama_scheduler
+from codeguardian.tools.index_lock import IndexLockTimeout
+
+logger = logging.getLogger(__name__)
+
+
+class BugTicket(BaseModel):
+    id: str
+    bug_desc_path: Path
+    bug_log_path: Path
+
+
+def _safe_id(raw: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]", "_", raw).strip("._") or "ticket"
+
+
+def _unique_id(raw: str, taken: Set[str]) -> str:
+    """
+    _safe_id, made unique within one batch: duplicates and ids that only differ in replaced characters
+    ("a/b", "a_b") get a -2, -3, ... suffix, so no two tickets share a result directory or worktree.
+    """
+    base = _safe_id(raw)
+    tid, n = base, 1
+    while tid.lower() in taken:  # case-insensitive: the ids are directory names
+        n += 1
+        tid = f"{base}-{n}"
+    taken.add(tid.lower())
+    return tid
+
+
+# -------------------------
+# Input: directory or JSONL
+# -------------------------
+def _tickets_from_dir(source: Path) -> List[BugTicket]:
+    """One sub-directory per ticket, each holding bug-desc.txt / bug-log.txt."""
+    tickets = []
+    taken: Set[str] = set()
+    for d in sorted(p for p in source.iterdir() if p.is_dir()):
+        desc = d / settings.bug_desc_file
+        if not desc.exists():
+            continue
+        tickets.append(BugTicket(id=_unique_id(d.name, taken), bug_desc_path=desc.resolve(), bug_log_path=(d / settings.bug_log_file).resolve()))
+    return tickets
+
+
+def _tickets_from_jsonl(source: Path, out_dir: Path) -> List[BugTicket]:
+    """
+    One JSON object per line: {"id": "...", "description": "...", "log": "..."}.
+    The texts are materialized as files so the agents can read them with FileReadTool.
+    """
+    tickets = []
+    taken: Set[str] = set()
+    for n, line in enumerate(source.read_text(encoding="utf-8").splitlines(), start=1):
+        if not line.strip():
+            continue
+        row = json.loads(line)
+        tid = _unique_id(str(row.get("id") or f"ticket-{n}"), taken)
+        d = out_dir / tid
+        d.mkdir(parents=True, exist_ok=True)
+        desc = d / settings.bug_desc_file
+        log = d / settings.bug_log_file
+        desc.write_text(row.get("description", ""), encoding="utf-8")
+        log.write_text(row.get("log", ""), encoding="utf-8")
+        tickets.append(BugTicket(id=tid, bug_desc_path=desc.resolve(), bug_log_path=log.resolve()))
+    return tickets
+
+
+def load_tickets(source: Path, out_dir: Path) -> List[BugTicket]:
+    if source.is_dir():
+        return _tickets_from_dir(source)
+    return _tickets_from_jsonl(source, out_dir)
+
+
+# -------------------------
+# Run
+# -------------------------
+def run_ticket(ticket: BugTicket, out_dir: Path, keep_worktree: bool = False) -> dict:
+    """Runs one crew in its own worktree and writes <out_dir>/<id>/result.{md,json} + changes.patch."""
+    ticket_dir = out_dir / ticket.id
+    ticket_dir.mkdir(parents=True, exist_ok=True)
+
+    t0 = time.time()
+    result = {"id": ticket.id, "status": "failed", "error": None, "total_tokens": 0}
+    ws = None
+    try:
+        ws = open_workspace(ticket.id, ticket.bug_desc_path, ticket.bug_log_path)
+        # Every ticket runs all tasks: a fresh worktree has none of the edits a saved run (RESUME_FROM) relies on
+        output = Codeguardian(workspace=ws, check_index=False, resume_from="").crew().kickoff()
+        (ticket_dir / "result.md").write_text(str(output.raw), encoding="utf-8")
+        result["status"] = "success"
+        result["total_tokens"] = getattr(output.token_usage, "total_tokens", 0) if output.token_usage else 0
+    except Exception as e:
+        logger.exception("Ticket %s failed", ticket.id)
+        result["error"] = str(e)
+    finally:
+        if ws is not None:
+            try:
+                (ticket_dir / "changes.patch").write_text(close_workspace(ws, keep=keep_worktree), encoding="utf-8")
+            except Exception as e:
+                logger.warning("Ticket %s: could not capture diff: %s", ticket.id, e)
+
+    result["seconds"] = round(time.time() - t0, 1)
+    (ticket_dir / "result.json").write_text(json.dumps(result, indent=2), encoding="utf-8")
+    return result
+
+
+def run_batch(source: Path, out_dir: Path, workers: Optional[int] = None, keep_worktrees: bool = False) -> dict:
+    """
+    Processes every ticket of `source` with up to `workers` crews at once.
+    The index is checked once and the (cached) RAG tool is shared by all crews.
+    """
+    workers = workers or settings.batch_workers
+    out_dir = out_dir.resolve()
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    tickets = load_tickets(source, out_dir)
+    empty_trash()
+    try:
+        logger.info(ensure_repo_indexed())
+    except IndexLockTimeout as e:
+        logger.warning("%s Using the current index.", e)
+    directory_search_tool()  # warm up once, shared by every crew
+    knowledge_store()
+
+    t0 = time.time()
+    results = []
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch") as pool:
+        futures = [pool.submit(run_ticket, t, out_dir, keep_worktrees) for t in tickets]
+        for fut in as_completed(futures):
+            res = fut.result()
+            logger.info("Ticket %s: %s (%.1fs)", res["id"], res["status"], res["seconds"])
+            results.append(res)
+
+    wall = time.time() - t0
+    ok = [r for r in results if r["status"] == "success"]
+    summary = {
+        "tickets": len(results),
+        "succeeded": len(ok),
+        "failed": len(results) - len(ok),
+        "workers": workers,
+        "wall_seconds": round(wall, 1),
+        "tickets_per_hour": round(len(results) * 3600 / wall, 2) if wall > 0 else 0.0,
+        "avg_ticket_seconds": round(sum(r["seconds"] for r in results) / len(results), 1) if results else 0.0,
+        "total_tokens": sum(r["total_tokens"] for r in results),
+        "ollama_queue": ollama_scheduler().stats() if ollama_scheduler() else None,
+        "results": sorted(results, key=lambda r: r["id"]),
+    }
+    (out_dir / "summary.json").write_text(json.dumps(summary, indent=2), encoding="utf-8")
+    return summary
@@ -0,0 +1,450 @@
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import subprocess
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from codeguardian.config.settings import settings
+from codeguardian.context_pack import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+BENCH_PACKAGE = "com.acme.bench"
+UNMATCHED = "(unmatched)"
+
+
+class TaskStats(BaseModel):
+    """What the scripted model saw and answered for one task."""
+    requests: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    max_prompt_tokens: int = 0  # largest single request: how far the context grew
+    tool_calls: Dict[str, int] = Field(default_factory=dict)
+
+
+# -------------------------
+# Scripted OpenAI-compatible server
+# -------------------------
+def _react_text(turn: Dict) -> str:
+    """One transcript turn as the text a ReAct-prompted model answers with."""
+    if "tool" in turn:
+        thought = turn.get("thought", "I need more information.")
+        return f"Thought: {thought}\nAction: {turn['tool']}\nAction Input: {json.dumps(turn.get('input') or {})}"
+    if "final" in turn:
+        return f"Thought: I now know the final answer\nFinal Answer: {turn['final']}"
+    return str(turn.get("content", ""))
+
+
+def _tool_key(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
+
+
+def _embedding(text: str, dim: int) -> List[float]:
+    """Deterministic bag-of-words vector: texts sharing identifiers end up close."""
+    vec = [0.0] * dim
+    for word in re.findall(r"[A-Za-z_][A-Za-z0-9_]+", text.lower()):
+        vec[int.from_bytes(hashlib.blake2b(word.encode(), digest_size=4).digest(), "little") % dim] += 1.0
+    norm = sum(v * v for v in vec) ** 0.5 or 1.0
+    return [v / norm for v in vec]
+
+
+class ScriptedLLMServer:
+    """
+    Local stand-in for the model endpoints the pipeline calls:
+      POST /v1/chat/completions  replays the transcript script of the task the request belongs to
+      POST /v1/embeddings        (and Ollama's /api/embeddings) deterministic vectors for the RAG index
+    A request belongs to the first script whose `match` text occurs in its system/user messages. The turn is
+    the number of assistant messages so far, so concurrent tasks and repeated runs replay independently;
+    past the last turn the last one is repeated. Requests with `tools` (native function calling) get
+    tool_calls instead of ReAct text.
+
+    Transcript: {"scripts": [{"task": name, "match": text, "turns": [turn, ...]}]}, a turn being
+    {"tool": name, "input": {...}}, {"final": text} or {"content": raw text}.
+    """
+
+    def __init__(self, transcript: Dict, latency_s: float = 0.0, embed_dim: int = 64):
+        self.scripts = transcript.get("scripts") or []
+        self.latency_s = latency_s
+        self.embed_dim = embed_dim
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.tasks: Dict[str, TaskStats] = {}
+            self.embedded_texts = 0
+            self.llm_seconds = 0.0
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def __enter__(self) -> "ScriptedLLMServer":
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                self._reply({"object": "list", "data": [{"id": "scripted", "object": "model"}]})
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+                path = self.path.rstrip("/")
+                if path.endswith("/chat/completions"):
+                    self._reply(server.chat(body))
+                elif path.endswith("/embeddings") or path.endswith("/api/embed"):
+                    self._reply(server.embeddings(body, native=path.startswith("/api/")))
+                else:
+                    self.send_error(404)
+
+            def _reply(self, payload: Dict):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="scripted-llm", daemon=True).start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    # ---- endpoints
+    def chat(self, body: Dict) -> Dict:
+        t0 = time.perf_counter()
+        messages = body.get("messages") or []
+        prompt = "\n".join(str(m.get("content") or "") for m in messages if m.get("role") in ("system", "user"))
+        script = next((s for s in self.scripts if s.get("match") and s["match"] in prompt), None)
+        name = script.get("task", script["match"]) if script else UNMATCHED
+        turns = (script or {}).get("turns") or [{"final": "Done."}]
+        turn = turns[min(sum(m.get("role") == "assistant" for m in messages), len(turns) - 1)]
+
+        message: Dict = {"role": "assistant", "content": _react_text(turn)}
+        finish = "stop"
+        tools = {_tool_key(t["function"]["name"]): t["function"]["name"] for t in body.get("tools") or [] if t.get("function")}
+        if tools and "tool" in turn:
+            message = {"role": "assistant", "content": None, "tool_calls": [{
+                "id": f"call_{hashlib.sha1(json.dumps(messages).encode()).hexdigest()[:12]}",
+                "type": "function",
+                "function": {"name": tools.get(_tool_key(turn["tool"]), turn["tool"]), "arguments": json.dumps(turn.get("input") or {})},
+            }]}
+            finish = "tool_calls"
+
+        prompt_tokens = estimate_tokens("\n".join(str(m.get("content") or "") for m in messages))
+        completion_tokens = estimate_tokens(message["content"] or message["tool_calls"][0]["function"]["arguments"])
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        with self._lock:
+            stats = self.tasks.setdefault(name, TaskStats())
+            stats.requests += 1
+            stats.prompt_tokens += prompt_tokens
+            stats.completion_tokens += completion_tokens
+            stats.max_prompt_tokens = max(stats.max_prompt_tokens, prompt_tokens)
+            if "tool" in turn:
+                stats.tool_calls[turn["tool"]] = stats.tool_calls.get(turn["tool"], 0) + 1
+            self.llm_seconds += time.perf_counter() - t0
+        return {
+            "id": f"chatcmpl-{stats.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "scripted"),
+            "choices": [{"index": 0, "message": message, "finish_reason": finish}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens},
+        }
+
+    def embeddings(self, body: Dict, native: bool = False) -> Dict:
+        texts = body.get("input", body.get("prompt", ""))
+        texts = texts if isinstance(texts, list) else [texts]
+        with self._lock:
+            self.embedded_texts += len(texts)
+        vectors = [_embedding(str(t), self.embed_dim) for t in texts]
+        if native:
+            return {"embedding": vectors[0], "embeddings": vectors}
+        return {"object": "list", "data": [{"object": "embedding", "index": i, "embedding": v} for i, v in enumerate(vectors)]}
+
+
+# -------------------------
+# Synthetic target project
+# -------------------------
+class SyntheticProject(BaseModel):
+    project_path: Path
+    inputs_path: Path
+    bug_log: str
+    service_path: str  # repo-relative file holding the bug
+
+
+def _git(root: Path, *args: str) -> None:
+    subprocess.run(
+        ["git", "-c", "user.name=bench", "-c", "user.email=bench@localhost", "-c", "commit.gpgsign=false", *args],
+        cwd=str(root), check=True, capture_output=True,
+    )
+
+
+def make_synthetic_project(root: Path, services: int = 30, build_seconds: float = 0.2) -> SyntheticProject:
+    """
+    Small Gradle-style Java service (one buggy OrderService + `services` filler classes calling each other)
+    committed to git, with a fake ./gradlew that sleeps `build_seconds` and reports success, plus bug inputs.
+    """
+    project, inputs = root / "project", root / "inputs"
+    pkg_dir = project / "src/main/java" / BENCH_PACKAGE.replace(".", "/")
+    test_dir = project / "src/test/java" / BENCH_PACKAGE.replace(".", "/")
+    for d in (pkg_dir, test_dir, inputs):
+        d.mkdir(parents=True, exist_ok=True)
+
+    service_path = f"src/main/java/{BENCH_PACKAGE.replace('.', '/')}/OrderService.java"
+    (project / service_path).write_text(
+        f"package {BENCH_PACKAGE};\n\n"
+        "import java.util.List;\n\n"
+        "public class OrderService {\n"
+        "    private final OrderRepository repository;\n\n"
+        "    public OrderService(OrderRepository repository) {\n"
+        "        this.repository = repository;\n"
+        "    }\n\n"
+        "    public long total(String customerId) {\n"
+        "        List<Order> orders = repository.findByCustomer(customerId);\n"
+        "        return orders.stream().mapToLong(Order::amount).sum();\n"
+        "    }\n"
+        "}\n",
+        encoding="utf-8",
+    )
+    (pkg_dir / "Order.java").write_text(f"package {BENCH_PACKAGE};\n\npublic record Order(String id, long amount) {{\n}}\n", encoding="utf-8")
+    (pkg_dir / "OrderRepository.java").write_text(
+        f"package {BENCH_PACKAGE};\n\nimport java.util.List;\n\npublic interface OrderRepository {{\n"
+        "    List<Order> findByCustomer(String customerId);\n}\n",
+        encoding="utf-8",
+    )
+    (pkg_dir / "OrderController.java").write_text(
+        f"package {BENCH_PACKAGE};\n\npublic class OrderController {{\n"
+        "    private final OrderService service;\n\n"
+        "    public OrderController(OrderService service) {\n        this.service = service;\n    }\n\n"
+        "    public long get(String customerId) {\n        return service.total(customerId);\n    }\n}\n",
+        encoding="utf-8",
+    )
+    for i in range(services):
+        calls = f"        return new Service{i - 1}().step(input) + {i};\n" if i else "        return input.length();\n"
+        (pkg_dir / f"Service{i}.java").write_text(
+            f"package {BENCH_PACKAGE};\n\n/** Filler service {i}: gives the index, the repo map and search something to rank. */\n"
+            f"public class Service{i} {{\n    public int step(String input) {{\n{calls}    }}\n}}\n",
+            encoding="utf-8",
+        )
+    (test_dir / "OrderServiceTest.java").write_text(
+        f"package {BENCH_PACKAGE};\n\nclass OrderServiceTest {{\n    void totalOfUnknownCustomerIsZero() {{\n    }}\n}}\n",
+        encoding="utf-8",
+    )
+    (project / "build.gradle").write_text("plugins { id 'java' }\n", encoding="utf-8")
+    (project / ".gitignore").write_text("build/\n.gradle/\n", encoding="utf-8")
+    gradlew = project / "gradlew"
+    gradlew.write_text(
+        "#!/bin/sh\n# Fake build: costs a fixed time, always passes\n"
+        f"sleep {build_seconds}\n"
+        'case "$*" in *test*) echo "BUILD SUCCESSFUL: 12 tests completed, 0 failed";; *) echo "BUILD SUCCESSFUL";; esac\n',
+        encoding="utf-8",
+    )
+    gradlew.chmod(0o755)
+    _git(project, "init", "-q")
+    _git(project, "add", "-A")
+    _git(project, "commit", "-q", "-m", "Synthetic benchmark project")
+
+    bug_log = (
+        "2025-01-01 12:00:00 ERROR [http-nio-8080-exec-1] o.a.c.c.C.[dispatcherServlet] Request processing failed\n"
+        "java.lang.NullPointerException: Cannot invoke \"java.util.List.stream()\" because \"orders\" is null\n"
+        f"\tat {BENCH_PACKAGE}.OrderService.total(OrderService.java:14)\n"
+        f"\tat {BENCH_PACKAGE}.OrderController.get(OrderController.java:11)\n"
+        "\tat org.springframework.web.servlet.FrameworkServlet.service(FrameworkServlet.java:883)\n"
+    )
+    (inputs / settings.bug_log_file).write_text(bug_log, encoding="utf-8")
+    (inputs / settings.bug_desc_file).write_text(
+        "GET /customers/{id}/orders/total fails with HTTP 500 for customers without orders. Expected: 0.\n",
+        encoding="utf-8",
+    )
+    return SyntheticProject(project_path=project, inputs_path=inputs, bug_log=bug_log, service_path=service_path)
+
+
+def reset_project(project: SyntheticProject) -> None:
+    """Undoes the previous run's edits so every run replays against the same tree."""
+    _git(project.project_path, "checkout", "-q", "--", ".")
+    _git(project.project_path, "clean", "-qfd")
+
+
+def default_transcript(project: SyntheticProject) -> Dict:
+    """A typical run on the synthetic project: the tools each phase uses, in the order a model calls them."""
+    plan = {"files": [{"path": project.service_path, "change": "Treat a null order list as empty in total()"}]}
+    return {"scripts": [
+        {"task": "analysis_and_design", "match": "You are the Senior Software Architect", "turns": [
+            {"tool": "resolve_stack_trace", "input": {"trace": project.bug_log}},
+            {"tool": "local_directory_rag_batch_search", "input": {"queries": ["OrderService total orders null", "OrderRepository findByCustomer"], "k": 3}},
+            {"tool": "Project File Reader", "input": {"file_path": project.service_path, "symbol": "OrderService.total"}},
+            {"final": (
+                "ROOT CAUSE ANALYSIS: findByCustomer returns null for unknown customers.\n"
+                "ARCHITECTURAL SOLUTION: treat a missing order list as empty.\n"
+                f"---PATCH_PLAN_JSON_START---\n{json.dumps(plan)}\n---PATCH_PLAN_JSON_END---"
+            )},
+        ]},
+        {"task": "qa_test_plan", "match": "You are the QA Engineer (Test Planning)", "turns": [
+            {"tool": "Project File Reader", "input": {"file_path": project.service_path}},
+            {"final": "TEST PLAN: 1) total of a customer without orders is 0  2) total of a customer with orders is their sum."},
+        ]},
+        {"task": "implementation", "match": "You are the Senior Software Engineer (Implementation)", "turns": [
+            {"tool": "Project File Reader", "input": {"file_path": project.service_path, "symbol": "OrderService.total"}},
+            {"tool": "Project File Editor", "input": {"file_path": project.service_path, "edits": [{
+                "search": "        return orders.stream().mapToLong(Order::amount).sum();",
+                "replace": "        if (orders == null) {\n            return 0;\n        }\n        return orders.stream().mapToLong(Order::amount).sum();",
+            }]}},
+            {"tool": "syntax_check_tool", "input": {}},
+            {"tool": "build_project_tool", "input": {}},
+            {"tool": "run_unit_tests_tool", "input": {}},
+            {"final": f"Changed {project.service_path}: null order list -> 0. BUILD SUCCESS, TESTS PASSED."},
+        ]},
+        {"task": "build_and_test", "match": "You are the DevOps Engineer", "turns": [
+            {"tool": "build_project_tool", "input": {}},
+            {"tool": "run_unit_tests_tool", "input": {}},
+            {"final": "BUILD SUCCESS. TESTS PASSED."},
+        ]},
+        {"task": "functional_verification", "match": "You are the QA Engineer (Black-Box Functional Testing)", "turns": [
+            {"tool": "run_unit_tests_tool", "input": {}},
+            {"final": "RELEASE APPROVED: all test plan cases pass."},
+        ]},
+    ]}
+
+
+# -------------------------
+# Runner
+# -------------------------
+def _configure(project: SyntheticProject, work_dir: Path, url: str) -> None:
+    """Points the pipeline at the synthetic project, a private index and the scripted server."""
+    settings.project_path = project.project_path
+    settings.inputs_path = project.inputs_path
+    settings.chroma_dir = work_dir / "chroma"
+    settings.knowledge_store_dir = work_dir / "knowledge"
+    settings.workspaces_dir = work_dir / "workspaces"
+    settings.workspace_mode = "inplace"
+    # Every run does the full work: no replayed completions, no resumed tasks, task outputs stay in work_dir
+    settings.runs_dir = work_dir / "runs"
+    settings.llm_cache_dir = work_dir / "llm_cache"
+    settings.llm_cache = False
+    settings.resume_from = ""
+    settings.ollama_base_url = url
+    settings.openai_api_base = f"{url}/v1"
+    settings.openai_api_key = "benchmark"
+    # Not a known model name: routed through LiteLLM's OpenAI-compatible client to API_BASE
+    settings.openai_model_name = "openai/scripted-benchmark"
+    os.environ.update({
+        "PROJECT_PATH": str(project.project_path),
+        "INPUTS_PATH": str(project.inputs_path),
+        "CREWAI_TRACING_ENABLED": "false",
+        "ANONYMIZED_TELEMETRY": "False",
+        "CREWAI_DISABLE_TELEMETRY": "true",
+        "OTEL_SDK_DISABLED": "true",
+    })
+
+
+def _code_version() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=str(Path(__file__).parent), capture_output=True, text=True)
+        return out.stdout.strip() or "unknown"
+    except OSError:
+        return "unknown"
+
+
+def run_benchmark(
+        work_dir: Path,
+        runs: int = 2,
+        transcript_path: Optional[Path] = None,
+        services: int = 30,
+        build_seconds: float = 0.2,
+        latency_ms: float = 0.0,
+) -> Dict:
+    """
+    Runs the full crew `runs` times against the synthetic project and the scripted model.
+    Run 1 builds the index and knowledge store (cold); later runs reuse them (warm).
+    """
+    from codeguardian.crew import Codeguardian
+    from codeguardian.tools.tools import ensure_repo_indexed
+
+    work_dir = Path(work_dir).resolve()
+    work_dir.mkdir(parents=True, exist_ok=True)
+    t0 = time.perf_counter()
+    project = make_synthetic_project(work_dir, services=services, build_seconds=build_seconds)
+    setup_seconds = time.perf_counter() - t0
+    transcript = json.loads(Path(transcript_path).read_text(encoding="utf-8")) if transcript_path else default_transcript(project)
+
+    results = []
+    with ScriptedLLMServer(transcript, latency_s=latency_ms / 1000.0) as server:
+        _configure(project, work_dir, server.url)
+        for n in range(1, runs + 1):
+            reset_project(project)
+            server.reset_stats()
+            phases: Dict[str, float] = {}
+
+            t = time.perf_counter()
+            ensure_repo_indexed()
+            phases["index"] = time.perf_counter() - t
+
+            t = time.perf_counter()
+            crew = Codeguardian(check_index=False, tracing=False, resume_from="").crew()
+            phases["crew_setup"] = time.perf_counter() - t
+
+            t = time.perf_counter()
+            crew.kickoff()
+            phases["kickoff"] = time.perf_counter() - t
+
+            tasks = {}
+            for task in crew.tasks:
+                stats = server.tasks.get(task.name, TaskStats())
+                tasks[task.name] = {"seconds": round(task.execution_duration or 0.0, 3), **stats.model_dump()}
+            if UNMATCHED in server.tasks:
+                tasks[UNMATCHED] = {"seconds": 0.0, **server.tasks[UNMATCHED].model_dump()}
+            results.append({
+                "run": n,
+                "phases": {k: round(v, 3) for k, v in phases.items()},
+                "tasks": tasks,
+                "tool_calls": dict(sum((Counter(t["tool_calls"]) for t in tasks.values()), Counter())),
+                "llm_requests": sum(t["requests"] for t in tasks.values()),
+                "llm_seconds": round(server.llm_seconds, 3),
+                "embedded_texts": server.embedded_texts,
+            })
+            logger.info("Benchmark run %d: %s", n, results[-1]["phases"])
+
+    return {
+        "code_version": _code_version(),
+        "services": services,
+        "build_seconds": build_seconds,
+        "latency_ms": latency_ms,
+        "setup_seconds": round(setup_seconds, 3),
+        "runs": results,
+    }
+
+
+def format_report(result: Dict) -> str:
+    lines = [
+        f"Pipeline benchmark @ {result['code_version']} ({result['services']} filler classes, "
+        f"fake build {result['build_seconds']}s, model latency {result['latency_ms']}ms)",
+    ]
+    for run in result["runs"]:
+        phases = ", ".join(f"{k} {v:.2f}s" for k, v in run["phases"].items())
+        lines.append(f"\nRun {run['run']}: {phases}; LLM {run['llm_requests']} requests / {run['llm_seconds']:.2f}s, embedded {run['embedded_texts']} texts")
+        lines.append(f"  {'task':<26}{'wall s':>8}{'reqs':>6}{'prompt tok':>12}{'max prompt':>12}{'compl tok':>11}  tool calls")
+        for name, t in run["tasks"].items():
+            calls = ", ".join(f"{tool} x{count}" for tool, count in sorted(t["tool_calls"].items())) or "-"
+            lines.append(
+                f"  {name:<26}{t['seconds']:>8.2f}{t['requests']:>6}{t['prompt_tokens']:>12}"
+                f"{t['max_prompt_tokens']:>12}{t['completion_tokens']:>11}  {calls}"
+            )
+    return "\n".join(lines)
@@ -1,5 +1,5 @@
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
 
@@ -16,6 +16,10 @@ class Settings(BaseSettings):
     # Optional paths with sensible defaults
     inputs_path: Path = Field(default=Path("inputs"), description="Path to input files (bug reports, etc)")
     chroma_dir: Path = Field(default=Path("./content/.chroma"), description="Path to ChromaDB storage")
+    knowledge_store_dir: Path = Field(default=Path("./content/.knowledge"), description="Persisted knowledge-base embeddings")
+    workspaces_dir: Path = Field(default=Path("./content/.workspaces"), description="Where isolated per-run worktrees are created")
+    llm_cache_dir: Path = Field(default=Path("./content/.llm_cache"), description="On-disk LLM completion cache (LLM_CACHE=1)")
+    runs_dir: Path = Field(default=Path("./content/.runs"), description="Saved task outputs per bug report (RESUME_FROM)")
     
     # Bug files
     bug_desc_file: str = Field(default="bug-desc.txt", description="Name of the bug description file")
@@ -25,14 +29,46 @@ class Settings(BaseSettings):
     openai_api_key: Optional[str] = Field(default=None, alias="OPENAI_API_KEY")
     openai_model_name: str = Field(default="gpt-4o", alias="MODEL") # Note: .env uses MODEL, not OPENAI_MODEL_NAME
     openai_api_base: Optional[str] = Field(default=None, alias="API_BASE")
+    llm_cache: bool = Field(default=False, alias="LLM_CACHE", description="Replay identical LLM calls from LLM_CACHE_DIR instead of calling the model")
+    resume_from: str = Field(default="", alias="RESUME_FROM", description="Start the crew at this task, earlier tasks use their saved outputs (empty = run all)")
     
     # Ollama Configuration
     ollama_base_url: str = Field(default="http://localhost:11434", alias="OLLAMA_BASE_URL")
     embed_model: str = Field(default="nomic-embed-text:latest", alias="EMBED_MODEL")
+    ollama_max_concurrent: int = Field(default=4, ge=0, alias="OLLAMA_MAX_CONCURRENT", description="Max requests in flight to OLLAMA_BASE_URL from this process (0 = no scheduling)")
+    ollama_agent_concurrent: int = Field(default=2, ge=1, alias="OLLAMA_AGENT_CONCURRENT", description="Max agent LLM calls in flight (when API_BASE is the Ollama server)")
+    ollama_bulk_concurrent: int = Field(default=2, ge=1, alias="OLLAMA_BULK_CONCURRENT", description="Max indexing / knowledge-sync embedding requests in flight")
+    ollama_max_queued: int = Field(default=64, ge=1, alias="OLLAMA_MAX_QUEUED", description="Max waiting requests per priority class; further callers block (backpressure)")
+    ollama_queue_timeout_s: float = Field(default=600, ge=0, alias="OLLAMA_QUEUE_TIMEOUT_S", description="Seconds a caller blocks on a full queue, then fails")
+
+    # RAG index
+    index_keep_generations: int = Field(default=2, ge=0, alias="INDEX_KEEP_GENERATIONS", description="Previous index generations kept after a rebuild (rollback)")
+    rag_chunk_storage: str = Field(default="text", alias="RAG_CHUNK_STORAGE", description="text = chunk text stored in the vector store, ref = only byte ranges (text read from the work tree / git when searching)")
+    index_lock_timeout_s: float = Field(default=300, ge=0, alias="INDEX_LOCK_TIMEOUT_S", description="Seconds to wait for another process holding the index lock, then fail (0 = fail immediately)")
+
+    # RAG post-retrieval
+    rag_overfetch: int = Field(default=4, ge=1, alias="RAG_OVERFETCH", description="Chunks fetched per requested result before collapsing/MMR")
+    rag_mmr_lambda: float = Field(default=0.5, ge=0.0, le=1.0, alias="RAG_MMR_LAMBDA", description="MMR trade-off: 1 = relevance only, lower = more diverse results")
+    rag_rerank_model: str = Field(default="", alias="RAG_RERANK_MODEL", description="Optional local cross-encoder, e.g. cross-encoder/ms-marco-MiniLM-L-6-v2 (empty = off)")
+
+    # Knowledge base
+    knowledge_dirs: str = Field(default="knowledge", alias="KNOWLEDGE_DIRS", description="Knowledge files/directories (.txt/.md, recursive), comma separated")
+
+    # Pipeline
+    pipeline_max_parallel: int = Field(default=2, ge=1, alias="PIPELINE_MAX_PARALLEL", description="Max number of crew tasks running concurrently (1 = strictly sequential)")
+    context_pack_tokens: int = Field(default=3000, ge=0, alias="CONTEXT_PACK_TOKENS", description="Token budget of the precomputed stack-trace context for the architect (0 = off)")
+    repo_map_tokens: int = Field(default=1500, ge=0, alias="REPO_MAP_TOKENS", description="Token budget of the ranked repository outline for the architect (0 = off)")
+    task_context_tokens: int = Field(default=2000, ge=0, alias="TASK_CONTEXT_TOKENS", description="Token budget of the earlier task outputs a task gets as context (0 = full outputs)")
+    batch_workers: int = Field(default=2, ge=1, alias="BATCH_WORKERS", description="Number of crews running concurrently in batch mode")
+
+    # Workspaces
+    workspace_mode: str = Field(default="inplace", alias="WORKSPACE_MODE", description="inplace = edit PROJECT_PATH, worktree = isolated git worktree per run")
+    workspace_cache_dirs: str = Field(default="node_modules,.gradle,.angular/cache,target,build", alias="WORKSPACE_CACHE_DIRS", description="Untracked build caches cloned into new worktrees (comma separated)")
+    workspace_link_mode: str = Field(default="auto", alias="WORKSPACE_LINK_MODE", description="auto (reflink, else copy) | hardlink (reflink, else hardlink) | copy")
 
     @property
-    def index_meta_path(self) -> Path:
-        return self.chroma_dir / "index.meta.json"
+    def knowledge_paths(self) -> List[Path]:
+        return [Path(p.strip()) for p in self.knowledge_dirs.split(",") if p.strip()]
 
     @property
     def bug_desc_path(self) -> Path:
@@ -0,0 +1,194 @@
+import re
+import logging
+from typing import List, Optional
+
+from crewai.tasks.task_output import TaskOutput
+
+from codeguardian.context_pack import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+PLAN_START = "---PATCH_PLAN_JSON_START---"
+PLAN_END = "---PATCH_PLAN_JSON_END---"
+DIVIDER = "\n\n----------\n\n"  # crewai's separator between context outputs
+SUMMARY_HEADING = "\n\nSUMMARY:\n"
+
+MAX_FAILING_TESTS = 20
+MAX_BLOCK_LINES = 12  # longer code/log blocks keep their first and last lines
+
+_PLAN = re.compile(re.escape(PLAN_START) + r".*?" + re.escape(PLAN_END), re.S)
+_PATH = re.compile(r"[\w.@-]+(?:/[\w.@-]+)+\.(?:java|kt|groovy|ts|tsx|js|jsx|py|xml|ya?ml|properties|gradle|json|html|scss|css|sql)\b")
+_CHANGED_HEADING = re.compile(r"changed\s+files|files\s+(?:changed|modified)", re.I)
+_VERDICT = (
+    re.compile(r"^\W*(?:build\s+)?status\W*\s*(SUCCESS|FAILURE|FAILED|RELEASE READY|REJECTED)\b", re.I | re.M),
+    re.compile(r"\b(BUILD (?:SUCCESS(?:FUL)?|FAILED|FAILURE)|TESTS FAILED)\b"),
+)
+_FAILING_TEST = (
+    re.compile(r"^\s*([\w.$]+ > .+? FAILED)\s*$"),                                   # Gradle
+    re.compile(r"^\[ERROR\]\s+([\w.$]+[.#]\w+(?::\d+)?)(?:\s|$)"),                     # Maven surefire
+    re.compile(r"^(?:\[\w+\])?\s*(Tests run: \d+, (?:Failures: [1-9]|Failures: 0, Errors: [1-9]).*)$"),  # JUnit summary
+    re.compile(r"^\s*FAILED\s+(\S+::\S+)"),                                           # pytest
+    re.compile(r"^\s*●\s+(.+›.+)$"),                                                  # jest
+)
+
+
+def patch_plan(text: str) -> str:
+    """The PATCH_PLAN_JSON block including its markers ('' if there is none)."""
+    m = _PLAN.search(text)
+    return m.group(0) if m else ""
+
+
+def changed_files(text: str) -> List[str]:
+    """Paths listed under a 'Changed files' heading, up to the next unindented line without a path."""
+    files: List[str] = []
+    lines = text.splitlines()
+    for i, line in enumerate(lines):
+        if not _CHANGED_HEADING.search(line):
+            continue
+        files += _PATH.findall(line)
+        for nxt in lines[i + 1:]:
+            paths = _PATH.findall(nxt)
+            if not paths and nxt.strip() and not nxt[:1].isspace():
+                break
+            files += paths
+    return list(dict.fromkeys(files))
+
+
+def verdict(text: str) -> str:
+    """First build / release verdict stated in the text (SUCCESS, FAILURE, RELEASE READY, ...)."""
+    for rx in _VERDICT:
+        m = rx.search(text)
+        if m:
+            return m.group(1).upper()
+    return ""
+
+
+def failing_tests(text: str) -> List[str]:
+    found: List[str] = []
+    for line in text.splitlines():
+        for rx in _FAILING_TEST:
+            m = rx.match(line)
+            if m:
+                found.append(m.group(1).strip())
+                break
+    return list(dict.fromkeys(found))[:MAX_FAILING_TESTS]
+
+
+def _shrink_blocks(lines: List[str]) -> List[str]:
+    """Fenced blocks (build logs, code) longer than MAX_BLOCK_LINES keep their head and tail."""
+    out: List[str] = []
+    block: Optional[List[str]] = None
+    keep = MAX_BLOCK_LINES // 2
+    for line in lines:
+        if line.lstrip().startswith("```"):
+            if block is None:
+                block = [line]
+                continue
+            if len(block) - 1 > MAX_BLOCK_LINES:
+                out += block[:keep + 1] + [f"[... {len(block) - 1 - 2 * keep} lines omitted ...]"] + block[-keep:]
+            else:
+                out += block
+            out.append(line)
+            block = None
+        elif block is not None:
+            block.append(line)
+        else:
+            out.append(line)
+    return out + (block or [])
+
+
+def compress_text(text: str, max_tokens: int) -> str:
+    """
+    Shrinks free text to about `max_tokens`: blank-line runs and repeated lines are dropped, long fenced blocks
+    keep their first and last lines, then the middle is cut (the head holds the summary, the tail the conclusion).
+    """
+    lines: List[str] = []
+    for line in text.splitlines():
+        line = line.rstrip()
+        if lines and line == lines[-1]:
+            continue
+        lines.append(line)
+    text = "\n".join(_shrink_blocks(lines)).strip()
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    chars = max(0, max_tokens * 4 - 40)
+    head = text[:chars * 2 // 3].rsplit("\n", 1)[0]
+    tail = text[len(text) - chars // 3:].split("\n", 1)[-1] if chars >= 3 else ""
+    omitted = estimate_tokens(text) - estimate_tokens(head + tail)
+    return f"{head.rstrip()}\n[... ~{omitted} tokens omitted ...]\n{tail.lstrip()}".strip()
+
+
+def _listing(title: str, items: List[str], omitted: int) -> str:
+    more = [f"- ... {omitted} more"] if omitted else []
+    return f"{title}:\n" + "\n".join([f"- {item}" for item in items] + more)
+
+
+def compress_output(output: TaskOutput, max_tokens: int) -> str:
+    """
+    One task output within `max_tokens`. The structured parts downstream tasks act on (PATCH_PLAN_JSON, changed
+    files, build verdict, failing tests) are kept verbatim; the rest of the text gets the remaining budget.
+    If the structured parts alone do not fit, the lists are cut first (failing tests, then changed files);
+    the verdict and the patch plan are never cut, so an output may still exceed its budget (logged).
+    """
+    raw = output.raw or ""
+    if estimate_tokens(raw) <= max_tokens:
+        return raw
+    plan = patch_plan(raw)
+    files = changed_files(raw)
+    status = verdict(raw)
+    failures = failing_tests(raw)
+
+    def structured(n_files: int, n_failures: int) -> str:
+        parts = [f"OUTPUT OF {output.name or output.agent} (compressed from ~{estimate_tokens(raw)} tokens)"]
+        if status:
+            parts.append(f"STATUS: {status}")
+        if files:
+            parts.append(_listing("CHANGED FILES", files[:n_files], len(files) - n_files))
+        if failures:
+            parts.append(_listing("FAILING TESTS", failures[:n_failures], len(failures) - n_failures))
+        if plan:
+            parts.append(plan)
+        return "\n\n".join(parts)
+
+    n_files, n_failures = len(files), len(failures)
+    text = structured(n_files, n_failures)
+    while estimate_tokens(text) > max_tokens and (n_failures or n_files):
+        if n_failures:
+            n_failures -= 1
+        else:
+            n_files -= 1
+        text = structured(n_files, n_failures)
+    budget = max_tokens - estimate_tokens(text + SUMMARY_HEADING)
+    if budget > 0:
+        rest = raw.replace(plan, "[PATCH_PLAN_JSON: see above]") if plan else raw
+        summary = SUMMARY_HEADING + compress_text(rest, budget)
+        if estimate_tokens(text + summary) <= max_tokens:  # a tiny budget cannot even hold the cut marker
+            text += summary
+    elif max_tokens < estimate_tokens(text):
+        logger.warning(
+            "Context of %s is ~%d tokens over its budget of %d: its verdict / patch plan alone do not fit",
+            output.name or output.agent, estimate_tokens(text) - max_tokens, max_tokens,
+        )
+    return text
+
+
+class ContextCompressor:
+    """
+    Builds a task's context from the outputs of its context tasks within `max_tokens` (DagCrew.context_compressor).
+    Outputs that fit an equal share are passed unchanged; their unused share goes to the larger ones.
+    """
+
+    def __init__(self, max_tokens: int):
+        self.max_tokens = max_tokens
+
+    def __call__(self, outputs: List[TaskOutput]) -> str:
+        if not outputs:
+            return ""
+        sizes = [estimate_tokens(o.raw or "") for o in outputs]
+        if sum(sizes) <= self.max_tokens:
+            return DIVIDER.join(o.raw for o in outputs)
+        small = {i for i, size in enumerate(sizes) if size <= self.max_tokens // len(outputs)}
+        share = (self.max_tokens - sum(sizes[i] for i in small)) // max(1, len(outputs) - len(small))
+        texts = [o.raw if i in small else compress_output(o, share) for i, o in enumerate(outputs)]
+        logger.info("Task context compressed from ~%d to ~%d tokens", sum(sizes), sum(map(estimate_tokens, texts)))
+        return DIVIDER.join(texts)
@@ -0,0 +1,343 @@
+import re
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+
+class StackFrame(BaseModel):
+    """One frame of a stack trace (Java, JS/TS or Python)."""
+    raw: str
+    symbol: str = ""          # com.x.Foo.bar / FooComponent.load / handler
+    method: str = ""          # bar / load / handler
+    file: str = ""            # Foo.java / src/app/foo.ts / app/x.py
+    line: Optional[int] = None
+
+
+class Snippet(BaseModel):
+    path: str                 # repo-relative, forward slashes
+    start: int                # 1-based, inclusive
+    end: int
+    title: str
+    text: str
+
+
+# -------------------------
+# Stack trace parsing
+# -------------------------
+_JAVA_FRAME = re.compile(r"^\s*at\s+(?P<symbol>[\w$.<>/]+)\((?P<file>[^:()]+?)(?::(?P<line>\d+))?\)")
+_JS_FRAME = re.compile(r"^\s*at\s+(?:(?P<symbol>[\w$.<>\[\] ]+?)\s+\()?(?P<file>[^()\s]+?):(?P<line>\d+)(?::\d+)?\)?\s*$")
+_PY_FRAME = re.compile(r'^\s*File\s+"(?P<file>[^"]+)",\s+line\s+(?P<line>\d+),\s+in\s+(?P<symbol>[\w<>.]+)')
+
+# Library / runtime frames that never resolve to project sources
+_FOREIGN_PREFIXES = (
+    "java.", "javax.", "jakarta.", "jdk.", "sun.", "com.sun.", "kotlin.", "scala.",
+    "org.springframework.", "org.apache.", "org.hibernate.", "org.junit.", "com.fasterxml.",
+    "io.netty.", "reactor.", "org.eclipse.", "ch.qos.", "net.bytebuddy.",
+)
+_FOREIGN_PATH_PARTS = ("node_modules/", "site-packages/", "webpack/", "internal/", "zone.js", "<anonymous>")
+
+
+def _method_of(symbol: str) -> str:
+    name = symbol.rsplit(".", 1)[-1]
+    # lambda$process$0 -> process, <init> stays as is
+    m = re.match(r"lambda\$([\w]+)\$\d+", name)
+    return m.group(1) if m else name.split("$")[0] or name
+
+
+def parse_stack_frames(log: str) -> List[StackFrame]:
+    """Extracts stack frames from a log, in trace order (innermost first for Java/JS)."""
+    frames: List[StackFrame] = []
+    for line in log.splitlines():
+        for rx in (_JAVA_FRAME, _PY_FRAME, _JS_FRAME):
+            m = rx.match(line)
+            if not m:
+                continue
+            symbol = (m.group("symbol") or "").strip()
+            frames.append(StackFrame(
+                raw=line.strip(),
+                symbol=symbol,
+                method=_method_of(symbol) if symbol else "",
+                file=m.group("file").replace("\\", "/"),
+                line=int(m.group("line")) if m.group("line") else None,
+            ))
+            break
+    return frames
+
+
+def is_foreign_frame(frame: StackFrame) -> bool:
+    if frame.symbol.startswith(_FOREIGN_PREFIXES):
+        return True
+    return any(part in frame.file for part in _FOREIGN_PATH_PARTS)
+
+
+# -------------------------
+# Frame -> file
+# -------------------------
+def candidate_suffixes(frame: StackFrame) -> List[str]:
+    """Repo-relative path suffixes that identify the frame's source file."""
+    f = frame.file
+    if f.endswith(".java") and "." in frame.symbol:
+        # com.x.Foo.bar + Foo.java -> com/x/Foo.java
+        package = frame.symbol.rsplit(".", 2)[0] if frame.symbol.count(".") >= 2 else ""
+        package = package.split("$")[0]
+        return [f"{package.replace('.', '/')}/{f}" if package else f, f]
+    # JS/TS/Python: strip URL scheme / webpack prefixes and leading ./
+    f = re.sub(r"^[a-z]+://[^/]*/", "", f)
+    f = re.sub(r"^(webpack:/+|\./|/)+", "", f)
+    return [f, Path(f).name]
+
+
+class FileLocator:
+    """Resolves frame file names against the files of the project (suffix match)."""
+
+    def __init__(self, root: Path, files: Iterable[Path]):
+        self.root = root
+        self._by_name: Dict[str, List[str]] = {}
+        for p in files:
+            try:
+                rel = str(p.relative_to(root)).replace("\\", "/")
+            except ValueError:
+                continue
+            self._by_name.setdefault(p.name, []).append(rel)
+
+    def resolve(self, frame: StackFrame) -> Optional[str]:
+        for suffix in candidate_suffixes(frame):
+            name = suffix.rsplit("/", 1)[-1]
+            hits = [rel for rel in self._by_name.get(name, []) if rel == suffix or rel.endswith("/" + suffix)]
+            if hits:
+                # Prefer main sources over tests when a name exists in both
+                hits.sort(key=lambda r: ("/test/" in r or ".spec." in r, len(r)))
+                return hits[0]
+        return None
+
+
+# -------------------------
+# Method extraction
+# -------------------------
+_STRINGS = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|`[^`]*`')
+_CONTROL = {"if", "for", "while", "switch", "catch", "return", "new", "else", "do", "try", "synchronized", "throw"}
+_DECL = re.compile(r"^\s*(?:@[\w.]+(?:\([^)]*\))?\s*)*(?:[\w<>\[\],.?]+\s+)*?(?P<name>[\w$]+)\s*(?:<[^>]*>)?\s*\(")
+
+
+def code_only(line: str) -> str:
+    return _STRINGS.sub('""', line.split("//", 1)[0])
+
+
+def declared_name(line: str) -> Optional[str]:
+    """Name of the method/function declared on this line, or None."""
+    code = code_only(line)
+    if code.rstrip().endswith(";"):
+        return None
+    m = _DECL.match(code)
+    if not m or m.group("name") in _CONTROL:
+        return None
+    # Calls like `foo(x)` also match: require a type/modifier before the name or a body start
+    head = code[: m.start("name")].strip()
+    if head or "{" in code or code.rstrip().endswith(")"):
+        return m.group("name")
+    return None
+
+
+def is_declaration(line: str, name: Optional[str]) -> bool:
+    found = declared_name(line)
+    return found is not None and (not name or found == name)
+
+
+def block_end_braces(lines: List[str], start: int) -> int:
+    depth = 0
+    opened = False
+    for i in range(start, len(lines)):
+        code = code_only(lines[i])
+        for ch in code:
+            if ch == "{":
+                depth += 1
+                opened = True
+            elif ch == "}":
+                depth -= 1
+                if opened and depth <= 0:
+                    return i
+        if not opened and code.rstrip().endswith(";"):
+            return i  # abstract / interface method
+    return len(lines) - 1
+
+
+def block_end_indent(lines: List[str], start: int) -> int:
+    indent = len(lines[start]) - len(lines[start].lstrip())
+    end = start
+    for i in range(start + 1, len(lines)):
+        if not lines[i].strip():
+            continue
+        if len(lines[i]) - len(lines[i].lstrip()) <= indent:
+            break
+        end = i
+    return end
+
+
+def enclosing_method(lines: List[str], line_no: Optional[int], name: Optional[str], python: bool = False) -> Optional[Tuple[int, int]]:
+    """
+    0-based (start, end) of the method containing `line_no` (1-based), or of the
+    declaration of `name` when the line is unknown. None if nothing is found.
+    """
+    if name in ("<init>", "<clinit>", "<anonymous>"):
+        name = None
+    if python:
+        fname = re.escape(name) if name else r"\w+"
+        decl = re.compile(rf"^\s*(?:async\s+)?def\s+{fname}\s*\(")
+        is_decl = lambda l: bool(decl.match(l))
+        block_end = block_end_indent
+    else:
+        is_decl = lambda l: is_declaration(l, name)
+        block_end = block_end_braces
+
+    if line_no is not None and 1 <= line_no <= len(lines):
+        target = line_no - 1
+        for i in range(target, max(-1, target - 400), -1):
+            if is_decl(lines[i]):
+                end = block_end(lines, i)
+                if end >= target:
+                    return i, end
+                break
+        return None
+
+    for i, l in enumerate(lines):
+        if name and is_decl(l):
+            return i, block_end(lines, i)
+    return None
+
+
+# -------------------------
+# Packing
+# -------------------------
+def estimate_tokens(text: str) -> int:
+    # ~4 chars per token for code; good enough for budgeting
+    return max(1, len(text) // 4)
+
+
+def _render(lines: List[str], start: int, end: int) -> str:
+    width = len(str(end + 1))
+    return "\n".join(f"{i + 1:>{width}} | {lines[i]}" for i in range(start, end + 1))
+
+
+class ContextPacker:
+    """
+    Turns a bug log into a token-budgeted bundle of source snippets:
+      1) stack frames -> project files (library frames are skipped)
+      2) each frame -> its enclosing method (the frames below it are its callers)
+      3) optional: more call sites of the top method, found via the RAG index
+    Frames are resolved through the symbol index when given (exact, O(1) per frame),
+    otherwise by file name against `files`.
+    """
+
+    def __init__(self, root: Path, files: Optional[Iterable[Path]] = None, symbols=None, search=None, max_tokens: int = 3000, max_frames: int = 8):
+        self.root = root
+        self.locator = FileLocator(root, files) if files is not None else None
+        self.symbols = symbols  # SymbolIndex-like: resolve_frame(frame) -> (path, span) | None
+        self.search = search  # callable(query, k) -> list of repo-relative paths
+        self.max_tokens = max_tokens
+        self.max_frames = max_frames
+        self._lines: Dict[str, List[str]] = {}
+
+    def _read(self, rel: str) -> List[str]:
+        if rel not in self._lines:
+            try:
+                self._lines[rel] = (self.root / rel).read_text(encoding="utf-8", errors="ignore").splitlines()
+            except OSError:
+                self._lines[rel] = []
+        return self._lines[rel]
+
+    def resolve(self, frame: StackFrame) -> Optional[Tuple[str, Optional[Tuple[int, int]]]]:
+        """Frame -> (repo-relative path, 1-based method span or None)."""
+        if self.symbols is not None:
+            hit = self.symbols.resolve_frame(frame)
+            if hit:
+                return hit
+        if self.locator is not None:
+            rel = self.locator.resolve(frame)
+            if rel:
+                return rel, None
+        return None
+
+    def frame_snippet(self, frame: StackFrame, rel: str, title: str, span: Optional[Tuple[int, int]] = None) -> Optional[Snippet]:
+        lines = self._read(rel)
+        if not lines:
+            return None
+        if span is not None:
+            span = (span[0] - 1, min(span[1], len(lines)) - 1)
+        else:
+            span = enclosing_method(lines, frame.line, frame.method or None, python=rel.endswith(".py"))
+        if span is None:
+            if frame.line is None:
+                return None
+            span = (max(0, frame.line - 16), min(len(lines) - 1, frame.line + 15))
+        start, end = span
+        return Snippet(path=rel, start=start + 1, end=end + 1, title=title, text=_render(lines, start, end))
+
+    def caller_snippets(self, frame: StackFrame, exclude: set) -> List[Snippet]:
+        if not self.search or not frame.method or frame.method.startswith("<"):
+            return []
+        call = re.compile(rf"\b{re.escape(frame.method)}\s*\(")
+        out = []
+        for rel in self.search(f"{frame.symbol} {frame.method}(", 6):
+            lines = self._read(rel)
+            for i, l in enumerate(lines):
+                if not call.search(l) or is_declaration(l, frame.method) or (rel, i + 1) in exclude:
+                    continue
+                span = enclosing_method(lines, i + 1, None, python=rel.endswith(".py"))
+                start, end = span or (max(0, i - 10), min(len(lines) - 1, i + 10))
+                out.append(Snippet(path=rel, start=start + 1, end=end + 1, title=f"caller of {frame.method}", text=_render(lines, start, end)))
+                break
+        return out
+
+    def _fit(self, snippet: Snippet, focus: Optional[int], budget: int) -> Optional[Snippet]:
+        """Shrinks a snippet to a window around `focus` so it fits `budget` tokens."""
+        if estimate_tokens(snippet.text) <= budget:
+            return snippet
+        lines = self._read(snippet.path)
+        focus = (focus or snippet.start) - 1
+        half = max(3, (budget * 4 // 80) // 2)  # ~80 chars per rendered line
+        start, end = max(snippet.start - 1, focus - half), min(snippet.end - 1, focus + half)
+        text = _render(lines, start, end)
+        if estimate_tokens(text) > budget:
+            return None
+        return Snippet(path=snippet.path, start=start + 1, end=end + 1, title=snippet.title + " (trimmed)", text=text)
+
+    def pack(self, log: str) -> str:
+        frames = [f for f in parse_stack_frames(log) if not is_foreign_frame(f)]
+        resolved: List[Tuple[StackFrame, str, Optional[Tuple[int, int]]]] = []
+        for f in frames:
+            hit = self.resolve(f)
+            if hit:
+                resolved.append((f, hit[0], hit[1]))
+        if not resolved:
+            return ""
+
+        candidates: List[Tuple[Snippet, Optional[int]]] = []
+        seen = set()
+        for n, (f, rel, span) in enumerate(resolved[: self.max_frames]):
+            title = f"frame #{n + 1}: {f.symbol or f.method} ({Path(rel).name}:{f.line or '?'})"
+            sn = self.frame_snippet(f, rel, title, span)
+            if sn and (sn.path, sn.start) not in seen:
+                seen.add((sn.path, sn.start))
+                candidates.append((sn, f.line))
+        top = resolved[0][0]
+        for sn in self.caller_snippets(top, {(rel, f.line) for f, rel, _ in resolved}):
+            if (sn.path, sn.start) not in seen:
+                seen.add((sn.path, sn.start))
+                candidates.append((sn, None))
+
+        budget = self.max_tokens
+        parts = []
+        for sn, focus in candidates:
+            fitted = self._fit(sn, focus, budget - 20)
+            if fitted is None:
+                continue
+            block = f"### {fitted.path}:{fitted.start}-{fitted.end} — {fitted.title}\n{fitted.text}\n"
+            budget -= estimate_tokens(block)
+            parts.append(block)
+            if budget <= 100:
+                break
+        return "\n".join(parts)
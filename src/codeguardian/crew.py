@@ -1,12 +1,16 @@
-import os
 import logging
-from pathlib import Path
+from functools import lru_cache
+from typing import Optional
 from dotenv import load_dotenv
 from crewai import Crew, Process, LLM
 from crewai.project import CrewBase, crew
-from crewai.knowledge.source.text_file_knowledge_source import TextFileKnowledgeSource
 
 from .config.settings import settings
+from .scheduler import DagCrew, TaskOutputStore, run_key
+from .llm_cache import CompletionCache, cache_completions
+from .context_budget import ContextCompressor
+from .workspace import Workspace
+from .knowledge import crew_knowledge
 from .agents import (
     build_senior_software_architect, 
     build_senior_software_engineer,
@@ -16,88 +20,117 @@ from .agents import (
 from .tasks import (
     analysis_and_design_task, 
     implementation_task,
+    qa_test_plan_task,
     build_and_test_task,
-    functional_verification_task
+    functional_verification_task,
+    add_run_context
 )
 from .tools.tools import (
     architect_tools, 
     engineer_tools, 
     devops_tools,
     qa_tools,
-    ensure_repo_indexed
+    qa_planning_tools,
+    bug_context_pack,
+    repo_map_context,
+    ensure_repo_indexed,
+    knowledge_store,
+    ollama_scheduler,
 )
+from .tools.request_scheduler import Priority, same_server, schedule_calls
+from .tools.index_lock import IndexLockTimeout
 
 load_dotenv(override=True)
 
 
+@lru_cache(maxsize=1)
+def completion_cache() -> CompletionCache:
+    return CompletionCache(settings.llm_cache_dir / "completions.sqlite")
+
+
 def _llm() -> LLM:
-    return LLM(
+    llm = LLM(
         model=settings.openai_model_name,
         base_url=settings.openai_api_base,
         api_key=settings.openai_api_key,
     )
+    scheduler = ollama_scheduler()
+    if scheduler is not None and same_server(settings.openai_api_base, settings.ollama_base_url):
+        # Agent turns share the Ollama server with the embeddings: after query embeddings, before indexing
+        llm = schedule_calls(llm, scheduler, Priority.AGENT)
+    if settings.llm_cache:
+        # Identical calls of an earlier run (same prompt, tools and sampling params) are replayed from disk
+        llm = cache_completions(llm, completion_cache())
+    return llm
 
 
 @CrewBase
 class Codeguardian:
-    """Full Pipeline: Architect -> Engineer -> DevOps -> QA"""
+    """Full Pipeline: Architect -> (Engineer -> DevOps | QA test plan) -> QA"""
+
+    def __init__(
+            self,
+            workspace: Optional[Workspace] = None,
+            check_index: bool = True,
+            tracing: bool = True,
+            resume_from: Optional[str] = None,
+    ):
+        # workspace: checkout + bug report of this run (default: PROJECT_PATH / INPUTS_PATH)
+        # check_index: False when the caller already ran ensure_repo_indexed (e.g. batch mode)
+        # tracing: False for offline runs (e.g. the benchmark)
+        # resume_from: first task to run, earlier ones reuse the outputs saved by a previous run (default: RESUME_FROM)
+        self.workspace = workspace or Workspace.default()
+        self.check_index = check_index
+        self.tracing = tracing
+        self.resume_from = settings.resume_from if resume_from is None else resume_from
 
     @crew
     def crew(self) -> Crew:
         logger = logging.getLogger(__name__)
         llm = _llm()
+        ws = self.workspace
 
-        msg = ensure_repo_indexed()
-        logger.info(msg)
+        if self.check_index:
+            try:
+                logger.info(ensure_repo_indexed())
+            except IndexLockTimeout as e:
+                # Another process keeps indexing: run on the index generation that is live now
+                logger.warning("%s Using the current index.", e)
 
-        architect = build_senior_software_architect(llm, tools=architect_tools())
-        engineer = build_senior_software_engineer(llm, tools=engineer_tools())
-        devops = build_devops_engineer(llm, tools=devops_tools())
-        qa = build_qa_engineer(llm, tools=qa_tools())
+        architect = build_senior_software_architect(llm, tools=architect_tools(ws))
+        engineer = build_senior_software_engineer(llm, tools=engineer_tools(ws))
+        devops = build_devops_engineer(llm, tools=devops_tools(ws))
+        qa = build_qa_engineer(llm, tools=qa_tools(ws))
 
-        t1 = analysis_and_design_task(architect)
+        t1 = analysis_and_design_task(architect, precomputed_context=bug_context_pack(ws), repo_map=repo_map_context(ws))
+        t_plan = qa_test_plan_task(qa, tools=qa_planning_tools(ws))
         t2 = implementation_task(engineer)
         t3 = build_and_test_task(devops)
         t4 = functional_verification_task(qa)
 
-        # Chain context
+        # Context = DAG edges (DagCrew starts a task as soon as its context is done)
+        t_plan.context = [t1] # QA drafts the test plan from the architect's plan, in parallel with t2/t3
         t2.context = [t1]
         t3.context = [t2] # DevOps needs to know what changed
-        t4.context = [t1, t3] # QA needs bug desc (from t1 context or file) and build status
+        t4.context = [t1, t_plan, t3] # QA joins: plan + test plan + build status
 
-        # Knowledge Sources
-        knowledge_sources = self._load_knowledge_sources()
-        
-        # Configure Ollama environment for embeddings
-        os.environ["OLLAMA_HOST"] = settings.ollama_base_url
-        os.environ["EMBEDDINGS_OLLAMA_MODEL_NAME"] = settings.embed_model
-        os.environ["EMBEDDINGS_OLLAMA_BASE_URL"] = settings.ollama_base_url
+        tasks = [t1, t_plan, t2, t3, t4]
+        for t in tasks:
+            add_run_context(t, str(ws.project_path), str(ws.bug_desc_path), str(ws.bug_log_path))
 
-        return Crew(
+        return DagCrew(
             agents=[architect, engineer, devops, qa],
-            tasks=[t1, t2, t3, t4],
+            tasks=tasks,
             process=Process.sequential,
-            tracing=True,
+            max_parallel_tasks=settings.pipeline_max_parallel,
+            # Saved per bug report: a later run can resume at any task (resume_from).
+            # Keyed by PROJECT_PATH, not the workspace: every worktree run gets a new directory
+            output_store=TaskOutputStore(settings.runs_dir / run_key(settings.project_path, ws.bug_desc_path, ws.bug_log_path)),
+            resume_from=self.resume_from or None,
+            # Plan, changed files, build verdict and failing tests stay verbatim, the rest is cut to the budget
+            context_compressor=ContextCompressor(settings.task_context_tokens) if settings.task_context_tokens else None,
+            tracing=self.tracing,
             verbose=True,
-            knowledge_sources=knowledge_sources,
-            embedder={
-                "provider": "ollama",
-                "config": {
-                    "model": settings.embed_model,
-                    "base_url": settings.ollama_base_url,
-                }
-            }
+            # Precomputed embeddings (KNOWLEDGE_STORE_DIR): nothing is embedded at crew construction
+            knowledge=crew_knowledge(knowledge_store()),
         )
-
-
-    def _load_knowledge_sources(self):
-        """Load knowledge sources from the knowledge directory."""
-        knowledge_sources = []
-        knowledge_dir = Path("knowledge")
-        if knowledge_dir.exists():
-            # CrewAI seems to prepend 'knowledge/' to the path.
-            # So we pass just the filename.
-            files = [f.name for f in knowledge_dir.glob("*.txt")]
-            if files:
-                knowledge_sources.append(TextFileKnowledgeSource(file_paths=files))
-        return knowledge_sources
@@ -1,9 +1,10 @@
-from src.codeguardian.tools.tools import ensure_repo_indexed
+from src.codeguardian.tools.tools import ensure_repo_indexed, knowledge_store
 
 def main():
     # force=True -> always rebuild/update index now
     msg = ensure_repo_indexed(force=True)
     print(msg)
+    print(f"Knowledge base: {len(knowledge_store())} chunks")
 
 if __name__ == "__main__":
     main()
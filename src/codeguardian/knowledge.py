@@ -0,0 +1,276 @@
+import os
+import json
+import hashlib
+import logging
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+from crewai.knowledge.knowledge import Knowledge
+from crewai.knowledge.storage.knowledge_storage import KnowledgeStorage
+
+from codeguardian.tools.embeddings import OllamaEmbedder
+
+logger = logging.getLogger(__name__)
+
+KNOWLEDGE_EXTS = {".txt", ".md", ".markdown"}
+_STORE_VERSION = 1
+
+
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def chunk_document(text: str, chunk_chars: int = 1200, overlap: int = 150) -> List[str]:
+    """Paragraph-aligned chunks of at most ~chunk_chars (longer paragraphs are split with overlap)."""
+    text = text.replace("\r\n", "\n").strip()
+    if not text:
+        return []
+    chunks: List[str] = []
+    current = ""
+    for para in (p.strip() for p in text.split("\n\n")):
+        if not para:
+            continue
+        if len(current) + len(para) + 2 <= chunk_chars:
+            current = f"{current}\n\n{para}" if current else para
+            continue
+        if current:
+            chunks.append(current)
+        if len(para) <= chunk_chars:
+            current = para
+            continue
+        step = max(1, chunk_chars - overlap)
+        pieces = [para[i : i + chunk_chars] for i in range(0, len(para), step)]
+        chunks.extend(pieces[:-1])
+        current = pieces[-1]
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def iter_knowledge_files(roots: Iterable[Path]) -> Iterable[Path]:
+    """Knowledge documents (files or whole directories, recursively)."""
+    for root in roots:
+        if root.is_file():
+            yield root
+        elif root.is_dir():
+            for p in sorted(root.rglob("*")):
+                if p.is_file() and p.suffix.lower() in KNOWLEDGE_EXTS and not p.name.startswith("."):
+                    yield p
+
+
+class KnowledgeStore:
+    """
+    Knowledge documents embedded ONCE into `store_dir`:
+      - manifest.json:     per file sha256 (+ mtime/size fast path) -> rows, the chunk texts and the vector file
+      - vectors-<id>.npy:  normalized float32 matrix, opened memory-mapped
+    sync() re-embeds only new/changed files; unchanged files are not even read.
+    A save writes a new vector file, then replaces the manifest that names it: processes syncing the same
+    store never share a temp file, and a crash leaves the previous manifest with its own vectors.
+    """
+
+    def __init__(self, store_dir: Path, embedder: OllamaEmbedder, chunk_chars: int = 1200, chunk_overlap: int = 150):
+        self.store_dir = Path(store_dir)
+        self.embedder = embedder
+        self.chunk_chars = chunk_chars
+        self.chunk_overlap = chunk_overlap
+        self._manifest: Dict[str, Any] = {}
+        self._vectors: Optional[np.ndarray] = None
+        self.load()
+
+    @property
+    def _manifest_path(self) -> Path:
+        return self.store_dir / "manifest.json"
+
+    def _vectors_path(self, manifest: Dict[str, Any]) -> Path:
+        # Stores saved before the vector file was named in the manifest use vectors.npy
+        return self.store_dir / manifest.get("vectors", "vectors.npy")
+
+    # -------------------------
+    # Load / save
+    # -------------------------
+    def load(self) -> None:
+        self._manifest, self._vectors = self._empty_manifest(), None
+        for attempt in range(2):
+            try:
+                manifest = json.loads(self._manifest_path.read_text(encoding="utf-8"))
+                vectors = np.load(self._vectors_path(manifest), mmap_mode="r") if manifest.get("chunks") else None
+                break
+            except (OSError, ValueError):
+                # Another process may have saved meanwhile: the vectors of the manifest just read are gone
+                if attempt:
+                    return
+        rows = 0 if vectors is None else vectors.shape[0]
+        if manifest.get("version") != _STORE_VERSION or rows != len(manifest.get("chunks", [])):
+            logger.warning("Knowledge store %s is inconsistent, it will be rebuilt", self.store_dir)
+            return
+        self._manifest, self._vectors = manifest, vectors
+
+    def _empty_manifest(self) -> Dict[str, Any]:
+        return {"version": _STORE_VERSION, "embed_model": self.embedder.model, "files": {}, "chunks": []}
+
+    def _save(self, manifest: Dict[str, Any], vectors: Optional[np.ndarray]) -> None:
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        written = []
+        try:
+            if vectors is not None and len(vectors):
+                fd, path = tempfile.mkstemp(prefix="vectors-", suffix=".npy", dir=self.store_dir)
+                written.append(path)
+                with os.fdopen(fd, "wb") as fh:
+                    np.save(fh, vectors)
+                manifest = {**manifest, "vectors": Path(path).name}
+            fd, tmp = tempfile.mkstemp(prefix=".manifest.", suffix=".tmp", dir=self.store_dir)
+            written.append(tmp)
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                fh.write(json.dumps(manifest))
+            # The commit point: the manifest and the vectors it names are replaced together
+            os.replace(tmp, self._manifest_path)
+        except BaseException:
+            for path in written:
+                Path(path).unlink(missing_ok=True)
+            raise
+        self._remove_unused_vectors(manifest.get("vectors"))
+        self.load()
+
+    def _remove_unused_vectors(self, keep: Optional[str]) -> None:
+        for path in self.store_dir.glob("vectors*.npy"):
+            if path.name != keep:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass  # still memory-mapped by a reader (Windows): removed by a later save
+
+    # -------------------------
+    # Sync
+    # -------------------------
+    def sync(self, roots: Iterable[Path]) -> str:
+        old = self._manifest
+        same_model = old.get("embed_model") == self.embedder.model
+        old_files: Dict[str, Any] = old.get("files", {}) if same_model else {}
+
+        manifest = self._empty_manifest()
+        parts: List[np.ndarray] = []
+        reused = embedded = 0
+        changed = not same_model
+
+        for path in iter_knowledge_files(roots):
+            key = str(path.resolve())
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entry = old_files.get(key)
+            sig = {"mtime": int(st.st_mtime), "size": int(st.st_size)}
+
+            # Fast path: same mtime/size -> not even read; else same content hash -> reuse vectors
+            if entry and all(entry.get(k) == v for k, v in sig.items()):
+                sha = entry["sha256"]
+            else:
+                sha = _sha256(path)
+                changed = True
+
+            if entry and entry["sha256"] == sha:
+                start, count = entry["rows"]
+                texts = [c["text"] for c in old["chunks"][start : start + count]]
+                vectors = np.asarray(self._vectors[start : start + count]) if count else None
+                reused += 1
+            else:
+                texts = chunk_document(path.read_text(encoding="utf-8", errors="ignore"), self.chunk_chars, self.chunk_overlap)
+                try:
+                    vectors = self._normalize(self.embedder.embed_many(texts)) if texts else None
+                except Exception as e:
+                    logger.warning("Knowledge file %s not embedded: %s", path, e)
+                    continue
+                embedded += 1
+
+            start = len(manifest["chunks"])
+            manifest["files"][key] = {"sha256": sha, **sig, "rows": [start, len(texts)]}
+            manifest["chunks"].extend({"source": key, "chunk": i, "text": t} for i, t in enumerate(texts))
+            if vectors is not None:
+                parts.append(vectors)
+
+        changed = changed or set(manifest["files"]) != set(old_files)
+        if changed:
+            self._save(manifest, np.concatenate(parts).astype(np.float32) if parts else None)
+        return (
+            f"knowledge: {len(manifest['files'])} files / {len(manifest['chunks'])} chunks "
+            f"(embedded={embedded}, reused={reused}) store={self.store_dir}"
+        )
+
+    @staticmethod
+    def _normalize(embs: List[List[float]]) -> np.ndarray:
+        m = np.asarray(embs, dtype=np.float32)
+        norms = np.linalg.norm(m, axis=1, keepdims=True)
+        return m / np.where(norms == 0, 1.0, norms)
+
+    # -------------------------
+    # Query
+    # -------------------------
+    def __len__(self) -> int:
+        return len(self._manifest.get("chunks", []))
+
+    def search(self, query: str, k: int = 5, score_threshold: float = 0.0) -> List[Dict[str, Any]]:
+        """
+        Top-k chunks by cosine similarity. score = (1 + cos) / 2, the same scale CrewAI uses for its
+        Chroma knowledge collections, so its default score_threshold keeps its meaning.
+        """
+        if self._vectors is None or not len(self):
+            return []
+        q = self._normalize([self.embedder.embed(query)])[0]
+        scores = (1.0 + self._vectors @ q) / 2.0
+        top = np.argsort(-scores)[:k]
+        chunks = self._manifest["chunks"]
+        return [
+            {
+                "id": f"{chunks[i]['source']}::{chunks[i]['chunk']}",
+                "content": chunks[i]["text"],
+                "metadata": {"source": chunks[i]["source"], "chunk": chunks[i]["chunk"]},
+                "score": float(scores[i]),
+            }
+            for i in top
+            if scores[i] >= score_threshold
+        ]
+
+
+class PrecomputedKnowledgeStorage(KnowledgeStorage):
+    """CrewAI knowledge storage served from a KnowledgeStore (no Chroma collection, no embedding at crew construction)."""
+
+    def __init__(self, store: KnowledgeStore):
+        # Deliberately no super().__init__(): it would build an embedder + Chroma client we do not use
+        self.collection_name = "crew"
+        self._client = None
+        self.store = store
+
+    def search(self, query: list[str], limit: int = 5, metadata_filter: dict | None = None, score_threshold: float = 0.6):
+        if not query:
+            return []
+        try:
+            return self.store.search(" ".join(query), k=limit, score_threshold=score_threshold)
+        except Exception as e:
+            logger.warning("Knowledge search failed: %s", e)
+            return []
+
+    def save(self, documents: list) -> None:
+        # Knowledge.add_sources() of a crew / agent ends here: not an error, the store only holds KNOWLEDGE_DIRS
+        if documents:
+            logger.warning(
+                "Ignoring %d knowledge document(s) added at runtime: add files to KNOWLEDGE_DIRS instead, "
+                "they are embedded by KnowledgeStore.sync().", len(documents),
+            )
+
+    def reset(self) -> None:
+        (self.store.store_dir / "manifest.json").unlink(missing_ok=True)
+        self.store._remove_unused_vectors(None)
+        self.store.load()
+
+
+def crew_knowledge(store: KnowledgeStore) -> Optional[Knowledge]:
+    """Crew-level Knowledge backed by the precomputed store (None if the store is empty)."""
+    if not len(store):
+        return None
+    return Knowledge(collection_name="crew", sources=[], storage=PrecomputedKnowledgeStorage(store))
@@ -0,0 +1,111 @@
+import json
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+# LLM attributes that change the completion (provider defaults when None)
+SAMPLING_PARAMS = (
+    "temperature", "top_p", "n", "max_tokens", "max_completion_tokens", "stop", "seed", "presence_penalty",
+    "frequency_penalty", "logit_bias", "response_format", "reasoning_effort", "additional_params",
+)
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, type) and issubclass(value, BaseModel):
+        return value.model_json_schema()
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    return str(value)
+
+
+def completion_key(model: str, messages: Any, tools: Any = None, params: Optional[Dict[str, Any]] = None) -> str:
+    """sha256 over everything that decides the completion: model, messages, tool schemas, sampling params."""
+    payload = {"model": model, "messages": messages, "tools": tools, "params": params or {}}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=_jsonable).encode("utf-8")).hexdigest()
+
+
+class CompletionCache:
+    """
+    LLM completions on disk (SQLite), keyed by completion_key. Opt-in (LLM_CACHE): a re-run of the same bug
+    replays every call whose prompt is unchanged instantly, up to the first call whose prompt differs
+    (a changed task description, tool output or config).
+    """
+
+    def __init__(self, db_path: Path):
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS completions (
+                key TEXT PRIMARY KEY, model TEXT NOT NULL, response TEXT NOT NULL,
+                created REAL NOT NULL, hits INTEGER NOT NULL DEFAULT 0
+            );
+            """
+        )
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute("SELECT response FROM completions WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            with self._db:
+                self._db.execute("UPDATE completions SET hits = hits + 1 WHERE key = ?", (key,))
+        return row[0]
+
+    def put(self, key: str, model: str, response: str) -> None:
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO completions(key, model, response, created) VALUES (?, ?, ?, ?)",
+                (key, model, response, time.time()),
+            )
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+        return {"entries": entries, "hits": self.hits, "misses": self.misses}
+
+    def clear(self) -> None:
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM completions")
+
+
+def cache_completions(llm, cache: CompletionCache):
+    """
+    Routes `llm.call` through the cache and returns the same LLM object. crewai's LLM() picks a provider class
+    at construction, so the call is wrapped on the instance instead of subclassing. Calls that execute functions
+    (available_functions) are never cached: a replay would skip the tool's side effects.
+    """
+    inner = llm.call
+
+    def call(messages, tools=None, callbacks=None, available_functions=None, from_task=None, from_agent=None, response_model=None, **kwargs):
+        if available_functions:
+            return inner(messages, tools=tools, callbacks=callbacks, available_functions=available_functions,
+                         from_task=from_task, from_agent=from_agent, response_model=response_model, **kwargs)
+        params = {name: getattr(llm, name, None) for name in SAMPLING_PARAMS}
+        params["response_model"] = response_model
+        key = completion_key(llm.model, messages, tools, params)
+        cached = cache.get(key)
+        if cached is not None:
+            logger.debug("LLM cache hit (%s)", key[:12])
+            return cached
+        response = inner(messages, tools=tools, callbacks=callbacks, available_functions=available_functions,
+                         from_task=from_task, from_agent=from_agent, response_model=response_model, **kwargs)
+        if isinstance(response, str) and response.strip():
+            cache.put(key, llm.model, response)
+        return response
+
+    llm.call = call
+    return llm
@@ -25,13 +25,155 @@ def setup_logging():
 
 def run():
     """
-    Run the crew.
+    Run the crew:
+      run_crew [--resume-from TASK]
     """
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="run_crew", description="Run the pipeline on PROJECT_PATH / INPUTS_PATH.")
+    parser.add_argument(
+        "--resume-from", default=None,
+        help="Start at this task (e.g. implementation, build_and_test); earlier tasks reuse the outputs of the last run",
+    )
+    args, _ = parser.parse_known_args()
+
     setup_logging()
     print(f"DEBUG: Chroma Dir: {settings.chroma_dir.resolve()}")
-    crew = Codeguardian().crew()
-    result = crew.kickoff()
-    print(result)
+    if settings.workspace_mode != "worktree":
+        crew = Codeguardian(resume_from=args.resume_from).crew()
+        result = crew.kickoff()
+        print(result)
+        return
+
+    # Isolated run: PROJECT_PATH stays clean, the changes are delivered as a patch
+    from datetime import datetime
+    from codeguardian.scheduler import run_key
+    from codeguardian.workspace import open_workspace, close_workspace, resume_workspace, save_workspace_changes
+    name = datetime.now().strftime("run-%Y%m%d-%H%M%S")
+    # Saved next to the task outputs: a resumed run continues in the previous run's worktree state
+    run_dir = settings.runs_dir / run_key(settings.project_path, settings.bug_desc_path, settings.bug_log_path)
+    if args.resume_from or settings.resume_from:
+        ws = resume_workspace(name, run_dir, settings.bug_desc_path, settings.bug_log_path)
+    else:
+        ws = open_workspace(name, settings.bug_desc_path, settings.bug_log_path)
+    try:
+        result = Codeguardian(workspace=ws, resume_from=args.resume_from).crew().kickoff()
+        print(result)
+    finally:
+        patch = close_workspace(ws)
+        save_workspace_changes(ws, patch, run_dir)
+        patch_path = settings.workspaces_dir.resolve() / f"{name}.patch"
+        patch_path.write_text(patch, encoding="utf-8")
+        print(f"Changes: {patch_path}")
+
+
+def batch():
+    """
+    Run the crew for many bug reports concurrently:
+      batch <tickets-dir | tickets.jsonl> [--out DIR] [--workers N] [--keep-worktrees]
+    """
+    import argparse
+    from pathlib import Path
+    from codeguardian.batch import run_batch
+
+    parser = argparse.ArgumentParser(prog="batch", description="Process many bug reports against one shared index.")
+    parser.add_argument("source", type=Path, help="Directory with one sub-directory per ticket, or a JSONL file")
+    parser.add_argument("--out", type=Path, default=Path("batch-results"), help="Where per-ticket results are written")
+    parser.add_argument("--workers", type=int, default=None, help="Concurrent crews (default: BATCH_WORKERS)")
+    parser.add_argument("--keep-worktrees", action="store_true", help="Do not delete the per-ticket worktrees")
+    args = parser.parse_args()
+
+    setup_logging()
+    summary = run_batch(args.source, args.out, workers=args.workers, keep_worktrees=args.keep_worktrees)
+    print(
+        f"Batch done: {summary['succeeded']}/{summary['tickets']} succeeded in {summary['wall_seconds']}s "
+        f"({summary['tickets_per_hour']} tickets/h, {summary['workers']} workers). Results: {args.out}"
+    )
+
+
+def maintain_index():
+    """
+    Garbage-collect, verify and compact the RAG index:
+      maintain_index [--dry-run] [--no-gc] [--no-verify] [--no-compact] | --rollback
+    """
+    import argparse
+    import json
+    from codeguardian.tools.index_maintenance import maintain_index as run_maintenance
+    from codeguardian.tools.tools import index_generations, index_write_lock
+
+    parser = argparse.ArgumentParser(prog="maintain_index", description="Housekeeping for the local RAG index.")
+    parser.add_argument("--dry-run", action="store_true", help="Only report orphaned files and inconsistencies")
+    parser.add_argument("--no-gc", action="store_true", help="Keep chunks of deleted / no longer indexed files")
+    parser.add_argument("--no-verify", action="store_true", help="Skip the consistency check")
+    parser.add_argument("--no-compact", action="store_true", help="Skip vacuuming the stores")
+    parser.add_argument("--rollback", action="store_true", help="Switch back to the previous index generation")
+    args = parser.parse_args()
+
+    setup_logging()
+    if args.rollback:
+        with index_write_lock().exclusive():
+            name = index_generations().rollback()
+        print(f"Live index generation: {name}" if name else "No older index generation to roll back to.")
+        return
+    report = run_maintenance(
+        gc=not args.no_gc, verify=not args.no_verify, compact=not args.no_compact, dry_run=args.dry_run
+    )
+    print(json.dumps(report, indent=2))
+
+
+def tune_chunking():
+    """
+    Compare chunking profiles (rag_config.yaml -> chunking.tuning) on a benchmark corpus:
+      tune_chunking <benchmark.jsonl> [--k 5] [--candidates current small ...] [--json]
+    """
+    import argparse
+    import json
+    from pathlib import Path
+    from codeguardian.tools.chunk_tuning import format_report, tune_chunking as run_tuning
+
+    parser = argparse.ArgumentParser(prog="tune_chunking", description="Recall and index cost per chunking profile.")
+    parser.add_argument("corpus", type=Path, help='JSONL of {"query": ..., "relevant": [repo-relative paths]}')
+    parser.add_argument("--k", type=int, default=5, help="Results per query")
+    parser.add_argument("--candidates", nargs="*", default=None, help="Only these candidates (default: all)")
+    parser.add_argument("--json", action="store_true", help="Print the raw results as JSON")
+    args = parser.parse_args()
+
+    setup_logging()
+    results = run_tuning(args.corpus, k=args.k, names=args.candidates)
+    print(json.dumps(results, indent=2) if args.json else format_report(results, args.k))
+
+
+def benchmark():
+    """
+    Time the pipeline around the model: full crew runs against a synthetic project and a scripted local model:
+      benchmark [--work-dir DIR] [--runs 2] [--transcript FILE] [--services 30] [--build-seconds 0.2] [--latency-ms 0] [--json] [--out FILE]
+    """
+    import argparse
+    import json
+    import tempfile
+    from pathlib import Path
+    from codeguardian.benchmark import format_report, run_benchmark
+
+    parser = argparse.ArgumentParser(prog="benchmark", description="Per-phase wall time, tokens and tool calls of a scripted crew run.")
+    parser.add_argument("--work-dir", type=Path, default=None, help="Synthetic project + index location (default: a temp dir)")
+    parser.add_argument("--runs", type=int, default=2, help="Crew runs; the first one builds the index (cold)")
+    parser.add_argument("--transcript", type=Path, default=None, help="Recorded transcript JSON to replay (default: built-in)")
+    parser.add_argument("--services", type=int, default=30, help="Filler classes in the synthetic project")
+    parser.add_argument("--build-seconds", type=float, default=0.2, help="Duration of the fake build")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Simulated model latency per request")
+    parser.add_argument("--json", action="store_true", help="Print the raw results as JSON")
+    parser.add_argument("--out", type=Path, default=None, help="Also write the JSON results to this file")
+    args = parser.parse_args()
+
+    setup_logging()
+    work_dir = args.work_dir or Path(tempfile.mkdtemp(prefix="codeguardian-bench-"))
+    result = run_benchmark(
+        work_dir, runs=args.runs, transcript_path=args.transcript, services=args.services,
+        build_seconds=args.build_seconds, latency_ms=args.latency_ms,
+    )
+    if args.out:
+        args.out.write_text(json.dumps(result, indent=2), encoding="utf-8")
+    print(json.dumps(result, indent=2) if args.json else format_report(result))
 
 
 if __name__ == "__main__":
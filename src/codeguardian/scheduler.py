@@ -0,0 +1,182 @@
+import json
+import hashlib
+import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, Future, FIRST_COMPLETED, wait
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from pydantic import Field
+from crewai import Crew, Task
+from crewai.crews.crew_output import CrewOutput
+from crewai.tasks.conditional_task import ConditionalTask
+from crewai.tasks.task_output import TaskOutput
+from crewai.utilities.constants import NOT_SPECIFIED
+
+logger = logging.getLogger(__name__)
+
+
+def task_dependencies(tasks: List[Task]) -> Dict[int, List[int]]:
+    """
+    Dependency graph of a task list (task index -> indices it waits for).
+    - explicit `context` => depends exactly on those tasks
+    - no context set     => depends on the previous task (same as Process.sequential)
+    """
+    index_of = {id(t): i for i, t in enumerate(tasks)}
+    deps: Dict[int, List[int]] = {}
+    for i, task in enumerate(tasks):
+        if task.context is NOT_SPECIFIED:
+            deps[i] = [i - 1] if i > 0 else []
+            continue
+        wanted = []
+        for ctx in task.context or []:
+            j = index_of.get(id(ctx))
+            if j is None:
+                raise ValueError(f"Task '{task.name}' has a context task that is not part of the crew.")
+            if j >= i:
+                raise ValueError(f"Task '{task.name}' depends on a later task '{ctx.name}'.")
+            wanted.append(j)
+        deps[i] = wanted
+    return deps
+
+
+def run_key(*inputs: Path) -> str:
+    """Identifies the runs of one bug report on one project: hash of the paths and bug file contents."""
+    h = hashlib.sha256()
+    for p in inputs:
+        h.update(str(Path(p).resolve()).encode("utf-8"))
+        if Path(p).is_file():
+            h.update(Path(p).read_bytes())
+    return h.hexdigest()[:16]
+
+
+class TaskOutputStore:
+    """Finished task outputs of one bug report (<directory>/<task name>.json), the input of a resumed run."""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+
+    def _path(self, name: str) -> Path:
+        return self.directory / f"{name}.json"
+
+    def save(self, name: str, output: TaskOutput) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp = self._path(name).with_suffix(".json.tmp")
+        tmp.write_text(output.model_dump_json(exclude={"pydantic"}, indent=2), encoding="utf-8")
+        tmp.replace(self._path(name))
+
+    def load(self, name: str) -> Optional[TaskOutput]:
+        try:
+            return TaskOutput.model_validate(json.loads(self._path(name).read_text(encoding="utf-8")))
+        except (OSError, ValueError):
+            return None
+
+
+class DagCrew(Crew):
+    """
+    Crew that schedules its tasks as a DAG instead of a strict chain:
+      - a task starts as soon as every task in its context is done
+      - independent tasks run concurrently (bounded by max_parallel_tasks)
+      - tasks of the same agent never overlap (one agent executor per agent)
+    With max_parallel_tasks=1 this is equivalent to Process.sequential.
+    Every finished task is saved to `output_store`; with `resume_from` the tasks declared before that task
+    are not run again, their saved outputs are used as context.
+    A `context_compressor` (outputs -> text) replaces the full outputs a task gets as context.
+
+    Replaces Crew._run_sequential_process and reuses Crew's private per-task steps (_get_agent_to_use,
+    _prepare_tools, _log_task_start, _get_context, _process_task_result, _store_execution_log,
+    _create_crew_output) as crewai 1.x defines them: check them when upgrading crewai.
+    ConditionalTask and async_execution are crewai's own chain semantics; a crew using them runs
+    through Crew's sequential process instead (no DAG, no output_store / resume_from).
+    """
+
+    max_parallel_tasks: int = Field(default=2, ge=1, description="Max number of tasks running at the same time")
+    output_store: Optional[Any] = Field(default=None, description="TaskOutputStore the finished tasks are saved to")
+    resume_from: Optional[str] = Field(default=None, description="Name of the first task to run; earlier tasks are loaded from output_store")
+    context_compressor: Optional[Any] = Field(default=None, description="Callable building a task's context from its context outputs")
+
+    def _get_context(self, task: Task, task_outputs: List[TaskOutput]) -> str:
+        if self.context_compressor is None or not task.context:
+            return super()._get_context(task, task_outputs)
+        if isinstance(task.context, list):
+            task_outputs = [t.output for t in task.context if t.output is not None]
+        return self.context_compressor(task_outputs)
+
+    def _resumed_outputs(self, tasks: List[Task]) -> Dict[int, TaskOutput]:
+        if not self.resume_from:
+            return {}
+        names = [t.name for t in tasks]
+        if self.resume_from not in names:
+            raise ValueError(f"Cannot resume from '{self.resume_from}': no such task ({', '.join(map(str, names))}).")
+        if self.output_store is None:
+            raise ValueError("Cannot resume: no output store configured.")
+        outputs = {}
+        for idx in range(names.index(self.resume_from)):
+            output = self.output_store.load(names[idx])
+            if output is None:
+                raise ValueError(
+                    f"Cannot resume from '{self.resume_from}': no saved output of '{names[idx]}' "
+                    f"in {self.output_store.directory}. Run without resuming first."
+                )
+            outputs[idx] = output
+        return outputs
+
+    def _run_sequential_process(self) -> CrewOutput:
+        tasks = self.tasks
+        if any(isinstance(t, ConditionalTask) or t.async_execution for t in tasks):
+            if self.resume_from:
+                raise ValueError("Cannot resume a crew with conditional or async tasks.")
+            logger.info("DAG: conditional / async tasks present, running them with crewai's sequential process")
+            return super()._run_sequential_process()
+        deps = task_dependencies(tasks)
+        agent_locks: Dict[int, threading.Lock] = {}
+        for task in tasks:
+            agent_locks.setdefault(id(task.agent), threading.Lock())
+
+        outputs: Dict[int, TaskOutput] = self._resumed_outputs(tasks)
+        running: Dict[Future, int] = {}
+        pending = [i for i in range(len(tasks)) if i not in outputs]
+        for idx, output in outputs.items():
+            tasks[idx].output = output
+            logger.info("DAG: task '%s' resumed from its saved output", tasks[idx].name or idx)
+
+        def run_one(idx: int) -> TaskOutput:
+            task = tasks[idx]
+            agent = self._get_agent_to_use(task)
+            if agent is None:
+                raise ValueError(f"No agent available for task: {task.description}.")
+            with agent_locks[id(task.agent)]:
+                tools = self._prepare_tools(agent, task, task.tools or agent.tools or [])
+                self._log_task_start(task, agent.role)
+                context = self._get_context(task, [outputs[j] for j in deps[idx]])
+                return task.execute_sync(agent=agent, context=context, tools=tools)
+
+        with ThreadPoolExecutor(max_workers=self.max_parallel_tasks, thread_name_prefix="dagcrew") as pool:
+            while pending or running:
+                # Start everything that is ready, in declaration order
+                for idx in list(pending):
+                    if len(running) >= self.max_parallel_tasks:
+                        break
+                    if all(j in outputs for j in deps[idx]):
+                        pending.remove(idx)
+                        logger.info("DAG: starting task '%s'", tasks[idx].name or idx)
+                        ctx = contextvars.copy_context()
+                        running[pool.submit(ctx.run, run_one, idx)] = idx
+
+                if not running:
+                    raise RuntimeError("DAG scheduler stalled: unresolved task dependencies.")
+
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for fut in done:
+                    idx = running.pop(fut)
+                    # Propagates task failures (remaining running tasks finish on pool shutdown)
+                    output = fut.result()
+                    outputs[idx] = output
+                    self._process_task_result(tasks[idx], output)
+                    self._store_execution_log(tasks[idx], output, idx)
+                    if self.output_store is not None:
+                        self.output_store.save(tasks[idx].name or str(idx), output)
+                    logger.info("DAG: finished task '%s'", tasks[idx].name or idx)
+
+        return self._create_crew_output([outputs[i] for i in range(len(tasks))])
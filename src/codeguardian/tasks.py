@@ -1,20 +1,21 @@
 from crewai import Task
 from crewai import Agent
 
-def analysis_and_design_task(agent: Agent) -> Task:
-    return Task(
+def analysis_and_design_task(agent: Agent, precomputed_context: str = "", repo_map: str = "") -> Task:
+    task = Task(
         description="""
 You are the Senior Software Architect.
 
 MANDATORY ORDER:
 1) Read .gitignore first (FileReadTool) and treat ignored paths as non-existent.
 2) Read bug-desc.txt and bug-log.txt (FileReadTool).
-3) Use DirectorySearchTool to find the most relevant code/config files based on:
+3) If bug-log.txt contains stack traces: pass them to resolve_stack_trace (exact source, no search needed).
+4) Use local_directory_rag_batch_search (ALL queries in ONE call) to find the most relevant code/config files based on:
    - exception names
-   - stack traces
    - endpoint paths
    - logger/class/package names
-4) Only after search: read a SMALL number of top files (max 10) using FileReadTool.
+5) Only after search: read a SMALL number of top files (max 10) using "Project File Reader"
+   (file_path relative to PROJECT_PATH; pass symbol="Class.method" or start_line/end_line instead of reading whole files).
 
 Deliver:
 - ROOT CAUSE ANALYSIS (RCA)
@@ -43,7 +44,28 @@ Rules:
 """,
         expected_output="Change plan + Patch plan JSON with exact target files and precise instructions.",
         agent=agent,
+        name="analysis_and_design",
     )
+    if precomputed_context:
+        task.description += f"""
+PRECOMPUTED CONTEXT (MANDATORY, read this BEFORE searching):
+The stack frames of bug-log.txt are already resolved to their source methods below
+(repo-relative path:start-end, line-numbered, innermost frame first; deeper frames are the callers).
+- Do NOT re-read these files completely; use "Project File Reader" (symbol or line range) only for code that is NOT shown here.
+- Use DirectorySearchTool only for what the trace does not cover (config, callers, related classes).
+
+{precomputed_context}
+"""
+    if repo_map:
+        task.description += f"""
+REPO MAP (structure of the project, read this BEFORE searching):
+Files ranked by relevance to the bug and by how many files import them, each with its classes and
+method/function signatures (no bodies). Files marked * are named in bug-log.txt / bug-desc.txt.
+- Use it to pick the files to search and read; it is NOT the code itself.
+
+{repo_map}
+"""
+    return task
 
 def implementation_task(agent: Agent) -> Task:
     return Task(
@@ -73,15 +95,20 @@ MANDATORY FILE OPERATIONS (STRICT):
 
 A) FOR FILES IN PATCH PLAN (target_files[]) - MODIFY EXISTING:
    
-   Step 1: Build the FULL absolute path to READ the existing file
-   - absolute_path = PROJECT_PATH + "/" + target_files[].path
-   - Example: "C:/project-backend/src/main/java/org/project_backend/project/example/BuggyService.java"
-   - Use FileReadTool with this absolute path
-   
-   Step 2: Modify the content in memory
-   - Apply the changes described in the patch plan
+   Step 1: READ the existing code with "Project File Reader"
+   - file_path: target_files[].path (relative to PROJECT_PATH)
+   - Read only what you change: symbol="BuggyService.process" or start_line/end_line
+   - Reads are cached; re-reading a file after your own edits returns the new content
    
-   Step 3: Write back to the SAME file (OVERWRITE)
+   Step 2: Apply the changes described in the patch plan with "Project File Editor" (PREFERRED)
+   - file_path: target_files[].path (relative to PROJECT_PATH)
+   - edits: search/replace blocks. "search" = a few existing lines copied EXACTLY (unique in the file),
+     "replace" = the new lines. Only the changed region is sent, never the whole file.
+   - Or diff: a unified diff (git diff format) of the change
+   - On "Conflict": read the lines shown in the reply and retry with corrected search text / hunk.
+     Nothing is written until all edits apply.
+
+   Step 3 (ONLY if the change rewrites most of the file): Write back the SAME file (OVERWRITE)
    - Use FileWriterTool with these EXACT parameters:
      * filename: The FULL relative path from target_files[].path
        Example: "src/main/java/org/project_backend/project/example/BuggyService.java"
@@ -95,7 +122,7 @@ A) FOR FILES IN PATCH PLAN (target_files[]) - MODIFY EXISTING:
 B) FOR NEW FILES (e.g., new test classes, new helpers) - CREATE:
    
    - You CAN and SHOULD create new test files if needed
-   - BEFORE creating, check if the file already exists by trying FileReadTool first
+   - BEFORE creating, check if the file already exists by trying "Project File Reader" first
    - If the file EXISTS: Read it, modify it, and write with overwrite: True
    - If the file DOES NOT EXIST: Create it with overwrite: False (or True)
    - Use FileWriterTool with:
@@ -122,7 +149,8 @@ TESTING & VERIFICATION (MANDATORY):
 - If existing tests are weak, refactor them to match the Knowledge Base standards.
 
 SELF-VALIDATION (MANDATORY):
-- AFTER implementing all changes, you MUST run BuildTool and UnitTestTool.
+- AFTER implementing all changes, run syntax_check_tool first (milliseconds) and fix what it reports.
+- THEN you MUST run BuildTool and UnitTestTool.
 - If the build or tests FAIL, you MUST FIX the issues immediately.
 - ITERATE until all tests PASS.
 - DO NOT finish this task until the build is GREEN and all tests PASS.
@@ -133,10 +161,9 @@ SELF-VALIDATION (MANDATORY):
 
 WHEN RAG IS ALLOWED:
 - Use local_directory_rag_search ONLY to find additional dependency/config files AFTER reading the target files.
-- If using RAG, apply these filters:
-  - IGNORE src/test/**
-  - IGNORE *Test.java
-  - Prefer src/main/java/** and src/main/resources/**
+- If using RAG, pass the filters to the tool (they are applied inside the search, not after it):
+  - include_tests=false (skips src/test/**, *Test.java, *.spec.ts, ...)
+  - path_globs=["src/main/java/**", "src/main/resources/**"] (or profile="backend" / "frontend")
 
 OTHER RULES:
 - Respect .gitignore strictly.
@@ -148,7 +175,7 @@ OTHER RULES:
 - Fix Package Declarations: Ensure the 'package' statement matches the directory structure.
 
 IMPORTANT: Never output empty actions or "None". Always either:
-- Use a tool (FileReadTool, FileWriterTool, BuildTool, UnitTestTool, local_directory_rag_search)
+- Use a tool (Project File Reader, Project File Editor, FileWriterTool, BuildTool, UnitTestTool, local_directory_rag_search)
 - OR provide your Final Answer with the complete implementation summary
 
 If you find yourself without a next action, you should either:
@@ -176,6 +203,42 @@ IMPLEMENTATION SUMMARY
 """,
         expected_output="Implementation summary with changed files and verification steps.",
         agent=agent,
+        name="implementation",
+    )
+
+def qa_test_plan_task(agent: Agent, tools=None) -> Task:
+    return Task(
+        description="""
+You are the QA Engineer (Test Planning).
+
+This task runs IN PARALLEL with the implementation. The code is NOT changed yet.
+Prepare everything that does not depend on the build result.
+
+1) Read bug-desc.txt and bug-log.txt (FileReadTool).
+2) Read the Architect's RCA and PATCH_PLAN_JSON from the TASK CONTEXT.
+3) Extract the "Steps to Reproduce", "Expected Result" and every Acceptance Criterion (AC).
+4) Draft the functional test plan:
+   - For REST APIs: the exact curl/Postman calls and expected responses
+   - For Web Apps: the E2E scenarios (steps + assertions)
+   - For Backend Services: the interfaces to exercise and expected behavior
+   - Regression checks for the components listed in the patch plan
+
+Rules:
+- Do NOT run builds or tests (the engineer is changing the code right now)
+- Do NOT write files
+
+Output:
+QA TEST PLAN
+- Steps to Reproduce
+- Expected Result
+- Acceptance Criteria (one check per AC)
+- Functional Test Cases (how to execute + expected outcome)
+- Regression Checks
+""",
+        expected_output="QA test plan with acceptance checks and functional test cases.",
+        agent=agent,
+        name="qa_test_plan",
+        tools=tools or [],
     )
 
 def build_and_test_task(agent: Agent) -> Task:
@@ -204,6 +267,7 @@ BUILD REPORT
 """,
         expected_output="Build report indicating success or failure.",
         agent=agent,
+        name="build_and_test",
     )
 
 def functional_verification_task(agent: Agent) -> Task:
@@ -213,7 +277,8 @@ You are the QA Engineer (Black-Box Functional Testing).
 
 Your goal: Verify the fix works from the END-USER perspective, not just unit tests.
 
-1) Read the "Steps to Reproduce" and "Expected Result" from the bug description.
+1) Start from the QA TEST PLAN provided in the TASK CONTEXT (Steps to Reproduce, Expected Result, ACs).
+   If it is missing, read the "Steps to Reproduce" and "Expected Result" from the bug description.
 
 2) BLACK-BOX FUNCTIONAL TESTING (MANDATORY):
    - Execute the "Steps to Reproduce" from the bug description.
@@ -250,6 +315,18 @@ QA VERIFICATION REPORT
 """,
         expected_output="QA report confirming functional quality and release readiness.",
         agent=agent,
+        name="functional_verification",
     )
 
 
+
+def add_run_context(task: Task, project_path: str, bug_desc_path: str, bug_log_path: str) -> Task:
+    """Tells the agent where THIS run's checkout and bug report live (they differ per workspace)."""
+    task.description += f"""
+RUN CONTEXT:
+- PROJECT_PATH = {project_path}
+- bug-desc.txt = {bug_desc_path}
+- bug-log.txt = {bug_log_path}
+- local_directory_rag_search returns paths RELATIVE to PROJECT_PATH.
+"""
+    return task
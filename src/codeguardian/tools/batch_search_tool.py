@@ -0,0 +1,85 @@
+from typing import Dict, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, Field, PrivateAttr
+from crewai.tools import BaseTool
+
+from codeguardian.tools.local_rag_tool import LocalDirectoryRagTool
+from codeguardian.tools.search_filters import SearchScope, UnknownProfile
+
+
+class RagBatchSearchInput(BaseModel):
+    """Input schema for RagBatchSearchTool."""
+    queries: List[str] = Field(..., min_length=1, max_length=8, description="Up to 8 search queries, e.g. one per exception name, class or endpoint from the log.")
+    k: int = Field(3, ge=1, le=10, description="Top-K results per query")
+    path_globs: Optional[List[str]] = Field(None, description="Only files matching these repo-relative globs, e.g. ['src/main/java/**']")
+    exclude_globs: Optional[List[str]] = Field(None, description="Skip files matching these globs, e.g. ['src/test/**']")
+    extensions: Optional[List[str]] = Field(None, description="Only these file extensions, e.g. ['.java', '.yml']")
+    profile: Optional[str] = Field(None, description="'backend' or 'frontend': only files of that part of the repository")
+    include_tests: bool = Field(True, description="False = skip test code (src/test/**, *Test.java, *.spec.ts, ...)")
+
+
+class RagBatchSearchTool(BaseTool):
+    name: str = "local_directory_rag_batch_search"
+    description: str = (
+        "Runs SEVERAL semantic searches in ONE call (same index and filters as local_directory_rag_search). "
+        "Results are grouped per query; a hit already listed for an earlier query is only referenced, not repeated. "
+        "Prefer this over consecutive local_directory_rag_search calls."
+    )
+    args_schema: Type[BaseModel] = RagBatchSearchInput
+
+    _rag: LocalDirectoryRagTool = PrivateAttr()
+
+    def __init__(self, rag: LocalDirectoryRagTool, **kwargs):
+        super().__init__(**kwargs)
+        self._rag = rag
+
+    def _run(
+            self,
+            queries: List[str],
+            k: int = 3,
+            path_globs: Optional[List[str]] = None,
+            exclude_globs: Optional[List[str]] = None,
+            extensions: Optional[List[str]] = None,
+            profile: Optional[str] = None,
+            include_tests: bool = True,
+    ) -> str:
+        queries = list(dict.fromkeys(q.strip() for q in queries if q and q.strip()))
+        if not queries:
+            return "No queries."
+        try:
+            scope = SearchScope(
+                path_globs=path_globs,
+                exclude_globs=exclude_globs,
+                extensions=extensions,
+                profile=profile,
+                include_tests=include_tests,
+            )
+            results = self._rag.search_many(queries, int(k), scope)
+        except UnknownProfile as e:
+            return str(e)
+        except Exception as e:
+            return f"Error searching: {str(e)}"
+
+        shown: Dict[Tuple[str, int], str] = {}  # (path, chunk) -> label of the hit that listed it
+        files: List[str] = []
+        out = []
+        for qi, (query, hits) in enumerate(zip(queries, results), start=1):
+            out.append(f'## Query {qi}: "{query}"')
+            if not hits:
+                out.append("No results.\n")
+                continue
+            for hi, hit in enumerate(hits, start=1):
+                label = f"{qi}.{hi}"
+                rel = self._rag.display_path(hit.path)
+                seen = next((shown[(hit.path, c)] for c in hit.chunks if (hit.path, c) in shown), None)
+                if seen:
+                    out.append(f"### {label}) same as {seen}: {rel} ({hit.chunk_label})\n")
+                    continue
+                for c in hit.chunks:
+                    shown[(hit.path, c)] = label
+                out.append(f"### {label}) {self._rag.format_hit(hit)}\n")
+                if rel not in files:
+                    files.append(rel)
+
+        out.append("DISTINCT FILES:\n" + "\n".join(f"- {p}" for p in files))
+        return "\n".join(out)
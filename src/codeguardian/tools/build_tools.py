@@ -1,13 +1,44 @@
 import os
 import subprocess
-from typing import Optional, Type
-from pydantic import BaseModel, Field
+from pathlib import Path
+from typing import Any, Optional, Type
+from pydantic import BaseModel, Field, PrivateAttr
 from crewai.tools import BaseTool
 
+from codeguardian.tools.syntax_check import WorkingTreeBaseline, precheck
+
 class BuildToolInput(BaseModel):
     command: Optional[str] = Field(None, description="Optional specific command to run. If None, auto-detects.")
 
-class BuildTool(BaseTool):
+class _PrecheckedBuildTool(BaseTool):
+    """Build / test runner gated by the syntax precheck of the files the agents changed."""
+    project_path: Optional[str] = None  # defaults to PROJECT_PATH (set per workspace in batch runs)
+    # Auto-detected runs are skipped while a file changed by the agents does not parse (run anyway when asked again unchanged)
+    syntax_precheck: bool = True
+    _skipped: Optional[str] = PrivateAttr(default=None)
+    _baseline: Optional[WorkingTreeBaseline] = PrivateAttr(default=None)
+
+    def model_post_init(self, __context: Any) -> None:
+        super().model_post_init(__context)
+        # Files already changed when the tool is created are not the agent's: they do not block its builds
+        project_path = self.project_path or os.getenv("PROJECT_PATH")
+        if self.syntax_precheck and project_path:
+            self._baseline = WorkingTreeBaseline(Path(project_path))
+
+    def _precheck_gate(self, project_path: str, skipped: str) -> Optional[str]:
+        """The `skipped` message with the syntax issues, or None if the run may start."""
+        if not self.syntax_precheck:
+            return None
+        errors = precheck(Path(project_path), baseline=self._baseline)
+        issues = errors.split("\n", 1)[1] if errors else None
+        if issues and issues != self._skipped:
+            self._skipped = issues
+            return f"{skipped}:\n{errors}\n(Calling this tool again without changes runs it anyway.)"
+        if not issues:
+            self._skipped = None
+        return None
+
+class BuildTool(_PrecheckedBuildTool):
     name: str = "build_project_tool"
     description: str = (
         "Detects the build system (Gradle, Maven, NPM) in the PROJECT_PATH and runs the build/compile command. "
@@ -16,9 +47,12 @@ class BuildTool(BaseTool):
     args_schema: Type[BaseModel] = BuildToolInput
 
     def _run(self, command: Optional[str] = None) -> str:
-        project_path = os.getenv("PROJECT_PATH")
+        project_path = self.project_path or os.getenv("PROJECT_PATH")
         if not project_path:
             return "Error: PROJECT_PATH environment variable not set."
+        skipped = None if command else self._precheck_gate(project_path, "BUILD SKIPPED (fix these first, the full build would fail on them)")
+        if skipped:
+            return skipped
 
         if command:
             cmd = command
@@ -50,7 +84,7 @@ class BuildTool(BaseTool):
         except Exception as e:
             return f"Execution Error: {str(e)}"
 
-class UnitTestTool(BaseTool):
+class UnitTestTool(_PrecheckedBuildTool):
     name: str = "run_unit_tests_tool"
     description: str = (
         "Runs unit tests for the project. Auto-detects Gradle/Maven/NPM."
@@ -58,9 +92,12 @@ class UnitTestTool(BaseTool):
     args_schema: Type[BaseModel] = BuildToolInput
 
     def _run(self, command: Optional[str] = None) -> str:
-        project_path = os.getenv("PROJECT_PATH")
+        project_path = self.project_path or os.getenv("PROJECT_PATH")
         if not project_path:
             return "Error: PROJECT_PATH environment variable not set."
+        skipped = None if command else self._precheck_gate(project_path, "TESTS SKIPPED (fix these first, the build would fail on them)")
+        if skipped:
+            return skipped
 
         if command:
             cmd = command
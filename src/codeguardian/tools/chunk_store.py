@@ -0,0 +1,167 @@
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+def chunk_id(text: str) -> str:
+    """Content address of a chunk: identical text -> identical id, embedded and stored once."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ChunkRefs:
+    """
+    Which file uses which chunk: (repo-relative path, chunk index) -> content hash, persisted in SQLite
+    next to the vector store. Chroma holds one document per hash; this table maps it back to every path.
+    Each use also records the chunk's byte range in the file, so chunks can be stored by reference (no text in Chroma).
+    """
+
+    def __init__(self, db_path: Path):
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, sig TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS refs (
+                path TEXT NOT NULL, chunk INTEGER NOT NULL, hash TEXT NOT NULL, start INTEGER, length INTEGER,
+                PRIMARY KEY (path, chunk)
+            );
+            CREATE INDEX IF NOT EXISTS refs_hash ON refs(hash);
+            CREATE TABLE IF NOT EXISTS stat_cache (path TEXT PRIMARY KEY, stat TEXT NOT NULL, sha TEXT NOT NULL);
+            """
+        )
+        # Byte ranges were added later: stores from before get the columns, their rows stay NULL until re-indexed
+        columns = {r[1] for r in self._db.execute("PRAGMA table_info(refs)")}
+        with self._db:
+            for column in ("start", "length"):
+                if column not in columns:
+                    self._db.execute(f"ALTER TABLE refs ADD COLUMN {column} INTEGER")
+
+    # ---- writes
+    def set_file(
+            self,
+            path: str,
+            sig: str,
+            hashes: List[str],
+            positions: Optional[List[int]] = None,
+            ranges: Optional[List[Tuple[int, int]]] = None,
+    ) -> None:
+        """
+        positions: chunk index of each hash in the file (default 0..n-1; sampled files have gaps).
+        ranges: (byte offset, byte length) of each chunk in the file's UTF-8 text.
+        """
+        positions = positions if positions is not None else list(range(len(hashes)))
+        ranges = ranges if ranges is not None else [(None, None)] * len(hashes)
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM refs WHERE path = ?", (path,))
+            self._db.execute("INSERT OR REPLACE INTO files(path, sig) VALUES (?, ?)", (path, sig))
+            self._db.executemany(
+                "INSERT INTO refs(path, chunk, hash, start, length) VALUES (?, ?, ?, ?, ?)",
+                [(path, i, h, start, length) for i, h, (start, length) in zip(positions, hashes, ranges)],
+            )
+
+    def remove_file(self, path: str) -> None:
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM refs WHERE path = ?", (path,))
+            self._db.execute("DELETE FROM files WHERE path = ?", (path,))
+            self._db.execute("DELETE FROM stat_cache WHERE path = ?", (path,))
+
+    def save_stat_cache(self, entries: Dict[str, Tuple[str, str]]) -> None:
+        """path -> (stat key, content sha) of hashed files, so they are not re-read while unchanged."""
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO stat_cache(path, stat, sha) VALUES (?, ?, ?)",
+                [(path, stat, sha) for path, (stat, sha) in entries.items()],
+            )
+
+    def clear(self) -> None:
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM refs")
+            self._db.execute("DELETE FROM files")
+            self._db.execute("DELETE FROM stat_cache")
+
+    # ---- reads
+    def file_sig(self, path: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute("SELECT sig FROM files WHERE path = ?", (path,)).fetchone()
+        return row[0] if row else None
+
+    def chunk_ref(self, path: str, chunk: int) -> Optional[Tuple[str, int, int]]:
+        """(file signature, byte offset, byte length) of a chunk of `path`; None if unknown or stored without a range."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT f.sig, r.start, r.length FROM refs r JOIN files f ON f.path = r.path "
+                "WHERE r.path = ? AND r.chunk = ? AND r.start IS NOT NULL",
+                (path, chunk),
+            ).fetchone()
+        return (row[0], row[1], row[2]) if row else None
+
+    def stat_cache(self) -> Dict[str, Tuple[str, str]]:
+        with self._lock:
+            return {r[0]: (r[1], r[2]) for r in self._db.execute("SELECT path, stat, sha FROM stat_cache")}
+
+    def hashes_of(self, path: str) -> List[str]:
+        with self._lock:
+            return [r[0] for r in self._db.execute("SELECT hash FROM refs WHERE path = ? ORDER BY chunk", (path,))]
+
+    def referenced(self, hashes: Iterable[str]) -> Set[str]:
+        """The subset of `hashes` still used by at least one file."""
+        hashes = list(set(hashes))
+        found: Set[str] = set()
+        with self._lock:
+            for start in range(0, len(hashes), 500):
+                batch = hashes[start : start + 500]
+                marks = ",".join("?" * len(batch))
+                found.update(r[0] for r in self._db.execute(f"SELECT DISTINCT hash FROM refs WHERE hash IN ({marks})", batch))
+        return found
+
+    def paths(self, hash_: str) -> List[Tuple[str, int]]:
+        """(path, chunk index) of every use of a chunk, stable order (the first one is its primary path)."""
+        with self._lock:
+            return [(r[0], r[1]) for r in self._db.execute("SELECT path, chunk FROM refs WHERE hash = ? ORDER BY path, chunk", (hash_,))]
+
+    def paths_many(self, hashes: Iterable[str]) -> Dict[str, List[Tuple[str, int]]]:
+        return {h: self.paths(h) for h in set(hashes)}
+
+    def all_hashes(self) -> Set[str]:
+        with self._lock:
+            return {r[0] for r in self._db.execute("SELECT DISTINCT hash FROM refs")}
+
+    def files_using(self, hashes: Iterable[str]) -> List[str]:
+        hashes = list(set(hashes))
+        found: Set[str] = set()
+        with self._lock:
+            for start in range(0, len(hashes), 500):
+                batch = hashes[start : start + 500]
+                marks = ",".join("?" * len(batch))
+                found.update(r[0] for r in self._db.execute(f"SELECT DISTINCT path FROM refs WHERE hash IN ({marks})", batch))
+        return sorted(found)
+
+    def files(self) -> List[str]:
+        with self._lock:
+            return [r[0] for r in self._db.execute("SELECT path FROM files ORDER BY path")]
+
+    def chunk_counts(self) -> Dict[str, int]:
+        """path -> number of chunks (files without chunks, e.g. skipped bulk files, count 0)."""
+        with self._lock:
+            counts = {r[0]: 0 for r in self._db.execute("SELECT path FROM files")}
+            counts.update({r[0]: r[1] for r in self._db.execute("SELECT path, COUNT(*) FROM refs GROUP BY path")})
+        return counts
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            files = self._db.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+            refs, unique = self._db.execute("SELECT COUNT(*), COUNT(DISTINCT hash) FROM refs").fetchone()
+        return {"files": files, "chunk_refs": refs, "unique_chunks": unique}
+
+    # ---- maintenance
+    def integrity_errors(self) -> List[str]:
+        with self._lock:
+            rows = [r[0] for r in self._db.execute("PRAGMA quick_check")]
+        return [] if rows == ["ok"] else rows
+
+    def vacuum(self) -> None:
+        with self._lock:
+            self._db.execute("VACUUM")
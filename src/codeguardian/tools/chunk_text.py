@@ -0,0 +1,71 @@
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from codeguardian.tools.chunk_store import ChunkRefs, chunk_id
+from codeguardian.tools.git_blobs import BlobReader, decode_text
+
+
+class ChunkTexts:
+    """
+    Text of chunks stored by reference (RAG_CHUNK_STORAGE=ref): Chroma holds only vectors and metadata,
+    chunks.sqlite the (file version, byte offset, byte length) of every use. The chunk id is the SHA-256 of
+    its text, so a fetched range is checked against it: a mismatch means the file changed since indexing.
+
+    Lookup order:
+      1. the byte range of the work tree file (LF / UTF-8 files: one seek + read)
+      2. the same range of the whole file decoded like at indexing (CRLF, invalid UTF-8)
+      3. changed since indexing: the current text at that range, flagged stale
+      4. file gone from the work tree: the indexed version from the git object store, flagged stale
+    """
+
+    def __init__(self, root: Path, refs: ChunkRefs):
+        self.root = Path(root)
+        self.refs = refs
+        self._reader: Optional[BlobReader] = None
+        self._reader_lock = threading.Lock()
+
+    def read(self, hash_: str, rel: str, chunk: int, files: Optional[Dict[str, Optional[bytes]]] = None) -> Tuple[Optional[str], bool]:
+        """(text, stale) of one use of a chunk; (None, True) if it cannot be found. `files` caches decoded files per search."""
+        ref = self.refs.chunk_ref(rel, chunk)
+        if ref is None:
+            return None, True
+        sig, start, length = ref
+        path = self.root / rel
+
+        try:
+            with open(path, "rb") as fh:
+                fh.seek(start)
+                text = fh.read(length).decode("utf-8")
+            if chunk_id(text) == hash_:
+                return text, False
+        except (OSError, UnicodeDecodeError):
+            pass
+
+        files = files if files is not None else {}
+        if rel not in files:
+            try:
+                files[rel] = decode_text(path.read_bytes()).encode("utf-8")
+            except OSError:
+                files[rel] = None
+        data = files[rel]
+        if data is not None:
+            text = data[start : start + length].decode("utf-8", errors="ignore")
+            return text, chunk_id(text) != hash_
+
+        blob = self._blob(sig.split(":", 1)[0])
+        if blob is None:
+            return None, True
+        return decode_text(blob).encode("utf-8")[start : start + length].decode("utf-8", errors="ignore"), True
+
+    def _blob(self, sha: str) -> Optional[bytes]:
+        with self._reader_lock:
+            if self._reader is None:
+                self._reader = BlobReader(self.root)
+        return self._reader.read(sha)
+
+    def close(self) -> None:
+        with self._reader_lock:
+            if self._reader is not None:
+                self._reader.close()
+                self._reader = None
@@ -0,0 +1,109 @@
+import copy
+import json
+import tempfile
+from collections import Counter
+from pathlib import Path, PurePosixPath
+from typing import Dict, List, Optional
+
+from codeguardian.tools.embeddings import CountingEmbedder, OllamaEmbedder
+from codeguardian.tools.local_rag_tool import LocalDirectoryRagTool
+from codeguardian.tools.tools import chunking_config, index_all, load_rag_config, new_search_tool, ollama_scheduler
+from codeguardian.config.settings import settings
+
+
+def load_benchmark(path: Path) -> List[Dict]:
+    """
+    Benchmark corpus: JSONL (or a JSON list) of {"query": "...", "relevant": ["repo/relative/File.java", ...]}
+    - the files a good search should return for the query.
+    """
+    text = Path(path).read_text(encoding="utf-8")
+    cases = json.loads(text) if text.lstrip().startswith("[") else [json.loads(line) for line in text.splitlines() if line.strip()]
+    for case in cases:
+        if not case.get("query") or not case.get("relevant"):
+            raise ValueError(f"Benchmark case needs 'query' and 'relevant': {case}")
+    return cases
+
+
+def evaluate(tool: LocalDirectoryRagTool, cases: List[Dict], k: int = 5) -> Dict[str, float]:
+    """recall@k (share of relevant files found), hit@k (at least one found) and MRR of the first relevant file."""
+    recall = hit = mrr = 0.0
+    for case in cases:
+        relevant = {r.replace("\\", "/") for r in case["relevant"]}
+        ranked: List[str] = []
+        for h in tool.search(case["query"], k):
+            for path in [tool.display_path(h.path)] + list(h.also):
+                if path not in ranked:
+                    ranked.append(path)
+        found = [i for i, path in enumerate(ranked) if path in relevant]
+        recall += len({ranked[i] for i in found}) / len(relevant)
+        hit += bool(found)
+        mrr += 1.0 / (found[0] + 1) if found else 0.0
+    n = max(1, len(cases))
+    return {"recall": round(recall / n, 3), "hit": round(hit / n, 3), "mrr": round(mrr / n, 3)}
+
+
+def _merge(base: dict, override: dict) -> dict:
+    out = copy.deepcopy(base)
+    for key, value in (override or {}).items():
+        out[key] = _merge(out.get(key) or {}, value) if isinstance(value, dict) else value
+    return out
+
+
+def candidate_configs(names: Optional[List[str]] = None) -> Dict[str, dict]:
+    """`current` (rag_config.yaml as is) plus the chunking.tuning variants merged over it."""
+    chunking = load_rag_config().get("chunking") or {}
+    base = {k: v for k, v in chunking.items() if k != "tuning"}
+    candidates = {"current": base}
+    for name, variant in (chunking.get("tuning") or {}).items():
+        candidates[name] = _merge(base, variant)
+    if names:
+        unknown = set(names) - set(candidates)
+        if unknown:
+            raise ValueError(f"Unknown tuning candidates: {sorted(unknown)} (known: {sorted(candidates)})")
+        candidates = {n: candidates[n] for n in candidates if n in names}
+    return candidates
+
+
+def tune_chunking(corpus: Path, k: int = 5, names: Optional[List[str]] = None) -> List[Dict]:
+    """
+    Builds a throw-away index of PROJECT_PATH per candidate and reports its cost (chunks and characters
+    embedded, chunks per extension) and its retrieval quality on the benchmark corpus.
+    Wall time is not compared: vectors are shared between candidates, so later ones would look faster.
+    """
+    cases = load_benchmark(corpus)
+    embedder = OllamaEmbedder(settings.ollama_base_url, settings.embed_model, scheduler=ollama_scheduler())
+    cache: Dict[str, List[float]] = {}
+    results = []
+    for name, cfg in candidate_configs(names).items():
+        counting = CountingEmbedder(embedder, cache)
+        with tempfile.TemporaryDirectory(prefix=f"tune-{name}-", ignore_cleanup_errors=True) as tmp:
+            tool = new_search_tool(tmp, chunking=chunking_config(cfg), embedder=counting)
+            index_all(tool)
+            per_file = tool.chunks_per_file()
+            by_ext = Counter()
+            for rel, n in per_file.items():
+                by_ext[PurePosixPath(rel).suffix.lower() or "(none)"] += n
+            results.append({
+                "candidate": name,
+                "files": len(per_file),
+                "chunks": sum(per_file.values()),
+                "embedded_chunks": counting.texts,
+                "embedded_chars": counting.chars,
+                "chunks_by_ext": dict(by_ext.most_common()),
+                **evaluate(tool, cases, k),
+            })
+    return results
+
+
+def format_report(results: List[Dict], k: int) -> str:
+    head = f"{'candidate':<12} {'files':>6} {'chunks':>7} {'emb chars':>10} {'recall@' + str(k):>9} {'hit@' + str(k):>7} {'mrr':>6}"
+    lines = [head, "-" * len(head)]
+    for r in results:
+        lines.append(
+            f"{r['candidate']:<12} {r['files']:>6} {r['chunks']:>7} {r['embedded_chars']:>10} "
+            f"{r['recall']:>9} {r['hit']:>7} {r['mrr']:>6}"
+        )
+    for r in results:
+        top = ", ".join(f"{ext} {n}" for ext, n in list(r["chunks_by_ext"].items())[:6])
+        lines.append(f"{r['candidate']}: chunks by extension: {top}")
+    return "\n".join(lines)
@@ -0,0 +1,112 @@
+import hashlib
+import json
+from pathlib import PurePosixPath
+from typing import Dict, List, Literal, Optional, Tuple
+
+from pydantic import BaseModel, Field, model_validator
+
+
+class ChunkProfile(BaseModel):
+    """How the files of one extension are split into chunks (rag_config.yaml -> chunking)."""
+    chunk_chars: int = Field(1800, ge=1)
+    overlap: int = Field(200, ge=0)
+    # 0 = unlimited; otherwise at most this many chunks per file are embedded, picked by `sample`
+    max_chunks: int = Field(0, ge=0)
+    sample: Literal["head", "spread"] = "spread"
+    # 0 = never; bigger files are not embedded at all (data dumps, generated fixtures)
+    skip_above_bytes: int = Field(0, ge=0)
+
+    @model_validator(mode="after")
+    def _overlap_below_size(self):
+        if self.overlap >= self.chunk_chars:
+            raise ValueError(f"overlap ({self.overlap}) must be smaller than chunk_chars ({self.chunk_chars})")
+        return self
+
+    def fingerprint(self) -> str:
+        """Part of a file's index signature: a profile change re-chunks the file (unchanged chunks are not re-embedded)."""
+        return hashlib.sha1(json.dumps(self.model_dump(), sort_keys=True).encode()).hexdigest()[:8]
+
+    def skips(self, size: int) -> bool:
+        return bool(self.skip_above_bytes) and size > self.skip_above_bytes
+
+    def chunk(self, text: str) -> List[Tuple[int, str]]:
+        return self.select(self.split(text))
+
+    def split(self, text: str) -> List[str]:
+        """Fixed-size chunks with overlap."""
+        text = text.replace("\r\n", "\n")
+        return [text[start:end] for start, end in self.spans(text)]
+
+    def spans(self, text: str) -> List[Tuple[int, int]]:
+        """(start, end) character offsets of the split() chunks in `text` (CRLF already normalized)."""
+        lo, hi = len(text) - len(text.lstrip()), len(text.rstrip())
+        if lo >= hi:
+            return []
+        if hi - lo <= self.chunk_chars:
+            return [(lo, hi)]
+
+        spans: List[Tuple[int, int]] = []
+        step = max(1, self.chunk_chars - self.overlap)
+        for start in range(lo, hi, step):
+            piece = text[start : min(start + self.chunk_chars, hi)]
+            s, e = start + len(piece) - len(piece.lstrip()), start + len(piece.rstrip())
+            if s < e:
+                spans.append((s, e))
+        return spans
+
+    def select(self, chunks: List[str]) -> List[Tuple[int, str]]:
+        """(position, text) of the chunks to embed; positions stay those of the full split, so gaps are visible."""
+        n = len(chunks)
+        if not self.max_chunks or n <= self.max_chunks:
+            keep = range(n)
+        elif self.sample == "head" or self.max_chunks == 1:
+            keep = range(self.max_chunks)
+        else:
+            # Evenly spread over the file, always including its head and its tail
+            keep = sorted({round(i * (n - 1) / (self.max_chunks - 1)) for i in range(self.max_chunks)})
+        return [(i, chunks[i]) for i in keep]
+
+
+def byte_ranges(text: str, spans: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """(byte offset, byte length) in the UTF-8 encoding of `text` of character spans sorted by start."""
+    ranges: List[Tuple[int, int]] = []
+    pos = offset = 0
+    for start, end in spans:
+        offset += len(text[pos:start].encode("utf-8"))
+        pos = start
+        ranges.append((offset, len(text[start:end].encode("utf-8"))))
+    return ranges
+
+
+class ChunkingConfig(BaseModel):
+    """The default profile plus per-extension overrides."""
+    default: ChunkProfile = ChunkProfile()
+    extensions: Dict[str, ChunkProfile] = {}
+
+    @classmethod
+    def from_config(cls, cfg: Optional[dict], default: Optional[ChunkProfile] = None) -> "ChunkingConfig":
+        """
+        `chunking:` section of rag_config.yaml. Extension entries only list what differs from the default:
+
+            chunking:
+              default: {chunk_chars: 1800, overlap: 200}
+              extensions:
+                ".json": {max_chunks: 8, skip_above_bytes: 500000}
+        """
+        cfg = cfg or {}
+        base = (default or ChunkProfile()).model_dump()
+        base.update(cfg.get("default") or {})
+        extensions = {}
+        for ext, overrides in (cfg.get("extensions") or {}).items():
+            ext = ext.lower() if ext.startswith(".") else f".{ext.lower()}"
+            extensions[ext] = ChunkProfile(**{**base, **(overrides or {})})
+        return cls(default=ChunkProfile(**base), extensions=extensions)
+
+    def for_path(self, path: str) -> ChunkProfile:
+        return self.extensions.get(PurePosixPath(path).suffix.lower(), self.default)
+
+    def max_overlap(self) -> int:
+        return max([self.default.overlap] + [p.overlap for p in self.extensions.values()])
+
+    def snapshot(self) -> dict:
+        return self.model_dump()
@@ -0,0 +1,140 @@
+import os
+import hashlib
+from typing import Dict, List, Optional
+
+import requests
+
+from codeguardian.tools.request_scheduler import Priority, RequestScheduler, request_priority, current_priority, scheduled
+
+
+class OllamaEmbedder:
+    """
+    Embeddings from Ollama (nomic-embed-text by default).
+    OpenAI-compatible /v1/embeddings first (accepts a batch of inputs), native /api/embeddings as fallback.
+    With a `scheduler` every request waits for a slot: embed() as an interactive query, embed_many() as bulk
+    indexing, unless the caller sets another class (request_priority).
+    """
+
+    def __init__(
+            self,
+            base_url: Optional[str] = None,
+            model: Optional[str] = None,
+            timeout_s: int = 120,
+            batch_size: int = 32,
+            scheduler: Optional[RequestScheduler] = None,
+    ):
+        self.base_url = base_url or os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+        self.model = model or os.getenv("EMBED_MODEL", "nomic-embed-text:latest")
+        self.timeout_s = timeout_s
+        self.batch_size = max(1, batch_size)
+        self.scheduler = scheduler
+
+    def embed(self, text: str) -> List[float]:
+        with scheduled(self.scheduler, Priority.INTERACTIVE):
+            return self._embed(text)
+
+    def _embed(self, text: str) -> List[float]:
+        # Use OpenAI-compatible endpoint for Ollama
+        # This matches how we configured CrewAI to talk to Ollama
+        url = f"{self.base_url}/v1/embeddings"
+
+        # Try OpenAI format first
+        try:
+            r = requests.post(
+                url,
+                json={"model": self.model, "input": text},
+                timeout=self.timeout_s,
+                headers={"Authorization": "Bearer NA"}
+            )
+            if r.status_code == 404:
+                # Fallback to native Ollama API if /v1/embeddings not found
+                url = f"{self.base_url}/api/embeddings"
+                r = requests.post(
+                    url,
+                    json={"model": self.model, "prompt": text},
+                    timeout=self.timeout_s,
+                )
+
+            r.raise_for_status()
+            data = r.json()
+
+            # Handle OpenAI format response
+            if "data" in data and isinstance(data["data"], list):
+                return data["data"][0]["embedding"]
+
+            # Handle native Ollama format response
+            if "embedding" in data:
+                return data["embedding"]
+
+            raise ValueError(f"Unexpected response format from {url}")
+
+        except Exception as e:
+            # Last resort fallback to native API if everything else failed
+            try:
+                url = f"{self.base_url}/api/embeddings"
+                r = requests.post(
+                    url,
+                    json={"model": self.model, "prompt": text},
+                    timeout=self.timeout_s,
+                )
+                r.raise_for_status()
+                return r.json()["embedding"]
+            except Exception:
+                raise e
+
+    def embed_many(self, texts: List[str]) -> List[List[float]]:
+        """One request per `batch_size` texts; falls back to one request per text if batching is not supported."""
+        out: List[List[float]] = []
+        with request_priority(current_priority(Priority.BULK)):
+            for start in range(0, len(texts), self.batch_size):
+                batch = texts[start : start + self.batch_size]
+                embs = self._embed_batch(batch)
+                out.extend(embs if embs is not None else [self.embed(t) for t in batch])
+        return out
+
+    def _embed_batch(self, texts: List[str]) -> Optional[List[List[float]]]:
+        if len(texts) == 1:
+            return None
+        try:
+            with scheduled(self.scheduler, Priority.BULK):
+                r = requests.post(
+                    f"{self.base_url}/v1/embeddings",
+                    json={"model": self.model, "input": texts},
+                    timeout=self.timeout_s,
+                    headers={"Authorization": "Bearer NA"},
+                )
+            r.raise_for_status()
+            data = r.json().get("data")
+            if not isinstance(data, list) or len(data) != len(texts):
+                return None
+            return [row["embedding"] for row in sorted(data, key=lambda row: row.get("index", 0))]
+        except Exception:
+            return None
+
+
+class CountingEmbedder:
+    """
+    Wraps an embedder to measure what an index build embeds (texts, characters), e.g. per chunking candidate
+    of tune_chunking. Vectors are cached by text in `cache`, which several wrappers may share: a text is only
+    sent to `inner` once, but counted by every wrapper that embeds it.
+    """
+
+    def __init__(self, inner: OllamaEmbedder, cache: Dict[str, List[float]]):
+        self.inner = inner
+        self.model = inner.model
+        self.cache = cache
+        self.texts = 0
+        self.chars = 0
+
+    def embed(self, text: str) -> List[float]:
+        return self.embed_many([text])[0]
+
+    def embed_many(self, texts: List[str]) -> List[List[float]]:
+        self.texts += len(texts)
+        self.chars += sum(len(t) for t in texts)
+        keys = [hashlib.sha256(t.encode("utf-8")).hexdigest() for t in texts]
+        missing = [t for t, key in zip(texts, keys) if key not in self.cache]
+        if missing:
+            for t, vec in zip(missing, self.inner.embed_many(missing)):
+                self.cache[hashlib.sha256(t.encode("utf-8")).hexdigest()] = vec
+        return [self.cache[key] for key in keys]
@@ -0,0 +1,131 @@
+import mmap
+import re
+import threading
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+_NEWLINE = re.compile(b"\n")
+
+
+class _Entry:
+    __slots__ = ("key", "data", "starts")
+
+    def __init__(self, key: Tuple[int, int], data: Optional[bytes], starts: array):
+        self.key = key          # (mtime_ns, size) the entry was read at
+        self.data = data        # file bytes; None = large file, read through mmap
+        self.starts = starts    # byte offset of every line start (+ the file size)
+
+
+class FileCache:
+    """
+    Process-wide cache of project files for the read tool: line offsets always, content for files below
+    `mmap_threshold` (bigger ones are sliced through mmap, only their line index is kept).
+    Every read checks (mtime_ns, size); the project writer tools also invalidate the files they write,
+    so edits within the same mtime tick are never served stale. LRU-bounded by cached bytes.
+    """
+
+    def __init__(self, max_bytes: int = 64 << 20, mmap_threshold: int = 1 << 20):
+        self.max_bytes = max_bytes
+        self.mmap_threshold = mmap_threshold
+        self._entries: "OrderedDict[Path, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.invalidations = 0
+
+    def _entry(self, path: Path) -> _Entry:
+        st = path.stat()
+        key = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry.key == key:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry
+            self.misses += 1
+        entry = self._load(path, key)
+        with self._lock:
+            self._drop(path)
+            self._entries[path] = entry
+            self._bytes += self._size(entry)
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                self._drop(next(iter(self._entries)))
+        return entry
+
+    def _load(self, path: Path, key: Tuple[int, int]) -> _Entry:
+        size = key[1]
+        if size < self.mmap_threshold:
+            data = path.read_bytes()
+            return _Entry(key, data, self._line_starts(data))
+        with open(path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return _Entry(key, None, self._line_starts(mm))
+
+    @staticmethod
+    def _line_starts(buf) -> array:
+        starts = array("q", [0])
+        starts.extend(m.end() for m in _NEWLINE.finditer(buf))
+        if starts[-1] != len(buf):
+            starts.append(len(buf))  # last line without a trailing newline
+        return starts
+
+    @staticmethod
+    def _size(entry: _Entry) -> int:
+        return len(entry.data or b"") + entry.starts.itemsize * len(entry.starts)
+
+    def _drop(self, path: Path) -> None:
+        entry = self._entries.pop(path, None)
+        if entry is not None:
+            self._bytes -= self._size(entry)
+
+    def _slice(self, path: Path, entry: _Entry, start: int, end: int) -> bytes:
+        if entry.data is not None:
+            return entry.data[start:end]
+        with open(path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return mm[start:end]
+
+    # ---- reads
+    def line_count(self, path: Path) -> int:
+        return len(self._entry(path).starts) - 1
+
+    def lines(self, path: Path, first: int, last: int) -> List[str]:
+        """Lines first..last (1-based, inclusive, clipped to the file) without line ends."""
+        entry = self._entry(path)
+        n = len(entry.starts) - 1
+        first, last = max(1, first), min(n, last)
+        if first > last:
+            return []
+        data = self._slice(path, entry, entry.starts[first - 1], entry.starts[last])
+        return data.decode("utf-8", errors="replace").replace("\r\n", "\n").split("\n")[: last - first + 1]
+
+    def byte_range(self, path: Path, offset: int, length: int) -> bytes:
+        entry = self._entry(path)
+        return self._slice(path, entry, max(0, offset), max(0, offset) + max(0, length))
+
+    def text(self, path: Path) -> str:
+        entry = self._entry(path)
+        return self._slice(path, entry, 0, entry.starts[-1]).decode("utf-8", errors="replace").replace("\r\n", "\n")
+
+    # ---- invalidation
+    def invalidate(self, path: Optional[Path] = None) -> None:
+        """Forgets one file (e.g. after a write) or everything."""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self._bytes = 0
+            else:
+                self._drop(Path(path).resolve())
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "files": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+            }
+
+
+file_cache = FileCache()
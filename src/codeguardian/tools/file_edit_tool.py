@@ -0,0 +1,441 @@
+import difflib
+import os
+import re
+import stat
+import tempfile
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, Field
+from crewai.tools import BaseTool
+
+from codeguardian.config.settings import settings
+from codeguardian.tools.file_cache import file_cache
+from codeguardian.tools.syntax_check import check_files
+
+# Hunks whose context does not match are retried without up to this many leading/trailing context lines (like patch -F2)
+MAX_FUZZ = 2
+# Line comparisons, strictest first: exact, trailing whitespace ignored, indentation ignored
+_MATCH_LEVELS = (
+    ("exact", lambda s: s),
+    ("ignoring trailing whitespace", str.rstrip),
+    ("ignoring indentation", str.strip),
+)
+_HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+class EditConflict(Exception):
+    """An edit does not apply to the current file content. Nothing is written."""
+
+
+class SearchReplace(BaseModel):
+    search: str = Field(..., description="Existing text to replace, copied exactly (a few lines that occur only once). Empty = new file.")
+    replace: str = Field(..., description="The new text for it.")
+
+
+class Hunk(BaseModel):
+    header: str
+    old_start: int
+    lines: List[Tuple[str, str]]  # (" " | "-" | "+", text)
+
+    def old(self, fuzz: int = 0) -> List[str]:
+        return [t for tag, t in self._trimmed(fuzz) if tag != "+"]
+
+    def new(self, fuzz: int = 0) -> List[str]:
+        return [t for tag, t in self._trimmed(fuzz) if tag != "-"]
+
+    def _trimmed(self, fuzz: int) -> List[Tuple[str, str]]:
+        """The hunk without up to `fuzz` context lines at each end."""
+        lines = list(self.lines)
+        for _ in range(fuzz):
+            if lines and lines[0][0] == " ":
+                lines.pop(0)
+            if lines and lines[-1][0] == " ":
+                lines.pop()
+        return lines
+
+    def leading_context_dropped(self, fuzz: int) -> int:
+        dropped = 0
+        while dropped < min(fuzz, len(self.lines)) and self.lines[dropped][0] == " ":
+            dropped += 1
+        return dropped
+
+
+class FilePatch(BaseModel):
+    old_path: Optional[str]  # None = new file
+    new_path: Optional[str]  # None = deleted file
+    hunks: List[Hunk] = []
+
+
+def _strip_prefix(path: str) -> Optional[str]:
+    path = path.split("\t", 1)[0].strip()
+    if path == "/dev/null":
+        return None
+    return path[2:] if path[:2] in ("a/", "b/") else path
+
+
+def parse_unified_diff(diff: str, default_path: Optional[str] = None) -> List[FilePatch]:
+    """Unified diff (git diff / diff -u) -> one FilePatch per file. Hunks without ---/+++ headers apply to `default_path`."""
+    patches: List[FilePatch] = []
+    current: Optional[FilePatch] = None
+    hunk: Optional[Hunk] = None
+    lines = diff.replace("\r\n", "\n").split("\n")
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        if line.startswith("--- ") and i + 1 < len(lines) and lines[i + 1].startswith("+++ "):
+            current = FilePatch(old_path=_strip_prefix(line[4:]), new_path=_strip_prefix(lines[i + 1][4:]))
+            patches.append(current)
+            hunk = None
+            i += 2
+            continue
+        m = _HUNK_HEADER.match(line)
+        if m:
+            if current is None:
+                if not default_path:
+                    raise EditConflict("The diff has no ---/+++ file header and no file_path was given.")
+                current = FilePatch(old_path=default_path, new_path=default_path)
+                patches.append(current)
+            hunk = Hunk(header=m.group(0), old_start=int(m.group(1)), lines=[])
+            current.hunks.append(hunk)
+        elif hunk is not None and line[:1] in (" ", "-", "+"):
+            hunk.lines.append((line[0], line[1:]))
+        elif hunk is not None and line == "" and i < len(lines) - 1:
+            hunk.lines.append((" ", ""))  # blank context line whose leading space was lost
+        # "\ No newline at end of file", "diff --git", "index ..." and prose are ignored
+        i += 1
+    if not any(p.hunks or p.new_path is None for p in patches):
+        raise EditConflict("No hunks found in the diff (expected '@@ -l,s +l,s @@' sections).")
+    return patches
+
+
+def _find(lines: List[str], block: List[str], expected: int, start: int = 0) -> Tuple[Optional[int], str, List[int]]:
+    """(position nearest to `expected`, match level, all positions) of `block` in `lines[start:]`, strictest level first."""
+    n = len(block)
+    for level, norm in _MATCH_LEVELS:
+        want = [norm(b) for b in block]
+        hits = [i for i in range(start, len(lines) - n + 1) if [norm(x) for x in lines[i : i + n]] == want]
+        if hits:
+            return min(hits, key=lambda i: (abs(i - expected), i)), level, hits
+    return None, "", []
+
+
+def _closest_region(lines: List[str], block: List[str]) -> str:
+    """The file lines that look most like `block` (line numbers included), for conflict reports."""
+    if not block or not lines:
+        return ""
+    want = [b.strip() for b in block]
+    n = len(block)
+    matcher = difflib.SequenceMatcher(autojunk=False)
+    best, best_score = 0, 0.0
+    for i in range(0, max(1, len(lines) - n + 1)):
+        score = 0.0
+        for line, wanted in zip(lines[i : i + n], want):
+            matcher.set_seqs(line.strip(), wanted)
+            score += matcher.quick_ratio() and matcher.ratio()
+        if score > best_score:
+            best, best_score = i, score
+    if best_score < 0.5 * n:
+        return "No similar lines in the file."
+    shown = lines[best : best + min(n, 30)]
+    body = "\n".join(f"{best + k + 1:>5}| {t}" for k, t in enumerate(shown))
+    return f"Closest region: lines {best + 1}-{best + len(shown)} ({round(100 * best_score / n)}% similar):\n{body}"
+
+
+def _indent(line: str) -> str:
+    return line[: len(line) - len(line.lstrip())]
+
+
+def _reindent(added: List[str], block: List[str], matched: List[str]) -> List[str]:
+    """New lines written against `block` whose indentation differs from the file's (`matched`): shifted to the file's."""
+    for want, got in zip(block, matched):
+        if want.strip():
+            theirs, ours = _indent(want), _indent(got)
+            break
+    else:
+        return added
+    if theirs == ours:
+        return added
+    return [ours + line[len(theirs):] if line.startswith(theirs) and line.strip() else line for line in added]
+
+
+def apply_hunks(text: str, hunks: List[Hunk], label: str = "file") -> Tuple[str, List[str]]:
+    """Applies every hunk or raises EditConflict. Returns the new text and notes about offsets / fuzz."""
+    lines = text.split("\n") if text else []
+    notes: List[str] = []
+    shift = 0   # where the previous hunk landed compared to its header
+    floor = 0   # hunks apply in order, never above the previous one
+    for number, hunk in enumerate(hunks, 1):
+        # "-l,s" names the first old line; for a pure insertion ("-l,0") the line it goes after
+        nominal_start = max(0, hunk.old_start - 1) if hunk.old() else hunk.old_start
+        expected = max(0, nominal_start + shift)
+        pos, fuzz = None, 0
+        for fuzz in range(0, MAX_FUZZ + 1):
+            old, new = hunk.old(fuzz), hunk.new(fuzz)
+            if fuzz and len(old) == len(hunk.old(fuzz - 1)):
+                break  # no more context to drop
+            if not old:
+                if not fuzz:
+                    pos, level = max(floor, min(expected, len(lines))), "exact"  # pure insertion
+                break
+            pos, level, _ = _find(lines, old, expected + hunk.leading_context_dropped(fuzz), floor)
+            if pos is not None:
+                break
+        if pos is None:
+            raise EditConflict(
+                f"Hunk {number} of {label} ({hunk.header}) does not apply: its context/removed lines are not in the file.\n"
+                f"{_closest_region(lines, hunk.old())}"
+            )
+        # Context lines keep the file's text; added lines follow the file's indentation
+        matched = iter(lines[pos : pos + len(old)])
+        new = []
+        for tag, text_ in hunk._trimmed(fuzz):
+            if tag == " ":
+                new.append(next(matched))
+            elif tag == "-":
+                next(matched)
+            else:
+                new.append(_reindent([text_], old, lines[pos : pos + len(old)])[0] if level == "ignoring indentation" else text_)
+        lines[pos : pos + len(old)] = new
+        nominal = nominal_start + hunk.leading_context_dropped(fuzz)
+        if pos != nominal + shift:
+            notes.append(f"hunk {number} applied at line {pos + 1} (header said {hunk.old_start})")
+        if level != "exact":
+            notes.append(f"hunk {number} matched {level}")
+        if fuzz:
+            notes.append(f"hunk {number} applied with fuzz {fuzz}")
+        shift = pos - nominal + len(new) - len(old)
+        floor = pos + len(new)
+    return "\n".join(lines), notes
+
+
+def apply_search_replace(text: str, edits: List[SearchReplace], label: str = "file") -> Tuple[str, List[str]]:
+    """Applies each block in turn (each `search` must match exactly once) or raises EditConflict."""
+    notes: List[str] = []
+    for number, edit in enumerate(edits, 1):
+        search = edit.search.replace("\r\n", "\n")
+        replace = edit.replace.replace("\r\n", "\n")
+        if not search.strip():
+            if text.strip():
+                raise EditConflict(f"Edit {number} for {label} has an empty search text, which only creates new files.")
+            text = replace
+            continue
+        count = text.count(search)
+        if count == 1:
+            text = text.replace(search, replace, 1)
+            continue
+        lines = text.split("\n")
+        block = search.strip("\n").split("\n")
+        if count > 1:
+            _, _, hits = _find(lines, block, 0)
+            where = ", ".join(str(i + 1) for i in hits[:10]) or "?"
+            raise EditConflict(
+                f"Edit {number} for {label} is ambiguous: the search text occurs {count} times (lines {where}). "
+                "Include more surrounding lines so it matches once."
+            )
+        pos, level, hits = _find(lines, block, 0)
+        if pos is None:
+            raise EditConflict(f"Edit {number} for {label}: search text not found.\n{_closest_region(lines, block)}")
+        if len(hits) > 1:
+            where = ", ".join(str(i + 1) for i in hits[:10])
+            raise EditConflict(f"Edit {number} for {label} is ambiguous {level} (lines {where}). Include more surrounding lines.")
+        added = replace.strip("\n").split("\n") if replace.strip("\n") else []
+        if level == "ignoring indentation":
+            added = _reindent(added, block, lines[pos : pos + len(block)])
+        lines[pos : pos + len(block)] = added
+        text = "\n".join(lines)
+        notes.append(f"edit {number} matched {level} at line {pos + 1}")
+    return text, notes
+
+
+def _unlink(path) -> None:
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+def _stage(path: Path, data) -> str:
+    """`data` (text or bytes) in a temp file next to `path`, with `path`'s permissions. Returns the temp file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        if isinstance(data, bytes):
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(data)
+        else:
+            with os.fdopen(fd, "w", encoding="utf-8", newline="") as fh:
+                fh.write(data)
+        if path.exists():
+            os.chmod(tmp, stat.S_IMODE(path.stat().st_mode))
+    except BaseException:
+        _unlink(tmp)
+        raise
+    return tmp
+
+
+def atomic_write(path: Path, text: str) -> None:
+    """Writes via a temp file in the same directory + rename: readers see the old or the new file, never a partial one."""
+    tmp = _stage(path, text)
+    try:
+        os.replace(tmp, path)
+    except BaseException:
+        _unlink(tmp)
+        raise
+
+
+def write_files(files: Dict[Path, Optional[str]]) -> None:
+    """
+    Writes (text) or deletes (None) several files as one change. Every new content is staged in a temp file first,
+    so a full disk or a read-only directory fails before any file is touched; if a rename fails after that,
+    the files already changed are restored.
+    """
+    staged: Dict[Path, str] = {}
+    try:
+        for path, text in files.items():
+            if text is not None:
+                staged[path] = _stage(path, text)
+    except BaseException:
+        for tmp in staged.values():
+            _unlink(tmp)
+        raise
+
+    originals: Dict[Path, Optional[bytes]] = {}
+    try:
+        for path, text in files.items():
+            originals[path] = path.read_bytes() if path.is_file() else None
+            if text is None:
+                path.unlink(missing_ok=True)
+            else:
+                os.replace(staged[path], path)
+                del staged[path]
+    except BaseException:
+        for path, old in originals.items():
+            if old is None:
+                path.unlink(missing_ok=True)
+            else:
+                os.replace(_stage(path, old), path)
+        for tmp in staged.values():
+            _unlink(tmp)
+        raise
+
+
+def resolve_project_file(root: Path, file_path: str) -> Path:
+    """`file_path` (repo-relative, or absolute inside the project / main checkout) -> absolute path inside `root`."""
+    root = root.resolve()
+    p = Path(file_path)
+    rel = p
+    if p.is_absolute():
+        for base in (root, settings.project_path.resolve()):
+            try:
+                rel = p.resolve().relative_to(base)
+                break
+            except ValueError:
+                continue
+        else:
+            raise PermissionError(f"Path outside project path: {p}")
+    full = (root / rel).resolve()
+    try:
+        full.relative_to(root)
+    except ValueError:
+        raise PermissionError(f"Path outside project path: {full}")
+    return full
+
+
+class ProjectFileEditInput(BaseModel):
+    """Input schema for ProjectFileEditTool."""
+    file_path: Optional[str] = Field(None, description="File to edit, RELATIVE to the project root (e.g. 'src/main/java/com/example/Service.java'). Optional for a diff with ---/+++ headers.")
+    edits: Optional[List[SearchReplace]] = Field(None, description="Search/replace blocks, applied in order. Each search text must occur exactly once.")
+    diff: Optional[str] = Field(None, description="A unified diff (git diff format). May change several files.")
+
+
+class ProjectFileEditTool(BaseTool):
+    name: str = "Project File Editor"
+    description: str = (
+        "Edits files within the target project WITHOUT resending the whole file: either search/replace blocks "
+        "(copy a few unique existing lines into `search`, the new lines into `replace`) or a unified diff. "
+        "Small line offsets and whitespace differences are tolerated. All edits apply or nothing is written; "
+        "on a conflict the reply shows the closest matching lines so you can retry. "
+        "Prefer this over writing complete files when changing existing code."
+    )
+    args_schema: Type[BaseModel] = ProjectFileEditInput
+    project_path: Optional[str] = None  # defaults to settings.project_path (set per workspace in batch runs)
+
+    def _run(self, file_path: Optional[str] = None, edits: Optional[List] = None, diff: Optional[str] = None) -> str:
+        root = Path(self.project_path) if self.project_path else settings.project_path
+        try:
+            if bool(edits) == bool(diff):
+                return "Error: pass either `edits` (search/replace blocks) or `diff` (unified diff)."
+            if edits:
+                if not file_path:
+                    return "Error: `file_path` is required for search/replace edits."
+                blocks = [e if isinstance(e, SearchReplace) else SearchReplace(**e) for e in edits]
+                return self._apply(root, [(file_path, file_path, lambda text, label: apply_search_replace(text, blocks, label))])
+            patches = parse_unified_diff(diff, file_path)
+            return self._apply(root, [
+                (p.old_path, p.new_path, (lambda hunks: lambda text, label: apply_hunks(text, hunks, label))(p.hunks))
+                for p in patches
+            ])
+        except EditConflict as e:
+            return f"Conflict: {e}\nNothing was written. Re-read the lines above and retry with corrected edits."
+        except Exception as e:
+            return f"Error editing file: {str(e)}"
+
+    def _apply(self, root: Path, changes) -> str:
+        """
+        Computes every file's new content first (a later patch of the same file sees the earlier one's result);
+        writes only if all edits apply, then all files together (write_files).
+        """
+        files: Dict[Path, Optional[str]] = {}  # planned content, None = deleted
+        report = []
+        for old_path, new_path, edit in changes:
+            label = new_path or old_path
+            source = resolve_project_file(root, old_path) if old_path else None
+            target = resolve_project_file(root, new_path) if new_path else None
+            if source is None and target is not None and (files[target] is not None if target in files else target.exists()):
+                raise EditConflict(f"{new_path} already exists; edit it with a diff against its current content.")
+            if source in files:
+                exists, raw = files[source] is not None, files[source] or ""
+            else:
+                exists = source is not None and source.exists()
+                raw = source.read_bytes().decode("utf-8") if exists else ""
+            crlf = "\r\n" in raw
+            text = raw.replace("\r\n", "\n")
+            had_newline = text.endswith("\n") or not raw
+            body = text[:-1] if text.endswith("\n") else text
+            try:
+                new_body, notes = edit(body, label)
+            except EditConflict as e:
+                if source is not None and not exists:
+                    raise EditConflict(f"{old_path} does not exist. {e}")
+                raise
+            new_text = new_body + ("\n" if had_newline and new_body else "")
+            if crlf:
+                new_text = new_text.replace("\n", "\r\n")
+            added, removed = _line_delta(body, new_body)
+            if exists and source != target:
+                files[source] = None  # deleted or renamed
+            if target is None:
+                report.append(f"Deleted {label}")
+                continue
+            files[target] = new_text
+            note = f" ({'; '.join(notes)})" if notes else ""
+            report.append(f"Edited {label}: +{added} -{removed} lines{note}")
+
+        write_files(files)
+        for path in files:
+            file_cache.invalidate(path)
+        # Immediate feedback on what the edit broke (milliseconds, no build)
+        written = [p.relative_to(root.resolve()).as_posix() for p, text in files.items() if text is not None]
+        issues = check_files(root.resolve(), written)
+        if issues:
+            report.append("Syntax errors after this edit:")
+            report.extend(f"- {issue}" for issue in issues)
+        return "\n".join(report)
+
+
+def _line_delta(old: str, new: str) -> Tuple[int, int]:
+    """(added, removed) lines between two versions, by line multiset."""
+    a, b = Counter(old.split("\n")) if old else Counter(), Counter(new.split("\n")) if new else Counter()
+    return sum((b - a).values()), sum((a - b).values())
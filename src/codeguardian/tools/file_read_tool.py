@@ -0,0 +1,112 @@
+from pathlib import Path
+from typing import Optional, Type
+
+from pydantic import BaseModel, Field, PrivateAttr
+from crewai.tools import BaseTool
+
+from codeguardian.config.settings import settings
+from codeguardian.tools.file_cache import file_cache
+from codeguardian.tools.file_edit_tool import resolve_project_file
+from codeguardian.tools.symbol_index import SymbolIndex, extract_symbols
+
+
+class ProjectFileReadInput(BaseModel):
+    """Input schema for ProjectFileReadTool."""
+    file_path: Optional[str] = Field(None, description="File RELATIVE to the project root (e.g. 'src/main/java/com/example/Service.java'). Optional when `symbol` is unique.")
+    start_line: Optional[int] = Field(None, ge=1, description="First line to return (1-based).")
+    end_line: Optional[int] = Field(None, ge=1, description="Last line to return (inclusive).")
+    symbol: Optional[str] = Field(None, description="Return only this class/method/function, e.g. 'OrderService.cancel' or 'com.x.OrderService'.")
+    start_byte: Optional[int] = Field(None, ge=0, description="Byte offset to read from (instead of lines).")
+    max_bytes: Optional[int] = Field(None, ge=1, le=200_000, description="Number of bytes to read from start_byte.")
+
+
+class ProjectFileReadTool(BaseTool):
+    name: str = "Project File Reader"
+    description: str = (
+        "Reads files of the target project with line numbers: a line range (start_line/end_line), one symbol "
+        "(class, method or function by name) or a byte range. Without a range the first lines are returned and "
+        "the reply says how to get more. Prefer a symbol or line range over reading whole files."
+    )
+    args_schema: Type[BaseModel] = ProjectFileReadInput
+    project_path: Optional[str] = None  # defaults to settings.project_path (set per workspace in batch runs)
+    max_lines: int = 400
+
+    _symbols: Optional[SymbolIndex] = PrivateAttr(default=None)
+
+    def __init__(self, symbols: Optional[SymbolIndex] = None, **kwargs):
+        super().__init__(**kwargs)
+        self._symbols = symbols
+
+    def _run(
+            self,
+            file_path: Optional[str] = None,
+            start_line: Optional[int] = None,
+            end_line: Optional[int] = None,
+            symbol: Optional[str] = None,
+            start_byte: Optional[int] = None,
+            max_bytes: Optional[int] = None,
+    ) -> str:
+        root = (Path(self.project_path) if self.project_path else settings.project_path).resolve()
+        try:
+            if not file_path:
+                if not symbol:
+                    return "Error: pass `file_path` (optionally with a range) or `symbol`."
+                file_path = self._file_of(symbol)
+                if file_path.startswith("Error"):
+                    return file_path
+            path = resolve_project_file(root, file_path)
+            if not path.is_file():
+                return f"Error: {file_path} does not exist."
+            rel = path.relative_to(root).as_posix()
+
+            if start_byte is not None:
+                data = file_cache.byte_range(path, start_byte, max_bytes or 4000)
+                return f"{rel} (bytes {start_byte}-{start_byte + len(data)})\n{data.decode('utf-8', errors='replace')}"
+
+            total = file_cache.line_count(path)
+            title = rel
+            if symbol:
+                found = self._symbol_span(path, rel, symbol)
+                if isinstance(found, str):
+                    return found
+                title = f"{rel} — {found.kind} {found.name}"
+                start_line, end_line = found.start, found.end
+
+            first = start_line or 1
+            wanted = min(total, end_line or total)
+            last = min(wanted, first + self.max_lines - 1)
+            more = f"\n[... {wanted - last} more lines; read on with start_line={last + 1}]" if last < wanted else ""
+            lines = file_cache.lines(path, first, last)
+            if not lines:
+                return f"{rel} has {total} lines; nothing in lines {first}-{last}."
+            width = len(str(last))
+            body = "\n".join(f"{first + i:>{width}} | {line}" for i, line in enumerate(lines))
+            return f"{title} (lines {first}-{first + len(lines) - 1} of {total})\n{body}{more}"
+        except Exception as e:
+            return f"Error reading file: {str(e)}"
+
+    def _file_of(self, symbol: str) -> str:
+        if self._symbols is None:
+            return "Error: no symbol index; pass `file_path` as well."
+        paths = sorted({s.path for s in self._symbols.lookup_suffix(symbol)})
+        if not paths:
+            return f"Error: symbol '{symbol}' not found in the index; pass `file_path` as well."
+        if len(paths) > 1:
+            return f"Error: symbol '{symbol}' is ambiguous ({', '.join(paths[:10])}); pass `file_path` as well."
+        return paths[0]
+
+    @staticmethod
+    def _symbol_span(path: Path, rel: str, symbol: str):
+        """The symbol in the CURRENT file content (the index may predate edits made in this run)."""
+        candidates = [
+            s for s in extract_symbols(rel, file_cache.text(path))
+            if s.name == symbol or s.name.endswith(f".{symbol}")
+        ]
+        if not candidates:
+            return f"Error: no class/method/function '{symbol}' in {rel}."
+        candidates = [s for s in candidates if s.name == symbol] or candidates
+        if len({s.name for s in candidates}) > 1:
+            spans = ", ".join(f"{s.name} (lines {s.start}-{s.end})" for s in candidates[:10])
+            return f"Error: '{symbol}' matches several symbols in {rel}: {spans}. Use the full name or a line range."
+        return min(candidates, key=lambda s: s.start)  # overloads: the first one
+
@@ -1,8 +1,10 @@
-from typing import Type, Optional
+from typing import Any, Type, Optional
 from pathlib import Path
 from crewai.tools import BaseTool
+from crewai_tools import FileWriterTool
 from pydantic import BaseModel, Field
 from codeguardian.config.settings import settings
+from codeguardian.tools.file_cache import file_cache
 
 class ProjectFileWriterInput(BaseModel):
     """Input schema for ProjectFileWriterTool."""
@@ -18,16 +20,19 @@ class ProjectFileWriterTool(BaseTool):
         "Use this tool to implement code changes."
     )
     args_schema: Type[BaseModel] = ProjectFileWriterInput
+    project_path: Optional[str] = None  # defaults to settings.project_path (set per workspace in batch runs)
 
     def _run(self, file_path: str, content: str, overwrite: bool = True) -> str:
         try:
+            root = Path(self.project_path) if self.project_path else settings.project_path
+
             # Resolve path relative to PROJECT_PATH
             # Remove leading slashes/backslashes to ensure it's treated as relative
             clean_path = file_path.lstrip("/\\")
-            full_path = (settings.project_path / clean_path).resolve()
+            full_path = (root / clean_path).resolve()
 
             # Security check: ensure we are still inside PROJECT_PATH
-            if not str(full_path).startswith(str(settings.project_path.resolve())):
+            if not str(full_path).startswith(str(root.resolve())):
                 return f"Error: Attempted to write outside project path: {full_path}"
 
             if full_path.exists() and not overwrite:
@@ -38,7 +43,40 @@ class ProjectFileWriterTool(BaseTool):
 
             # Write content
             full_path.write_text(content, encoding="utf-8")
+            file_cache.invalidate(full_path)
             return f"Successfully wrote to {full_path}"
 
         except Exception as e:
             return f"Error writing file: {str(e)}"
+
+
+class WorkspaceFileWriterTool(FileWriterTool):
+    """
+    Drop-in FileWriterTool (same name and arguments) pinned to one workspace:
+    writes aimed at the main checkout are redirected into the workspace, anything outside is rejected.
+    Written files are dropped from the project file reader's cache.
+    """
+    project_path: str
+
+    def _run(self, **kwargs: Any) -> str:
+        root = Path(self.project_path).resolve()
+        main = settings.project_path.resolve()
+        # A relative directory is relative to the workspace (not the process cwd); absolute ones are kept
+        target = (root / (kwargs.get("directory") or "") / kwargs.get("filename", "")).resolve()
+
+        for base in (root, main):
+            try:
+                rel = target.relative_to(base)
+                break
+            except ValueError:
+                continue
+        else:
+            return f"Error: Attempted to write outside project path: {target}"
+
+        # FileWriterTool only creates `directory`, so pass the file's own parent
+        kwargs["directory"] = str((root / rel).parent)
+        kwargs["filename"] = rel.name
+        try:
+            return super()._run(**kwargs)
+        finally:
+            file_cache.invalidate(root / rel)
@@ -0,0 +1,190 @@
+import hashlib
+import logging
+import os
+import subprocess
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def git_blob_sha(data: bytes) -> str:
+    """The id git gives these bytes as a blob (`git hash-object`), also used for files outside git."""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def decode_text(data: bytes) -> str:
+    """File bytes -> the text that is chunked and indexed (UTF-8, LF line ends)."""
+    return data.decode("utf-8", errors="ignore").replace("\r\n", "\n")
+
+
+def _git(root: Path, *args: str, input: Optional[bytes] = None) -> bytes:
+    return subprocess.run(
+        ["git", "-C", str(root), "--no-optional-locks", *args],
+        check=True, capture_output=True, input=input,
+    ).stdout
+
+
+def _filtered_paths(root: Path, paths: List[str]) -> Set[str]:
+    """Paths with a `filter` attribute (LFS, git-crypt, ...): their blobs are not what is checked out."""
+    if not paths:
+        return set()
+    stdin = "\0".join(paths).encode("utf-8", "surrogateescape")
+    out = _git(root, "check-attr", "-z", "--stdin", "filter", input=stdin)
+    fields = out.decode("utf-8", "surrogateescape").split("\0")
+    # <path> NUL filter NUL <value> NUL per path
+    return {path for path, value in zip(fields[0::3], fields[2::3]) if value not in ("unspecified", "unset")}
+
+
+def _status_paths(status: bytes, prefix: str) -> Set[str]:
+    """Paths of `git status --porcelain -z` below `prefix`, relative to it (deleted files included)."""
+    # Porcelain paths are relative to the repository root; renames/copies carry the source as an extra entry
+    paths: Set[str] = set()
+    entries = iter(status.decode("utf-8", "surrogateescape").split("\0"))
+    for entry in entries:
+        if len(entry) < 4:
+            continue
+        xy, path = entry[:2], entry[3:]
+        if "R" in xy or "C" in xy:
+            next(entries, None)
+        if path.startswith(prefix):
+            paths.add(path[len(prefix):])
+    return paths
+
+
+def changed_files(root: Path) -> List[str]:
+    """Modified, added and untracked files under `root` (relative to it, existing ones only); [] outside git."""
+    try:
+        prefix = _git(root, "rev-parse", "--show-prefix").decode().strip()
+        status = _git(root, "status", "--porcelain", "-z", "--untracked-files=all", "--", ".")
+    except Exception:
+        return []
+    return sorted(rel for rel in _status_paths(status, prefix) if (Path(root) / rel).is_file())
+
+
+class BlobReader:
+    """One `git cat-file --batch` process: blobs by SHA straight from the object store."""
+
+    def __init__(self, root: Path):
+        self._proc = subprocess.Popen(
+            ["git", "-C", str(root), "cat-file", "--batch"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        )
+        self._lock = threading.Lock()
+
+    def read(self, sha: str) -> Optional[bytes]:
+        with self._lock:
+            try:
+                self._proc.stdin.write(sha.encode() + b"\n")
+                self._proc.stdin.flush()
+            except OSError:
+                return None  # not a repository (git exited)
+            header = self._proc.stdout.readline().split()
+            if len(header) != 3 or header[1] != b"blob":
+                return None  # "<sha> missing"
+            data = self._proc.stdout.read(int(header[2]))
+            self._proc.stdout.read(1)  # trailing LF
+            return data
+
+    def close(self) -> None:
+        try:
+            self._proc.stdin.close()
+            self._proc.wait(timeout=5)
+        except Exception:
+            self._proc.kill()
+
+
+class FileVersions:
+    """
+    Content version (git blob SHA) of the files under `root`, independent of mtimes:
+    a checkout, stash or rebase that leaves a file's content alone leaves its version alone.
+
+    In a git work tree, `git ls-files -s` gives the SHA of every tracked file in one call and
+    `git status` names the files whose work tree content differs from it; only those (and untracked
+    files) are read and hashed. Files with a `filter` attribute (LFS, git-crypt) keep the index SHA
+    as their version, but their text is read from the work tree: the stored blob is the cleaned form.
+    Outside git every file is hashed, with a (path, mtime_ns, size) cache so unchanged files are not
+    re-read on every run.
+    """
+
+    def __init__(self, root: Path, stat_cache: Optional[Dict[str, Tuple[str, str]]] = None):
+        self.root = Path(root)
+        self.stat_cache = stat_cache if stat_cache is not None else {}  # rel -> (stat key, sha)
+        self.updated: Dict[str, Tuple[str, str]] = {}  # new stat_cache entries (to persist)
+        self._clean: Dict[str, str] = {}
+        self._dirty: Set[str] = set()
+        self._filtered: Set[str] = set()
+        self._git = self._load_git()
+        self._reader: Optional[BlobReader] = None
+        self._last: Tuple[str, bytes] = ("", b"")
+
+    @property
+    def is_git(self) -> bool:
+        return self._git
+
+    def _load_git(self) -> bool:
+        try:
+            prefix = _git(self.root, "rev-parse", "--show-prefix").decode().strip()
+        except Exception:
+            return False  # not a git work tree (or no git)
+        try:
+            staged = _git(self.root, "ls-files", "-s", "-z")
+            status = _git(self.root, "status", "--porcelain", "-z", "--untracked-files=all", "--", ".")
+        except Exception as e:
+            logger.warning("git not usable in %s, hashing files instead: %s", self.root, e)
+            return False
+
+        for entry in staged.decode("utf-8", "surrogateescape").split("\0"):
+            if not entry:
+                continue
+            meta, rel = entry.split("\t", 1)
+            mode, sha, stage = meta.split()
+            if stage == "0" and mode != "160000":  # no conflicts, no submodules
+                self._clean[rel] = sha
+
+        self._dirty = _status_paths(status, prefix)
+        try:
+            self._filtered = _filtered_paths(self.root, list(self._clean))
+        except Exception as e:
+            logger.warning("git check-attr failed in %s, reading files from the work tree: %s", self.root, e)
+            self._filtered = set(self._clean)
+        return True
+
+    def sha(self, rel: str, path: Path, st: Optional[os.stat_result] = None) -> str:
+        """Blob SHA of the work tree content of `path`."""
+        if rel in self._clean and rel not in self._dirty:
+            return self._clean[rel]
+        st = st or path.stat()
+        key = f"{st.st_mtime_ns}:{st.st_size}"
+        cached = self.stat_cache.get(rel)
+        if cached and cached[0] == key:
+            return cached[1]
+        data = path.read_bytes()
+        sha = git_blob_sha(data)
+        self.stat_cache[rel] = self.updated[rel] = (key, sha)
+        self._last = (rel, data)  # read() right after sha() does not read the file again
+        return sha
+
+    def read(self, rel: str, path: Path) -> str:
+        """Text of a file whose version was just taken: from the object store for clean tracked, unfiltered files."""
+        data = self._last[1] if self._last[0] == rel else None
+        if data is None and rel in self._clean and rel not in self._dirty and rel not in self._filtered:
+            if self._reader is None:
+                self._reader = BlobReader(self.root)
+            data = self._reader.read(self._clean[rel])
+        if data is None:
+            data = path.read_bytes()
+        return decode_text(data)
+
+    def close(self) -> None:
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+        self._last = ("", b"")
+
+    def __enter__(self) -> "FileVersions":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
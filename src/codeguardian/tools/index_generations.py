@@ -0,0 +1,184 @@
+import json
+import os
+import re
+import shutil
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from codeguardian.tools.index_lock import IndexLock, IndexLockTimeout
+from codeguardian.workspace import clone_file
+
+# Files/directories a pre-generation index left directly in CHROMA_DIR
+_LEGACY_FILES = ("chroma.sqlite3", "chunks.sqlite", "symbols.sqlite", "index.meta.json")
+_LEGACY_SEGMENT = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$")
+
+
+def _pending_writes(db_path: Path) -> bool:
+    """A non-empty WAL or a rollback journal next to the database: its file alone is not a consistent copy."""
+    wal = db_path.with_name(db_path.name + "-wal")
+    return (wal.exists() and wal.stat().st_size > 0) or db_path.with_name(db_path.name + "-journal").exists()
+
+
+class IndexGenerations:
+    """
+    Full rebuilds of the RAG index go into a new generation directory under CHROMA_DIR:
+
+        CHROMA_DIR/
+          CURRENT                         <- name of the live generation (replaced atomically)
+          gen-20250101-120000.000-4711/   <- Chroma store + chunks.sqlite + symbols.sqlite + index.meta.json
+          gen-20250102-093000.250-4712/
+
+    Readers resolve CURRENT once and keep using that directory; a rebuild only becomes visible when it is
+    complete and published. `keep` older generations stay on disk for rollback (and for readers still using them).
+    Without CURRENT (indexes built before generations existed), CHROMA_DIR itself is the live generation.
+    """
+
+    POINTER = "CURRENT"
+    PREFIX = "gen-"
+
+    def __init__(self, root: Path, keep: int = 2):
+        self.root = Path(root)
+        self.keep = max(0, keep)
+
+    # ---- reads
+    def current(self) -> Optional[str]:
+        try:
+            name = (self.root / self.POINTER).read_text(encoding="utf-8").strip()
+        except OSError:
+            return None
+        return name if name and (self.root / name).is_dir() else None
+
+    def current_dir(self) -> Path:
+        name = self.current()
+        return self.root / name if name else self.root
+
+    def names(self) -> List[str]:
+        """All generation directories, oldest first (names sort by creation time)."""
+        if not self.root.is_dir():
+            return []
+        return sorted(p.name for p in self.root.iterdir() if p.is_dir() and p.name.startswith(self.PREFIX))
+
+    def pending(self) -> List[str]:
+        """Generations newer than the live one: builds in progress or interrupted (resumable), oldest first."""
+        current = self.current()
+        return [n for n in self.names() if current is None or n > current]
+
+    def info(self, name: str) -> dict:
+        """What create() recorded about a generation (e.g. its embedding model)."""
+        try:
+            return json.loads((self.root / name / "generation.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    # ---- writes
+    def create(self, **info) -> Tuple[str, Path]:
+        """A fresh, empty generation directory. Not visible to readers until publish()."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        while True:
+            now = time.time()
+            name = f"{self.PREFIX}{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}.{int(now * 1000) % 1000:03d}-{os.getpid()}"
+            try:
+                (self.root / name).mkdir()
+                break
+            except FileExistsError:
+                time.sleep(0.001)
+        (self.root / name / "generation.json").write_text(json.dumps(info, sort_keys=True), encoding="utf-8")
+        return name, self.root / name
+
+    def clone_store(self, source: Path, dest: Path) -> Dict[str, int]:
+        """
+        Copies the index store of `source` (a generation or the pre-generation CHROMA_DIR) into `dest`, the start
+        of an incremental update. Files are reflinked where the filesystem supports it (copy-on-write, no data
+        copied), else copied. A SQLite file with pending WAL / journal content goes through the backup API instead
+        (consistent even if a reader has it open). Returns the bytes per method: reflink, copy, sqlite backup.
+        """
+        source, dest = Path(source), Path(dest)
+        legacy = source == self.root
+        cost = {"reflink": 0, "copy": 0, "sqlite backup": 0}
+
+        def clone(src: str, dst: str) -> None:
+            cost[clone_file(src, dst)] += os.path.getsize(dst)
+
+        for p in source.iterdir():
+            if legacy and not (p.name in _LEGACY_FILES or (p.is_dir() and _LEGACY_SEGMENT.match(p.name))):
+                continue
+            if p.name in ("index.lock", "generation.json") or p.name.endswith((".tmp", "-wal", "-shm", "-journal")):
+                continue
+            if p.is_dir():
+                shutil.copytree(p, dest / p.name, copy_function=clone)
+            elif p.suffix in (".sqlite", ".sqlite3") and _pending_writes(p):
+                src_db, dst_db = sqlite3.connect(str(p)), sqlite3.connect(str(dest / p.name))
+                try:
+                    src_db.backup(dst_db)
+                finally:
+                    src_db.close()
+                    dst_db.close()
+                cost["sqlite backup"] += (dest / p.name).stat().st_size
+            else:
+                clone(str(p), str(dest / p.name))
+        return cost
+
+    def publish(self, name: str) -> None:
+        """Makes `name` the live generation (atomic pointer swap), then prunes old generations."""
+        if not (self.root / name).is_dir():
+            raise FileNotFoundError(f"Index generation not found: {name}")
+        self._set_pointer(name)
+        self.prune()
+
+    def discard(self, name: str) -> None:
+        """Drops a generation that failed to build."""
+        if name != self.current():
+            shutil.rmtree(self.root / name, ignore_errors=True)
+
+    def rollback(self) -> Optional[str]:
+        """Switches back to the newest generation older than the live one. Returns its name (None = nothing older)."""
+        current = self.current()
+        older = [n for n in self.names() if current is None or n < current]
+        if not older:
+            return None
+        self._set_pointer(older[-1])
+        return older[-1]
+
+    def prune(self) -> List[str]:
+        """
+        Deletes generations older than the live one beyond the `keep` newest. Newer ones are left alone:
+        they are builds in progress (or the target of a rollback). Returns the deleted names.
+        """
+        current = self.current()
+        if current is None:
+            return []
+        older = [n for n in self.names() if n < current]
+        # The pre-generation index in CHROMA_DIR counts as the oldest generation
+        legacy = (self.root / "chroma.sqlite3").exists()
+        excess = len(older) + legacy - self.keep
+        if legacy and excess > 0:
+            self._remove_legacy_store()
+            excess -= 1
+        doomed = []
+        for name in older[: max(0, excess)]:
+            # Skipped while a search runs on it (retried on the next prune)
+            try:
+                with IndexLock(self.root / name / "index.lock").exclusive(timeout_s=0):
+                    pass
+            except IndexLockTimeout:
+                continue
+            shutil.rmtree(self.root / name, ignore_errors=True)
+            doomed.append(name)
+        return doomed
+
+    def _set_pointer(self, name: str) -> None:
+        tmp = self.root / f"{self.POINTER}.{os.getpid()}.tmp"
+        tmp.write_text(name, encoding="utf-8")
+        os.replace(tmp, self.root / self.POINTER)
+
+    def _remove_legacy_store(self) -> None:
+        for name in _LEGACY_FILES:
+            try:
+                (self.root / name).unlink()
+            except OSError:
+                pass
+        for p in self.root.iterdir():
+            if p.is_dir() and _LEGACY_SEGMENT.match(p.name):
+                shutil.rmtree(p, ignore_errors=True)
@@ -0,0 +1,69 @@
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Iterator, Optional
+
+import portalocker
+
+
+class IndexLockTimeout(TimeoutError):
+    """The index lock is held by another process for longer than INDEX_LOCK_TIMEOUT_S."""
+
+
+class IndexLock:
+    """
+    Cross-process reader/writer lock on a lock file (flock / LockFileEx via portalocker).
+    Any number of shared holders, or one exclusive holder. Policy: wait up to `timeout_s`, then raise
+    IndexLockTimeout (timeout_s=0: fail immediately). Locks are per acquisition, not re-entrant.
+
+    Two locks guard the RAG index:
+      CHROMA_DIR/index.write.lock   - exclusive: one process indexes / maintains the index at a time
+      <generation>/index.lock       - shared per search, exclusive while the store is rewritten (compaction, pruning)
+    """
+
+    def __init__(self, path: Path, timeout_s: float = 300, poll_s: float = 0.1):
+        self.path = Path(path)
+        self.timeout_s = timeout_s
+        self.poll_s = poll_s
+
+    @contextmanager
+    def shared(self, timeout_s: Optional[float] = None) -> Iterator[None]:
+        fh = self._acquire(portalocker.LOCK_SH, timeout_s)
+        try:
+            yield
+        finally:
+            self._release(fh)
+
+    @contextmanager
+    def exclusive(self, timeout_s: Optional[float] = None) -> Iterator[None]:
+        fh = self._acquire(portalocker.LOCK_EX, timeout_s)
+        try:
+            yield
+        finally:
+            self._release(fh)
+
+    def _acquire(self, mode: int, timeout_s: Optional[float]) -> IO:
+        timeout_s = self.timeout_s if timeout_s is None else timeout_s
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fh = open(self.path, "a+")
+        deadline = time.monotonic() + max(0.0, timeout_s)
+        while True:
+            try:
+                portalocker.lock(fh, mode | portalocker.LOCK_NB)
+                return fh
+            except portalocker.exceptions.LockException:
+                if time.monotonic() >= deadline:
+                    fh.close()
+                    kind = "a shared" if mode == portalocker.LOCK_SH else "an exclusive"
+                    raise IndexLockTimeout(
+                        f"Could not get {kind} lock on {self.path} within {timeout_s:g}s "
+                        "(another process is indexing or maintaining the index). See INDEX_LOCK_TIMEOUT_S."
+                    )
+                time.sleep(self.poll_s)
+
+    @staticmethod
+    def _release(fh: IO) -> None:
+        try:
+            portalocker.unlock(fh)
+        finally:
+            fh.close()
@@ -0,0 +1,123 @@
+import logging
+import shutil
+import sqlite3
+import subprocess
+from pathlib import Path
+from typing import Dict, List
+
+from codeguardian.config.settings import settings
+from codeguardian.tools.local_rag_tool import LocalDirectoryRagTool
+from codeguardian.tools.tools import (
+    directory_search_tool,
+    index_settings_snapshot,
+    index_write_lock,
+    orphaned_files,
+    read_meta,
+    update_generation,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _dir_bytes(path: Path) -> int:
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file()) if path.exists() else 0
+
+
+def compact_chroma(persist_dir: Path, timeout_s: int = 600) -> str:
+    """
+    Reclaims the space of deleted chunks. `chroma vacuum` also purges the write-ahead log, which
+    a plain SQLite VACUUM cannot do; the latter is the fallback when the CLI is not available.
+    """
+    cli = shutil.which("chroma")
+    if cli:
+        try:
+            subprocess.run(
+                [cli, "vacuum", "--path", str(persist_dir), "--force"],
+                check=True, capture_output=True, text=True, timeout=timeout_s,
+            )
+            return "chroma vacuum"
+        except Exception as e:
+            logger.warning("chroma vacuum failed, falling back to SQLite VACUUM: %s", e)
+
+    db_path = persist_dir / "chroma.sqlite3"
+    if not db_path.exists():
+        return "skipped (no chroma.sqlite3)"
+    db = sqlite3.connect(str(db_path), timeout=timeout_s)
+    try:
+        db.execute("VACUUM")
+    finally:
+        db.close()
+    return "sqlite VACUUM"
+
+
+def maintain_index(
+        gc: bool = True,
+        verify: bool = True,
+        compact: bool = True,
+        dry_run: bool = False,
+) -> Dict:
+    """
+    Housekeeping for the RAG index, without re-embedding anything that is still valid:
+      gc      - drop chunks of files that were deleted, renamed or are no longer selected by the globs
+      verify  - chunk references vs. stored chunks vs. symbol index, SQLite integrity, index meta
+      compact - reclaim the disk space of deleted chunks (Chroma store and the SQLite side stores)
+    dry_run reports what would change. Holds the index write lock (like indexing) for the whole run.
+    The changes are made in a copy of the live generation that is then published (update_generation):
+    searches never wait for them and never see a half-cleaned index.
+    """
+    with index_write_lock().exclusive():
+        return _maintain_index(gc, verify, compact, dry_run)
+
+
+def _maintain_index(gc: bool, verify: bool, compact: bool, dry_run: bool) -> Dict:
+    live = directory_search_tool()
+    report: Dict = {"size_before": _dir_bytes(live.persist_directory), "stats_before": live.index_stats()}
+    orphans: List[str] = []
+    problems: Dict[str, List[str]] = {}
+
+    if gc:
+        orphans = orphaned_files(live)
+        report["orphaned_files"] = orphans
+
+    if verify:
+        problems = live.check_consistency()
+        meta = read_meta()
+        problems["meta"] = []
+        if meta is None:
+            problems["meta"].append("index meta missing or unreadable (next run rebuilds the index)")
+        elif (meta.get("settings") or {}) != index_settings_snapshot():
+            problems["meta"].append("index meta does not match the current settings (next run updates the index)")
+        report["problems"] = {k: v for k, v in problems.items() if v}
+
+    needs_repair = any(problems.get(k) for k in ("stray_chunks", "files_missing_chunks", "stale_symbol_files"))
+    if dry_run or not (orphans or needs_repair or compact):
+        report["deleted_chunks"] = 0
+        return report
+    model = ((read_meta() or {}).get("settings") or {}).get("embed_model")
+    if model and model != settings.embed_model:
+        # Publishing a copy now would supersede the generation the migration is building
+        report["skipped"] = f"embedding model migration to {settings.embed_model} in progress"
+        report["deleted_chunks"] = 0
+        return report
+
+    deleted = 0
+
+    def clean(tool: LocalDirectoryRagTool) -> None:
+        nonlocal deleted
+        if orphans:
+            report["gc"] = tool.remove_paths(orphans)
+            deleted += report["gc"]["chunks"]
+        if needs_repair:
+            report["repaired"] = tool.repair(problems)
+            deleted += report["repaired"]["stray_chunks_deleted"]
+        if compact:
+            # The copy is not live yet: nobody searches it while it is rewritten
+            report["compaction"] = compact_chroma(tool.persist_directory)
+            tool.vacuum_side_stores()
+
+    update_generation((read_meta() or {}).get("git_head"), clean, keep_meta=True)
+    live = directory_search_tool()
+    report["deleted_chunks"] = deleted
+    report["stats_after"] = live.index_stats()
+    report["size_after"] = _dir_bytes(live.persist_directory)
+    return report
@@ -1,18 +1,43 @@
 import os
+import re
 import time
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Iterable, List, Dict, Optional
+from typing import Iterable, List, Dict, Optional, Tuple
 from fnmatch import fnmatch
 
-import requests
 import chromadb
 from pydantic import BaseModel, Field, PrivateAttr
 from crewai.tools import BaseTool
 
+from codeguardian.tools.embeddings import OllamaEmbedder
+from codeguardian.tools.request_scheduler import Priority, RequestScheduler, request_priority
+from codeguardian.tools.rerank import CrossEncoderReranker, Hit, collapse_hits, mmr, snippet
+from codeguardian.tools.search_filters import Profiles, SearchScope, UnknownProfile, path_metadata
+from codeguardian.tools.chunk_store import ChunkRefs, chunk_id
+from codeguardian.tools.symbol_index import SymbolIndex
+from codeguardian.tools.repo_map import RepoMap
+from codeguardian.tools.index_lock import IndexLock
+from codeguardian.tools.chunking import ChunkingConfig, ChunkProfile, byte_ranges
+from codeguardian.tools.chunk_text import ChunkTexts
+from codeguardian.tools.git_blobs import FileVersions
+
+
+def collection_name_for(base: str, embed_model: str) -> str:
+    """Chroma collection of one embedding model, e.g. codeguardian-nomic-embed-text-latest."""
+    slug = re.sub(r"[^A-Za-z0-9_-]+", "-", embed_model).strip("-_")
+    return f"{base}-{slug}"[:128].rstrip("-_")
+
 
 class LocalRagSearchArgs(BaseModel):
     query: str = Field(..., description="Search query")
     k: int = Field(5, ge=1, le=20, description="Top-K results to return")
+    path_globs: Optional[List[str]] = Field(None, description="Only files matching these repo-relative globs, e.g. ['src/main/java/**']")
+    exclude_globs: Optional[List[str]] = Field(None, description="Skip files matching these globs, e.g. ['src/test/**']")
+    extensions: Optional[List[str]] = Field(None, description="Only these file extensions, e.g. ['.java', '.yml']")
+    profile: Optional[str] = Field(None, description="'backend' or 'frontend': only files of that part of the repository")
+    include_tests: bool = Field(True, description="False = skip test code (src/test/**, *Test.java, *.spec.ts, ...)")
 
 
 class LocalDirectoryRagTool(BaseTool):
@@ -22,6 +47,11 @@ class LocalDirectoryRagTool(BaseTool):
       - Embeddings: Ollama (nomic-embed-text)
       - Vector DB: Chroma persistent store
       - Indexing: ONLY via index_paths(globs=...) (incremental + chunking)
+      - Symbol index (FQN -> path + line span) maintained alongside, without embeddings
+      - Content-addressed chunks: identical text is embedded/stored once and referenced by every path using it
+      - Chunk storage "text" (text in Chroma) or "ref" (byte ranges only, text read from the work tree / git when searching)
+      - Filters (globs, extensions, profile, tests) pushed into the Chroma query via per-chunk metadata
+      - Post-retrieval: over-fetch -> collapse overlapping chunks per file -> (optional CPU reranker) -> MMR
     """
 
     name: str = "local_directory_rag_search"
@@ -39,16 +69,38 @@ class LocalDirectoryRagTool(BaseTool):
     _ollama_base: str = PrivateAttr()
     _embed_model: str = PrivateAttr()
     _timeout_s: int = PrivateAttr()
+    _embedder: OllamaEmbedder = PrivateAttr()
 
     _max_file_bytes: int = PrivateAttr()
-    _chunk_chars: int = PrivateAttr()
-    _chunk_overlap: int = PrivateAttr()
+    _chunking: ChunkingConfig = PrivateAttr()
+    _store_text: bool = PrivateAttr()
+    _chunk_texts: ChunkTexts = PrivateAttr()
+
+    _overfetch: int = PrivateAttr()
+    _mmr_lambda: float = PrivateAttr()
+    _max_per_path: int = PrivateAttr()
+    _snippet_chars: int = PrivateAttr()
+    _reranker: Optional[CrossEncoderReranker] = PrivateAttr()
+
+    _profiles: Profiles = PrivateAttr()
 
     _exts: set[str] = PrivateAttr()
     _exclude_dirs: set[str] = PrivateAttr()
 
     _client = PrivateAttr()
     _collection = PrivateAttr()
+    _symbols: SymbolIndex = PrivateAttr()
+    _repo_map: RepoMap = PrivateAttr()
+    _refs: ChunkRefs = PrivateAttr()
+    # Shared per search, exclusive while the store is rewritten (compaction); writers are serialized by the caller
+    _index_lock: IndexLock = PrivateAttr()
+    # Collections of the same embedding model to copy vectors from (content-addressed ids)
+    _vector_sources: List = PrivateAttr()
+
+    # Query embeddings are reused across runs sharing this tool (e.g. batch mode)
+    _query_cache: OrderedDict = PrivateAttr()
+    _query_cache_size: int = PrivateAttr()
+    _query_cache_lock = PrivateAttr()
 
     def __init__(
             self,
@@ -63,21 +115,46 @@ class LocalDirectoryRagTool(BaseTool):
             exts: Optional[set[str]] = None,
             exclude_dirs: Optional[set[str]] = None,
             request_timeout_s: int = 120,
+            query_cache_size: int = 512,
+            overfetch: int = 4,
+            mmr_lambda: float = 0.5,
+            max_per_path: int = 2,
+            snippet_chars: int = 2000,
+            rerank_model: Optional[str] = None,
+            profiles: Optional[Dict[str, Tuple[List[str], List[str]]]] = None,
+            lock_timeout_s: float = 300,
+            chunking: Optional[ChunkingConfig] = None,
+            embedder: Optional[OllamaEmbedder] = None,
+            request_scheduler: Optional[RequestScheduler] = None,
+            chunk_storage: str = "text",
             **kwargs,
     ):
         super().__init__(**kwargs)
 
         self._directory = Path(directory)
         self._persist_directory = str(Path(persist_directory).resolve())
-        self._collection_name = collection_name
+        self._embed_model = embed_model or os.getenv("EMBED_MODEL", "nomic-embed-text:latest")
+        # One collection per embedding model: vectors of different models / dimensions never mix
+        self._collection_name = collection_name_for(collection_name, self._embed_model)
 
         self._ollama_base = ollama_base_url or os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
-        self._embed_model = embed_model or os.getenv("EMBED_MODEL", "nomic-embed-text:latest")
         self._timeout_s = request_timeout_s
+        self._embedder = embedder or OllamaEmbedder(self._ollama_base, self._embed_model, request_timeout_s, scheduler=request_scheduler)
 
         self._max_file_bytes = max_file_bytes
-        self._chunk_chars = chunk_chars
-        self._chunk_overlap = chunk_overlap
+        # chunk_chars / chunk_overlap: the default profile when no chunking config is given
+        self._chunking = chunking or ChunkingConfig(default=ChunkProfile(chunk_chars=chunk_chars, overlap=chunk_overlap))
+        if chunk_storage not in ("text", "ref"):
+            raise ValueError(f"chunk_storage must be 'text' or 'ref', not {chunk_storage!r}")
+        self._store_text = chunk_storage == "text"
+
+        self._overfetch = max(1, overfetch)
+        self._mmr_lambda = mmr_lambda
+        self._max_per_path = max(1, max_per_path)
+        self._snippet_chars = snippet_chars
+        self._reranker = CrossEncoderReranker(rerank_model, max_chars=snippet_chars) if rerank_model else None
+
+        self._profiles = profiles or {}
 
         self._exts = exts or {
             ".java", ".xml", ".properties", ".yml", ".yaml", ".sql", ".md",
@@ -89,18 +166,64 @@ class LocalDirectoryRagTool(BaseTool):
             "__pycache__", ".pytest_cache"
         }
 
+        self._query_cache = OrderedDict()
+        self._query_cache_size = query_cache_size
+        self._query_cache_lock = threading.Lock()
+
         # Initialize ChromaDB with error recovery
         try:
             self._client = chromadb.PersistentClient(path=self._persist_directory)
-            self._collection = self._client.get_or_create_collection(self._collection_name)
+            self._collection = self._open_collection(collection_name)
         except Exception as e:
-            # If ChromaDB fails (e.g., corrupted index), delete and recreate
-            import shutil
-            print(f"Warning: ChromaDB error, resetting index: {e}")
+            # If ChromaDB fails (e.g., corrupted index), move it aside (kept for inspection) and recreate
+            backup = f"{self._persist_directory}.corrupt-{time.strftime('%Y%m%d-%H%M%S')}"
+            print(f"Warning: ChromaDB error, resetting index (old store moved to {backup}): {e}")
             if Path(self._persist_directory).exists():
-                shutil.rmtree(self._persist_directory)
+                os.replace(self._persist_directory, backup)
             self._client = chromadb.PersistentClient(path=self._persist_directory)
-            self._collection = self._client.get_or_create_collection(self._collection_name)
+            self._collection = self._open_collection(collection_name)
+        self._vector_sources = []
+
+        self._symbols = SymbolIndex(Path(self._persist_directory) / "symbols.sqlite")
+        self._repo_map = RepoMap(self._symbols)
+        self._refs = ChunkRefs(Path(self._persist_directory) / "chunks.sqlite")
+        self._index_lock = IndexLock(Path(self._persist_directory) / "index.lock", lock_timeout_s)
+        self._chunk_texts = ChunkTexts(self._directory, self._refs)
+
+    def _open_collection(self, legacy_name: str):
+        existing = {getattr(c, "name", c) for c in self._client.list_collections()}
+        if self._collection_name not in existing and legacy_name in existing:
+            # Index from before per-model collections: it was built with the model it is opened with
+            self._collection_name = legacy_name
+        return self._client.get_or_create_collection(self._collection_name, metadata={"embed_model": self._embed_model})
+
+    @property
+    def symbols(self) -> SymbolIndex:
+        return self._symbols
+
+    @property
+    def repo_map(self) -> RepoMap:
+        return self._repo_map
+
+    @property
+    def embed_model(self) -> str:
+        return self._embed_model
+
+    @property
+    def embed_dim(self) -> Optional[int]:
+        dim = (self._collection.metadata or {}).get("dim")
+        return int(dim) if dim else None
+
+    def reuse_vectors_from(self, other: "LocalDirectoryRagTool") -> bool:
+        """Chunks already embedded by `other` (same model, e.g. the previous index generation) are copied, not re-embedded."""
+        if other is self or other.embed_model != self._embed_model:
+            return False
+        self._vector_sources.append(other._collection)
+        return True
+
+    @property
+    def index_lock(self) -> IndexLock:
+        return self._index_lock
 
     def reset(self) -> None:
         """Wipes the collection to start fresh (e.g. when switching projects)."""
@@ -108,28 +231,151 @@ class LocalDirectoryRagTool(BaseTool):
             self._client.delete_collection(self._collection_name)
         except Exception:
             pass
-        self._collection = self._client.get_or_create_collection(self._collection_name)
+        self._collection = self._client.get_or_create_collection(self._collection_name, metadata={"embed_model": self._embed_model})
+        self._symbols.clear()
+        self._refs.clear()
 
     # -------------------------
     # CrewAI entrypoint
     # -------------------------
-    def _run(self, query: str, k: int = 5) -> str:
-        q_emb = self._embed_one(query)
-        res = self._collection.query(query_embeddings=[q_emb], n_results=int(k))
-
-        docs = (res.get("documents") or [[]])[0]
-        metas = (res.get("metadatas") or [[]])[0]
-
-        if not docs:
+    def _run(
+            self,
+            query: str,
+            k: int = 5,
+            path_globs: Optional[List[str]] = None,
+            exclude_globs: Optional[List[str]] = None,
+            extensions: Optional[List[str]] = None,
+            profile: Optional[str] = None,
+            include_tests: bool = True,
+    ) -> str:
+        scope = SearchScope(
+            path_globs=path_globs,
+            exclude_globs=exclude_globs,
+            extensions=extensions,
+            profile=profile,
+            include_tests=include_tests,
+        )
+        try:
+            hits = self.search(query, k, scope)
+        except UnknownProfile as e:
+            return str(e)
+        if not hits:
             return "No results."
 
-        out = []
-        for i, doc in enumerate(docs):
-            meta = metas[i] if i < len(metas) else {}
-            path = meta.get("path", "unknown")
-            chunk = meta.get("chunk", "?")
-            out.append(f"### {i+1}) {path} (chunk {chunk})\n{doc[:1200]}\n")
-        return "\n".join(out)
+        return "\n".join(f"### {i+1}) {self.format_hit(hit)}\n" for i, hit in enumerate(hits))
+
+    def search(self, query: str, k: int = 5, scope: Optional[SearchScope] = None) -> List[Hit]:
+        """
+        Top-k DISTINCT results: fetches k * overfetch chunks (restricted by the scope's metadata filter),
+        keeps the chunks with at least one path inside the scope, merges adjacent/overlapping chunks of a file
+        into one hit, optionally reranks them, then picks k with MMR (at most max_per_path hits per file).
+        """
+        return self.search_many([query], k, scope)[0]
+
+    def search_many(self, queries: List[str], k: int = 5, scope: Optional[SearchScope] = None) -> List[List[Hit]]:
+        """search() for several queries at once: one embedding request, one Chroma query."""
+        scope = scope or SearchScope()
+        if scope.profile and scope.profile not in self._profiles:
+            # As a where-clause it would silently match no chunk
+            available = ", ".join(sorted(self._profiles)) or "none"
+            raise UnknownProfile(f"Unknown profile '{scope.profile}'. Available: {available}.")
+        if not queries:
+            return []
+        where = scope.where()
+        if where is not None:
+            # Shared chunks carry the metadata of ONE of their paths: let them through, their paths are checked below
+            where = {"$or": [where, {"shared": True}]}
+        q_embs = self._embed_queries(queries)
+        with self._index_lock.shared():
+            res = self._collection.query(
+                query_embeddings=q_embs,
+                n_results=int(k) * self._overfetch,
+                where=where,
+                include=["documents", "metadatas", "embeddings"],
+            )
+        all_docs = res.get("documents") or [[] for _ in queries]
+        all_metas = res.get("metadatas") or [[] for _ in queries]
+        all_embs = res.get("embeddings")
+        if all_embs is None:
+            all_embs = [[] for _ in queries]
+
+        results: List[List[Hit]] = []
+        for query, q_emb, docs, metas, embs in zip(queries, q_embs, all_docs, all_metas, all_embs):
+            docs, metas, embs = self._resolve_paths(docs, metas, embs, scope)
+            docs, metas, embs = self._resolve_texts(docs, metas, embs)
+            if not docs:
+                results.append([])
+                continue
+            hits = collapse_hits(q_emb, docs, metas, embs, self._chunking.max_overlap())
+            if self._reranker:
+                hits = self._reranker.rerank(query, hits)
+            results.append(mmr(hits, int(k), self._mmr_lambda, self._max_per_path))
+        return results
+
+    def _resolve_paths(self, docs: List[str], metas: List[Dict], embs, scope: SearchScope):
+        """
+        Every chunk -> the paths using it that are inside the scope (dropped if none).
+        The first one becomes the hit's path, the others are listed as "also in".
+        """
+        out_docs, out_metas, out_embs = [], [], []
+        for doc, meta, emb in zip(docs, metas, embs):
+            meta = dict(meta or {})
+            if meta.get("shared"):
+                uses = [(rel, c) for rel, c in self._refs.paths(meta.get("hash", "")) if scope.matches(rel, self._profiles)]
+                if not uses:
+                    continue
+                also = list(dict.fromkeys(rel for rel, _ in uses if rel != uses[0][0]))
+                meta.update(path=str(self._directory / uses[0][0]), chunk=uses[0][1], also=also)
+            elif not scope.matches(self._display_path(meta.get("path", "")), self._profiles):
+                continue
+            out_docs.append(doc)
+            out_metas.append(meta)
+            out_embs.append(emb)
+        return out_docs, out_metas, out_embs
+
+    def _resolve_texts(self, docs: List[Optional[str]], metas: List[Dict], embs):
+        """Chunks stored by reference (no document) -> their text, read from the work tree or git (dropped if not found)."""
+        if all(doc is not None for doc in docs):
+            return docs, metas, embs
+        files: Dict = {}
+        out_docs, out_metas, out_embs = [], [], []
+        for doc, meta, emb in zip(docs, metas, embs):
+            if doc is None:
+                doc, stale = self._chunk_texts.read(
+                    meta.get("hash", ""), self._display_path(meta.get("path", "")), int(meta.get("chunk", 0)), files
+                )
+                if doc is None:
+                    continue
+                meta = {**meta, "stale": stale}
+            out_docs.append(doc)
+            out_metas.append(meta)
+            out_embs.append(emb)
+        return out_docs, out_metas, out_embs
+
+    def display_path(self, path: str) -> str:
+        """Repo-relative form of a stored path."""
+        return self._display_path(path)
+
+    def format_hit(self, hit: Hit) -> str:
+        also = f"\nalso in: {', '.join(hit.also)}" if hit.also else ""
+        stale = ", changed since indexing" if hit.stale else ""
+        return f"{self._display_path(hit.path)} ({hit.chunk_label}, score {hit.score:.2f}{stale}){also}\n{snippet(hit, self._snippet_chars)}"
+
+    def search_paths(self, query: str, k: int = 5) -> List[str]:
+        """Repo-relative paths of the top-k hits (deduplicated, best first)."""
+        q_emb = self._embed_query(query)
+        with self._index_lock.shared():
+            res = self._collection.query(query_embeddings=[q_emb], n_results=int(k))
+        paths: List[str] = []
+        for meta in (res.get("metadatas") or [[]])[0]:
+            path = self._display_path((meta or {}).get("path", ""))
+            if path and path not in paths:
+                paths.append(path)
+        return paths
+
+    def iter_source_files(self, root: Optional[Path] = None) -> Iterable[Path]:
+        """Files the index would consider (extension / exclude_dirs / size filters), optionally under another root."""
+        return self._iter_files(root)
 
     # -------------------------
     # ONLY indexing API you want
@@ -147,139 +393,332 @@ class LocalDirectoryRagTool(BaseTool):
 
         added_files = 0
         added_chunks = 0
+        embedded_chunks = 0
         skipped_already = 0
         skipped_unreadable = 0
+        skipped_bulk = 0
+        sampled = 0
         t0 = time.time()
 
-        for p in self._iter_files_filtered(include_globs, exclude_globs):
-            try:
-                st = p.stat()
-            except OSError:
-                skipped_unreadable += 1
-                continue
+        with FileVersions(self._directory, self._refs.stat_cache()) as versions:
+            for p in self._iter_files_filtered(include_globs, exclude_globs):
+                try:
+                    st = p.stat()
+                    rel = self._display_path(str(p))
+                    # Content version, not mtime: checkouts / stashes / rebases leave unchanged files alone
+                    sha = versions.sha(rel, p, st)
+                except OSError:
+                    skipped_unreadable += 1
+                    continue
 
-            path = str(p)
-            mtime = int(st.st_mtime)
-            size = int(st.st_size)
+                profile = self._chunking.for_path(rel)
+                sig = f"{sha}:{profile.fingerprint()}"
+
+                if self._refs.file_sig(rel) == sig:
+                    skipped_already += 1
+                    if self._symbols.needs_update(rel, sig):
+                        # Index built before the symbol index existed: symbols only, no embeddings
+                        try:
+                            self._symbols.update_file(rel, sig, versions.read(rel, p))
+                        except Exception:
+                            pass
+                    continue
 
-            if self._already_indexed(p, mtime, size):
-                skipped_already += 1
-                continue
+                if profile.skips(st.st_size):
+                    # Bulk data file: remembered (not re-read every run), but nothing is embedded;
+                    # symbols of an earlier, smaller version are dropped
+                    embedded_chunks += self._store_file(rel, sig, [])
+                    self._symbols.update_file(rel, sig, "")
+                    skipped_bulk += 1
+                    continue
+
+                try:
+                    content = versions.read(rel, p)
+                except Exception:
+                    skipped_unreadable += 1
+                    continue
+
+                spans = profile.spans(content)
+                chunks = profile.select([content[start:end] for start, end in spans])
+                if len(chunks) < len(spans):
+                    sampled += 1
+                ranges = byte_ranges(content, [spans[pos] for pos, _ in chunks])
+                embedded_chunks += self._store_file(rel, sig, chunks, ranges)
+                self._symbols.update_file(rel, sig, content)
+
+                added_files += 1
+                added_chunks += len(chunks)
+
+                if added_files >= int(max_files_per_run):
+                    break
+            self._refs.save_stat_cache(versions.updated)
+
+        dt = time.time() - t0
+        return (
+            f"index_paths: indexed {added_files} files / {added_chunks} chunks in {dt:.1f}s "
+            f"(embedded={embedded_chunks}, deduplicated={added_chunks - embedded_chunks}, "
+            f"skipped already={skipped_already}, unreadable={skipped_unreadable}, bulk={skipped_bulk}, "
+            f"sampled={sampled}) "
+            f"persist={self._persist_directory}"
+        )
 
+    def _store_file(
+            self,
+            rel: str,
+            sig: str,
+            chunks: List[Tuple[int, str]],
+            ranges: Optional[List[Tuple[int, int]]] = None,
+    ) -> int:
+        """
+        Points `rel` at its (position, text) chunks by content hash, with their byte ranges in the file.
+        Only chunks whose text is not stored yet are embedded (with their text unless chunks are stored
+        by reference); chunks no file uses anymore are deleted. Returns the number of embedded chunks.
+        """
+        positions = [pos for pos, _ in chunks]
+        hashes = [chunk_id(ch) for _, ch in chunks]
+        old = set(self._refs.hashes_of(rel))
+
+        texts = dict(zip(hashes, (ch for _, ch in chunks)))
+        in_use = self._refs.referenced(texts)
+        candidates = [h for h in texts if h not in in_use]
+        if candidates:
+            # Unreferenced but still stored (e.g. reverted change) -> reuse the embedding too
+            stored = set(self._collection.get(ids=candidates, include=[]).get("ids") or [])
+            new = [h for h in candidates if h not in stored]
+        else:
+            new = []
+
+        if new:
+            first = {h: positions[hashes.index(h)] for h in new}
+            embs = self._vectors_for(new, texts)
+            self._collection.add(
+                ids=new,
+                documents=[texts[h] for h in new] if self._store_text else None,
+                embeddings=embs,
+                metadatas=[self._chunk_meta(h, [(rel, first[h])]) for h in new],
+            )
+
+        self._refs.set_file(rel, sig, hashes, positions, ranges)
+        gone = (old - set(hashes)) - self._refs.referenced(old - set(hashes))
+        if gone:
+            self._collection.delete(ids=list(gone))
+        self._sync_chunk_meta((old | set(hashes)) - gone - set(new))
+        return len(new)
+
+    def _vectors_for(self, hashes: List[str], texts: Dict[str, str]) -> List[List[float]]:
+        """Embeddings for new chunks: copied from a vector source where possible, else embedded."""
+        found: Dict[str, List[float]] = {}
+        for source in self._vector_sources:
+            missing = [h for h in hashes if h not in found]
+            if not missing:
+                break
             try:
-                content = p.read_text(encoding="utf-8", errors="ignore")
+                res = source.get(ids=missing, include=["embeddings"])
             except Exception:
-                skipped_unreadable += 1
                 continue
+            embs = res.get("embeddings")
+            for h, emb in zip(res.get("ids") or [], embs if embs is not None else []):
+                found[h] = [float(x) for x in emb]
+        missing = [h for h in hashes if h not in found]
+        if missing:
+            found.update(zip(missing, self._embedder.embed_many([texts[h] for h in missing])))
+        embs = [found[h] for h in hashes]
+
+        dim = len(embs[0])
+        known = self.embed_dim
+        if known is None:
+            self._collection.modify(metadata={**(self._collection.metadata or {}), "dim": dim})
+        elif known != dim:
+            raise ValueError(
+                f"Embedding dimension {dim} of {self._embed_model} does not match the collection "
+                f"{self._collection_name} ({known}). Changing the model needs a new index generation."
+            )
+        return embs
+
+    def _chunk_meta(self, hash_: str, uses: List[Tuple[str, int]]) -> Dict:
+        """Chroma metadata of a chunk: filter fields of its first path, `shared` if several paths use it."""
+        rel, chunk = uses[0]
+        return {
+            "path": str(self._directory / rel),
+            "chunk": chunk,
+            "hash": hash_,
+            "shared": len({path for path, _ in uses}) > 1,
+            **path_metadata(rel, self._profiles),
+        }
 
-            if not content.strip():
+    def _sync_chunk_meta(self, hashes) -> int:
+        """Updates the metadata of chunks whose set of paths changed. Returns the number of updated chunks."""
+        hashes = list(hashes)
+        if not hashes:
+            return 0
+        got = self._collection.get(ids=hashes, include=["metadatas"])
+        ids, metas = [], []
+        for h, meta in zip(got.get("ids") or [], got.get("metadatas") or []):
+            uses = self._refs.paths(h)
+            if not uses:
                 continue
+            fresh = self._chunk_meta(h, uses)
+            if any((meta or {}).get(key) != value for key, value in fresh.items()):
+                ids.append(h)
+                metas.append(fresh)
+        if ids:
+            self._collection.update(ids=ids, metadatas=metas)
+        return len(ids)
+
+    def refresh_metadata(self, batch_size: int = 1000) -> int:
+        """
+        Recomputes the metadata (paths, dir prefixes, ext, lang, is_test, profiles, shared) of every chunk.
+        No embeddings: used when the profiles change or for indexes built before the metadata existed.
+        Returns the number of updated chunks.
+        """
+        updated = 0
+        offset = 0
+        while True:
+            ids = self._collection.get(include=[], limit=batch_size, offset=offset).get("ids") or []
+            if not ids:
+                return updated
+            updated += self._sync_chunk_meta(ids)
+            offset += len(ids)
+
+    def index_stats(self) -> Dict[str, int]:
+        """Files, chunk references and unique (stored) chunks."""
+        return {**self._refs.stats(), "stored_chunks": self._collection.count()}
 
-            chunks = self._chunk_text(content)
-            if not chunks:
-                continue
+    # -------------------------
+    # Maintenance (see index_maintenance.py)
+    # -------------------------
+    @property
+    def persist_directory(self) -> Path:
+        return Path(self._persist_directory)
 
-            # Remove older chunks for this file (best effort)
-            try:
-                self._collection.delete(where={"path": path})
-            except Exception:
-                pass
+    @property
+    def directory(self) -> Path:
+        return self._directory
 
-            ids: List[str] = []
-            docs: List[str] = []
-            metas: List[Dict] = []
-            embs: List[List[float]] = []
+    def indexed_files(self) -> List[str]:
+        return self._refs.files()
 
-            for i, ch in enumerate(chunks):
-                doc_id = f"{path}::{i}::mtime={mtime}::size={size}"
-                ids.append(doc_id)
-                docs.append(ch)
-                metas.append({"path": path, "chunk": i, "mtime": mtime, "size": size})
+    def chunks_per_file(self) -> Dict[str, int]:
+        return self._refs.chunk_counts()
 
-            for d in docs:
-                embs.append(self._embed_one(d))
+    def is_indexable(self, p: Path) -> bool:
+        """Extension / exclude_dirs / size filters (the include globs are checked by the caller)."""
+        if not p.is_file():
+            return False
+        if any(part in self._exclude_dirs for part in p.parts):
+            return False
+        if p.suffix.lower() not in self._exts:
+            return False
+        try:
+            return p.stat().st_size <= self._max_file_bytes
+        except OSError:
+            return False
 
-            self._collection.add(ids=ids, documents=docs, embeddings=embs, metadatas=metas)
+    def remove_paths(self, rels: Iterable[str], batch_size: int = 500) -> Dict[str, int]:
+        """Drops files from the index in bulk: their references, symbols and every chunk nobody else uses."""
+        rels = list(rels)
+        dropped = set()
+        for rel in rels:
+            dropped.update(self._refs.hashes_of(rel))
+            self._refs.remove_file(rel)
+            self._symbols.remove_file(rel)
+        gone = list(dropped - self._refs.referenced(dropped))
+        for start in range(0, len(gone), batch_size):
+            self._collection.delete(ids=gone[start : start + batch_size])
+        # Survivors may have lost their primary path or their "shared" flag
+        self._sync_chunk_meta(dropped - set(gone))
+        return {"files": len(rels), "chunks": len(gone)}
+
+    def stored_ids(self, batch_size: int = 5000) -> Iterable[str]:
+        offset = 0
+        while True:
+            ids = self._collection.get(include=[], limit=batch_size, offset=offset).get("ids") or []
+            if not ids:
+                return
+            yield from ids
+            offset += len(ids)
+
+    def check_consistency(self) -> Dict[str, List[str]]:
+        """
+        Chunk references (chunks.sqlite) vs. the Chroma collection vs. the symbol index:
+          - stray_chunks:         stored, but no file references them (e.g. interrupted indexing)
+          - files_missing_chunks: reference chunks that are not stored (must be re-indexed)
+          - stale_symbol_files:   in the symbol index, but not in the chunk index
+          - sqlite_errors:        PRAGMA quick_check of the side stores
+        """
+        stored = set(self.stored_ids())
+        referenced = self._refs.all_hashes()
+        indexed = set(self._refs.files())
+        return {
+            "stray_chunks": sorted(stored - referenced),
+            "files_missing_chunks": self._refs.files_using(referenced - stored),
+            "stale_symbol_files": [f for f in self._symbols.files() if f not in indexed],
+            "sqlite_errors": self._refs.integrity_errors() + self._symbols.integrity_errors(),
+        }
 
-            added_files += 1
-            added_chunks += len(ids)
+    def repair(self, report: Dict[str, List[str]], batch_size: int = 500) -> Dict[str, int]:
+        """Fixes what check_consistency() found without re-embedding anything that is still valid."""
+        stray = report.get("stray_chunks") or []
+        for start in range(0, len(stray), batch_size):
+            self._collection.delete(ids=stray[start : start + batch_size])
+        # Forgetting the file makes the next index_paths() re-read and re-embed it
+        for rel in report.get("files_missing_chunks") or []:
+            self._refs.remove_file(rel)
+        for rel in report.get("stale_symbol_files") or []:
+            self._symbols.remove_file(rel)
+        return {
+            "stray_chunks_deleted": len(stray),
+            "files_to_reindex": len(report.get("files_missing_chunks") or []),
+            "stale_symbol_files_removed": len(report.get("stale_symbol_files") or []),
+            "metadata_fixed": self.refresh_metadata(),
+        }
 
-            if added_files >= int(max_files_per_run):
-                break
-
-        dt = time.time() - t0
-        return (
-            f"index_paths: indexed {added_files} files / {added_chunks} chunks in {dt:.1f}s "
-            f"(skipped already={skipped_already}, unreadable={skipped_unreadable}) "
-            f"persist={self._persist_directory}"
-        )
+    def vacuum_side_stores(self) -> None:
+        self._refs.vacuum()
+        self._symbols.vacuum()
 
     # -------------------------
     # Internals
     # -------------------------
     def _embed_one(self, text: str) -> List[float]:
-        # Use OpenAI-compatible endpoint for Ollama
-        # This matches how we configured CrewAI to talk to Ollama
-        url = f"{self._ollama_base}/v1/embeddings"
-        
-        # Try OpenAI format first
+        return self._embedder.embed(text)
+
+    def _embed_query(self, query: str) -> List[float]:
+        return self._embed_queries([query])[0]
+
+    def _embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """Cached query embeddings; the misses are embedded in one batched request."""
+        found: Dict[str, List[float]] = {}
+        with self._query_cache_lock:
+            for q in queries:
+                emb = self._query_cache.get(q)
+                if emb is not None:
+                    self._query_cache.move_to_end(q)
+                    found[q] = emb
+        missing = list(dict.fromkeys(q for q in queries if q not in found))
+        if missing:
+            # An agent turn waits for these: ahead of indexing in the request scheduler
+            with request_priority(Priority.INTERACTIVE):
+                embs = self._embedder.embed_many(missing) if len(missing) > 1 else [self._embed_one(missing[0])]
+            with self._query_cache_lock:
+                for q, emb in zip(missing, embs):
+                    found[q] = emb
+                    self._query_cache[q] = emb
+                while len(self._query_cache) > self._query_cache_size:
+                    self._query_cache.popitem(last=False)
+        return [found[q] for q in queries]
+
+    def _display_path(self, path: str) -> str:
+        # Paths relative to the indexed root, so results are valid in any checkout/worktree of it
         try:
-            r = requests.post(
-                url,
-                json={"model": self._embed_model, "input": text},
-                timeout=self._timeout_s,
-                headers={"Authorization": "Bearer NA"}
-            )
-            if r.status_code == 404:
-                # Fallback to native Ollama API if /v1/embeddings not found
-                url = f"{self._ollama_base}/api/embeddings"
-                r = requests.post(
-                    url,
-                    json={"model": self._embed_model, "prompt": text},
-                    timeout=self._timeout_s,
-                )
-            
-            r.raise_for_status()
-            data = r.json()
-            
-            # Handle OpenAI format response
-            if "data" in data and isinstance(data["data"], list):
-                return data["data"][0]["embedding"]
-            
-            # Handle native Ollama format response
-            if "embedding" in data:
-                return data["embedding"]
-                
-            raise ValueError(f"Unexpected response format from {url}")
-            
-        except Exception as e:
-            # Last resort fallback to native API if everything else failed
-            try:
-                url = f"{self._ollama_base}/api/embeddings"
-                r = requests.post(
-                    url,
-                    json={"model": self._embed_model, "prompt": text},
-                    timeout=self._timeout_s,
-                )
-                r.raise_for_status()
-                return r.json()["embedding"]
-            except Exception:
-                raise e
+            return str(Path(path).relative_to(self._directory)).replace("\\", "/")
+        except ValueError:
+            return path
 
-    def _iter_files(self) -> Iterable[Path]:
-        for p in self._directory.rglob("*"):
-            if not p.is_file():
-                continue
-            if any(part in self._exclude_dirs for part in p.parts):
-                continue
-            if p.suffix.lower() not in self._exts:
-                continue
-            try:
-                if p.stat().st_size > self._max_file_bytes:
-                    continue
-            except OSError:
-                continue
-            yield p
+    def _iter_files(self, root: Optional[Path] = None) -> Iterable[Path]:
+        for p in (root or self._directory).rglob("*"):
+            if self.is_indexable(p):
+                yield p
 
     def _iter_files_filtered(self, include_globs: List[str], exclude_globs: List[str]) -> Iterable[Path]:
         root = self._directory
@@ -294,26 +733,3 @@ class LocalDirectoryRagTool(BaseTool):
             if any(fnmatch(rel, g) for g in exclude_globs):
                 continue
             yield p
-
-    def _chunk_text(self, text: str) -> List[str]:
-        text = text.replace("\r\n", "\n").strip()
-        if not text:
-            return []
-        if len(text) <= self._chunk_chars:
-            return [text]
-
-        chunks: List[str] = []
-        step = max(1, self._chunk_chars - self._chunk_overlap)
-        for start in range(0, len(text), step):
-            chunk = text[start : start + self._chunk_chars].strip()
-            if chunk:
-                chunks.append(chunk)
-        return chunks
-
-    def _already_indexed(self, p: Path, mtime: int, size: int) -> bool:
-        marker_id = f"{str(p)}::0::mtime={mtime}::size={size}"
-        try:
-            got = self._collection.get(ids=[marker_id])
-            return bool(got and got.get("ids") and len(got["ids"]) == 1)
-        except Exception:
-            return False
@@ -0,0 +1,204 @@
+import re
+import threading
+from pathlib import PurePosixPath
+from typing import Dict, List, Optional, Tuple
+
+from codeguardian.context_pack import estimate_tokens, is_foreign_frame, parse_stack_frames
+from codeguardian.tools.symbol_index import Symbol, SymbolIndex
+
+MAX_OUTLINE_LINES = 25
+SEED_SHARE_ELSEWHERE = 0.2
+_WORD = re.compile(r"[A-Za-z_][A-Za-z0-9_]{3,}")
+
+
+def pagerank(
+        nodes: List[str],
+        edges: Dict[str, Dict[str, float]],
+        personalization: Optional[Dict[str, float]] = None,
+        damping: float = 0.85,
+        iterations: int = 50,
+        tol: float = 1e-9,
+) -> Dict[str, float]:
+    """
+    Power iteration over weighted edges (source -> {target: weight}). Rank flows from a file to the files it
+    imports; `personalization` biases the random restarts (and the rank of files without imports) towards seeds.
+    """
+    if not nodes:
+        return {}
+    known = set(nodes)
+    total = sum(v for n, v in (personalization or {}).items() if n in known)
+    if total > 0:
+        restart = {n: personalization.get(n, 0.0) / total for n in nodes}
+    else:
+        restart = {n: 1.0 / len(nodes) for n in nodes}
+    out_weight = {n: sum(edges.get(n, {}).values()) for n in nodes}
+    rank = dict(restart)
+    for _ in range(iterations):
+        dangling = sum(rank[n] for n in nodes if not out_weight[n])
+        nxt = {n: (1 - damping + damping * dangling) * restart[n] for n in nodes}
+        for src, targets in edges.items():
+            if not out_weight.get(src):
+                continue
+            share = damping * rank[src] / out_weight[src]
+            for dst, w in targets.items():
+                nxt[dst] += share * w
+        delta = sum(abs(nxt[n] - rank[n]) for n in nodes)
+        rank = nxt
+        if delta < tol:
+            break
+    return rank
+
+
+def _providers(files: List[str], classes: List[Tuple[str, str]]) -> Tuple[Dict[str, List[str]], Dict[str, List[str]]]:
+    """Import keys each file satisfies (see extract_imports) + Python modules by their last name."""
+    keys: Dict[str, List[str]] = {}
+    modules: Dict[str, List[str]] = {}
+    for name, path in classes:
+        keys.setdefault(f"java:{name}", []).append(path)
+        package, _, simple = name.rpartition(".")
+        if package and simple == PurePosixPath(path).stem:
+            keys.setdefault(f"javapkg:{package}", []).append(path)
+    for path in files:
+        p = PurePosixPath(path)
+        if p.suffix == ".py":
+            module = path[:-3].replace("/", ".")
+            module = module[: -len(".__init__")] if module.endswith(".__init__") else module
+            modules.setdefault(module.rsplit(".", 1)[-1], []).append(module)
+            keys.setdefault(f"py:{module}", []).append(path)
+        elif p.suffix in (".ts", ".tsx", ".js", ".jsx", ".mjs"):
+            keys.setdefault(f"ts:{p.with_suffix('').as_posix()}", []).append(path)
+            if p.stem == "index":
+                keys.setdefault(f"ts:{p.parent.as_posix()}", []).append(path)
+    return keys, modules
+
+
+def _resolve_python(key: str, keys: Dict[str, List[str]], modules: Dict[str, List[str]]) -> List[str]:
+    """py:a.b.c.name -> files of the longest importable prefix; module names may carry a source root (src.a.b)."""
+    parts = key[3:].split(".")
+    for n in range(len(parts), 0, -1):
+        wanted = ".".join(parts[:n])
+        hits = [m for m in modules.get(parts[n - 1], []) if m == wanted or m.endswith("." + wanted)]
+        if hits:
+            return [path for m in hits for path in keys[f"py:{m}"]]
+    return []
+
+
+class RepoMap:
+    """
+    Ranked outline of the indexed project for agent prompts:
+      - outlines (classes, method/function signatures) and imports come from the symbol index,
+        i.e. they are extracted once per file version while indexing
+      - files are ranked by PageRank over the import graph, restarted at the files the bug points to
+      - the outlines of the best ranked files are rendered until the token budget is used up
+    The import graph and the unbiased ranking are cached until the symbol index changes.
+    """
+
+    def __init__(self, symbols: SymbolIndex):
+        self.symbols = symbols
+        self._lock = threading.Lock()
+        self._revision: Optional[int] = None
+        self._edges: Dict[str, Dict[str, float]] = {}
+        self._files: List[str] = []
+        self._global: Dict[str, float] = {}
+        self._outlines: Dict[str, List[str]] = {}
+
+    def _graph(self) -> Tuple[List[str], Dict[str, Dict[str, float]]]:
+        with self._lock:
+            if self._revision != self.symbols.revision or not self._files:
+                self._revision = self.symbols.revision
+                self._files = self.symbols.files()
+                keys, modules = _providers(self._files, self.symbols.classes())
+                edges: Dict[str, Dict[str, float]] = {}
+                for src, targets in self.symbols.imports().items():
+                    for key in targets:
+                        hits = _resolve_python(key, keys, modules) if key.startswith("py:") else keys.get(key, [])
+                        for dst in hits:
+                            if dst != src:
+                                edges.setdefault(src, {}).setdefault(dst, 0.0)
+                                edges[src][dst] += 1.0 / len(hits)
+                self._edges = edges
+                self._global = {}
+                self._outlines = {}
+            return self._files, self._edges
+
+    def edges(self) -> Dict[str, Dict[str, float]]:
+        return self._graph()[1]
+
+    def rank(self, seeds: Optional[Dict[str, float]] = None) -> List[Tuple[str, float]]:
+        """Files by rank, best first. Without seeds: plain import centrality (cached)."""
+        files, edges = self._graph()
+        if seeds and files:
+            # Mostly restart at the seeds, a little everywhere: files the seeds do not reach still rank by centrality
+            total = sum(seeds.values())
+            restart = {n: SEED_SHARE_ELSEWHERE / len(files) for n in files}
+            for n, w in seeds.items():
+                if n in restart:
+                    restart[n] += (1 - SEED_SHARE_ELSEWHERE) * w / total
+            scores = pagerank(files, edges, restart)
+        else:
+            with self._lock:
+                if not self._global:
+                    self._global = pagerank(files, edges)
+                scores = self._global
+        return sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))
+
+    def outline(self, rel: str) -> List[str]:
+        """Declarations of one file, indented by nesting."""
+        self._graph()
+        with self._lock:
+            if rel in self._outlines:
+                return self._outlines[rel]
+        lines: List[str] = []
+        open_spans: List[Symbol] = []
+        for s in self.symbols.file_symbols(rel):
+            if s.name.endswith(".<init>"):
+                continue  # the constructor is listed under its own name as well
+            while open_spans and open_spans[-1].end < s.start:
+                open_spans.pop()
+            lines.append("  " * (len(open_spans) + 1) + (s.signature or s.name.rsplit(".", 1)[-1]))
+            open_spans.append(s)
+        with self._lock:
+            self._outlines[rel] = lines
+        return lines
+
+    def render(self, max_tokens: int, seeds: Optional[Dict[str, float]] = None) -> str:
+        """
+        Outlines of the best ranked files within `max_tokens` (seed files marked with *);
+        files whose outline no longer fits are listed by path only.
+        """
+        budget = max_tokens
+        parts: List[str] = []
+        for rel, _ in self.rank(seeds):
+            outline = self.outline(rel)
+            more = len(outline) - MAX_OUTLINE_LINES
+            shown = outline[:MAX_OUTLINE_LINES] + ([f"  … {more} more declarations"] if more > 0 else [])
+            mark = " *" if seeds and rel in seeds else ""
+            block = "\n".join([f"{rel}{mark}", *shown])
+            cost = estimate_tokens(block)
+            if cost > budget:
+                block, cost = f"{rel}{mark}", estimate_tokens(rel) + 1
+                if cost > budget:
+                    break
+            parts.append(block)
+            budget -= cost
+        return "\n".join(parts)
+
+
+def bug_seeds(symbols: SymbolIndex, log: str, description: str = "") -> Dict[str, float]:
+    """
+    Files the bug points to, with weights: resolved stack frames (innermost first) weigh most,
+    then files whose class or file name is mentioned in the log or description.
+    """
+    seeds: Dict[str, float] = {}
+    frames = [f for f in parse_stack_frames(log) if not is_foreign_frame(f)]
+    for n, frame in enumerate(frames[:20]):
+        hit = symbols.resolve_frame(frame)
+        if hit:
+            seeds[hit[0]] = seeds.get(hit[0], 0.0) + 4.0 / (1 + n)
+    words = {w.lower() for w in _WORD.findall(f"{log}\n{description}")}
+    named = {(name.rsplit(".", 1)[-1].lower(), path) for name, path in symbols.classes()}
+    named.update((PurePosixPath(path).name.split(".")[0].lower(), path) for path in symbols.files())
+    for name, path in named:
+        if name in words:
+            seeds[path] = seeds.get(path, 0.0) + 1.0
+    return seeds
@@ -0,0 +1,175 @@
+import time
+import logging
+import threading
+import itertools
+import contextvars
+from contextlib import contextmanager, nullcontext
+from enum import IntEnum
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """Request classes, most urgent first."""
+    INTERACTIVE = 0  # query embeddings of an agent's search: an agent turn waits for them
+    AGENT = 1        # agent LLM calls
+    BULK = 2         # indexing / knowledge sync
+
+
+class RequestQueueFull(TimeoutError):
+    """The queue of a priority class stayed full for longer than OLLAMA_QUEUE_TIMEOUT_S."""
+
+
+_priority: contextvars.ContextVar[Optional[Priority]] = contextvars.ContextVar("request_priority", default=None)
+
+
+@contextmanager
+def request_priority(priority: Priority) -> Iterator[None]:
+    """Requests made inside the block use `priority` instead of the caller's default."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority(default: Priority) -> Priority:
+    p = _priority.get()
+    return default if p is None else p
+
+
+def same_server(url: Optional[str], other: Optional[str]) -> bool:
+    """True if both URLs point at the same host:port (e.g. API_BASE is the Ollama server)."""
+    if not url or not other:
+        return False
+    a, b = urlsplit(url), urlsplit(other)
+    default_port = {"https": 443}
+    return a.hostname is not None and (a.hostname, a.port or default_port.get(a.scheme, 80)) == (
+        b.hostname, b.port or default_port.get(b.scheme, 80))
+
+
+class _ClassStats:
+    def __init__(self):
+        self.requests = 0
+        self.rejected = 0
+        self.waited_s = 0.0
+        self.max_wait_s = 0.0
+        self.active = 0
+        self.queued = 0
+
+
+class RequestScheduler:
+    """
+    Client-side admission for one server (Ollama), shared by every component of the process:
+      - at most `max_concurrent` requests in flight, and at most `limits[class]` of each class
+        (a bulk index never takes all slots, parallel crews cannot overload the server)
+      - a free slot goes to the most urgent waiting request whose class is under its limit, FIFO within a class
+      - backpressure: at most `max_queued` waiting requests per class; further callers block until there is room,
+        up to `queue_timeout_s`, then RequestQueueFull
+      - queue-time metrics per class (stats())
+    """
+
+    def __init__(
+            self,
+            max_concurrent: int = 4,
+            limits: Optional[Dict[Priority, int]] = None,
+            max_queued: int = 64,
+            queue_timeout_s: float = 600,
+    ):
+        self.max_concurrent = max(1, max_concurrent)
+        self.limits = {p: max(1, min(self.max_concurrent, (limits or {}).get(p, self.max_concurrent))) for p in Priority}
+        self.max_queued = max(1, max_queued)
+        self.queue_timeout_s = queue_timeout_s
+        self._cond = threading.Condition()
+        self._tickets = itertools.count()
+        self._waiting: List[Tuple[int, int]] = []  # (priority, ticket), kept sorted
+        self._active = 0
+        self._stats = {p: _ClassStats() for p in Priority}
+
+    def _is_next(self, entry: Tuple[int, int]) -> bool:
+        if self._active >= self.max_concurrent or self._stats[Priority(entry[0])].active >= self.limits[Priority(entry[0])]:
+            return False
+        # First waiter that could run now (classes at their limit do not block the others)
+        for waiting in self._waiting:
+            if self._stats[Priority(waiting[0])].active < self.limits[Priority(waiting[0])]:
+                return waiting == entry
+        return False
+
+    def acquire(self, priority: Priority) -> None:
+        stats = self._stats[priority]
+        t0 = time.monotonic()
+        with self._cond:
+            if not self._cond.wait_for(lambda: stats.queued < self.max_queued, timeout=self.queue_timeout_s):
+                stats.rejected += 1
+                raise RequestQueueFull(
+                    f"{priority.name.lower()} queue full ({self.max_queued} waiting) for {self.queue_timeout_s:g}s. "
+                    "See OLLAMA_MAX_QUEUED / OLLAMA_QUEUE_TIMEOUT_S."
+                )
+            entry = (int(priority), next(self._tickets))
+            self._waiting.append(entry)
+            self._waiting.sort()
+            stats.queued += 1
+            try:
+                self._cond.wait_for(lambda: self._is_next(entry))
+            finally:
+                self._waiting.remove(entry)
+                stats.queued -= 1
+            self._active += 1
+            stats.active += 1
+            waited = time.monotonic() - t0
+            stats.requests += 1
+            stats.waited_s += waited
+            stats.max_wait_s = max(stats.max_wait_s, waited)
+            # Queue room / the next waiter of another class
+            self._cond.notify_all()
+        if waited > 1:
+            logger.debug("%s request waited %.1fs for a slot", priority.name.lower(), waited)
+
+    def release(self, priority: Priority) -> None:
+        with self._cond:
+            self._active -= 1
+            self._stats[priority].active -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, priority: Priority) -> Iterator[None]:
+        self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release(priority)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per class: requests, total / average / max queue time, in flight, waiting, rejected."""
+        with self._cond:
+            return {
+                p.name.lower(): {
+                    "requests": s.requests,
+                    "queue_seconds": round(s.waited_s, 3),
+                    "avg_queue_seconds": round(s.waited_s / s.requests, 3) if s.requests else 0.0,
+                    "max_queue_seconds": round(s.max_wait_s, 3),
+                    "active": s.active,
+                    "queued": s.queued,
+                    "rejected": s.rejected,
+                }
+                for p, s in self._stats.items()
+            }
+
+
+def scheduled(scheduler: Optional[RequestScheduler], default: Priority):
+    """Slot of `scheduler` for the current priority (request_priority) or `default`; no-op without a scheduler."""
+    return scheduler.slot(current_priority(default)) if scheduler is not None else nullcontext()
+
+
+def schedule_calls(llm, scheduler: RequestScheduler, priority: Priority = Priority.AGENT):
+    """Routes `llm.call` through the scheduler (wrapped on the instance, like cache_completions) and returns the LLM."""
+    inner = llm.call
+
+    def call(*args, **kwargs):
+        with scheduled(scheduler, priority):
+            return inner(*args, **kwargs)
+
+    llm.call = call
+    return llm
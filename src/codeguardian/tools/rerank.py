@@ -0,0 +1,162 @@
+import logging
+import threading
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from pydantic import BaseModel, ConfigDict
+
+logger = logging.getLogger(__name__)
+
+
+class Hit(BaseModel):
+    """One search result after post-processing: a run of adjacent chunks of one file."""
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    path: str
+    chunks: List[int]
+    text: str
+    score: float                       # relevance (cosine or reranker score), higher is better
+    focus: int = 0                     # char offset of the best chunk inside text
+    also: List[str] = []               # other paths containing the same chunks (deduplicated content)
+    stale: bool = False                # text read by reference no longer matches the indexed chunk
+    embedding: Optional[np.ndarray] = None
+
+    @property
+    def chunk_label(self) -> str:
+        if len(self.chunks) == 1:
+            return f"chunk {self.chunks[0]}"
+        return f"chunks {self.chunks[0]}-{self.chunks[-1]}"
+
+
+def _unit(v) -> np.ndarray:
+    v = np.asarray(v, dtype=np.float32)
+    n = np.linalg.norm(v)
+    return v / n if n else v
+
+
+def merge_overlapping(a: str, b: str, max_overlap: int, min_overlap: int = 16) -> str:
+    """Joins two consecutive chunks, dropping the text they share (chunks overlap by up to max_overlap chars)."""
+    for n in range(min(len(a), len(b), max_overlap), min_overlap - 1, -1):
+        if a.endswith(b[:n]):
+            return a + b[n:]
+    return f"{a}\n{b}"
+
+
+def collapse_hits(
+        query_emb: Sequence[float],
+        docs: List[str],
+        metas: List[Dict],
+        embs: Sequence,
+        max_overlap: int,
+) -> List[Hit]:
+    """
+    Raw chunks -> one Hit per run of adjacent chunks of the same path (overlapping text merged once).
+    Score of a run = its best chunk; its embedding = the mean of its chunks.
+    """
+    q = _unit(query_emb)
+    by_path: Dict[str, List[tuple]] = {}
+    for doc, meta, emb in zip(docs, metas, embs):
+        meta = meta or {}
+        v = _unit(emb)
+        by_path.setdefault(str(meta.get("path", "unknown")), []).append(
+            (int(meta.get("chunk", 0)), doc, v, float(v @ q), meta.get("also") or [], bool(meta.get("stale")))
+        )
+
+    hits: List[Hit] = []
+    for path, rows in by_path.items():
+        rows.sort(key=lambda r: r[0])
+        run = [rows[0]]
+        for row in rows[1:] + [None]:
+            if row is not None and row[0] == run[-1][0] + 1:
+                run.append(row)
+                continue
+            text = run[0][1]
+            for _, doc, *_ in run[1:]:
+                text = merge_overlapping(text, doc, max_overlap)
+            best = max(run, key=lambda r: r[3])
+            hits.append(Hit(
+                path=path,
+                chunks=[r[0] for r in run],
+                text=text,
+                score=best[3],
+                focus=max(0, text.find(best[1][:80])),
+                embedding=_unit(np.mean([r[2] for r in run], axis=0)),
+                also=list(dict.fromkeys(p for r in run for p in r[4])),
+                stale=any(r[5] for r in run),
+            ))
+            if row is not None:
+                run = [row]
+    hits.sort(key=lambda h: -h.score)
+    return hits
+
+
+def snippet(hit: Hit, max_chars: int) -> str:
+    """At most max_chars of the hit, starting at its best chunk when the whole run does not fit."""
+    if len(hit.text) <= max_chars:
+        return hit.text
+    start = min(hit.focus, len(hit.text) - max_chars)
+    return ("[...]\n" if start else "") + hit.text[start : start + max_chars] + "\n[...]"
+
+
+def mmr(hits: List[Hit], k: int, lambda_: float = 0.5, max_per_path: int = 2) -> List[Hit]:
+    """
+    Maximal Marginal Relevance: picks relevant hits that are NOT similar to the ones already picked,
+    so near-duplicates (same file, copy-pasted code) do not fill the top-k. At most max_per_path runs per file.
+    """
+    if not hits:
+        return []
+    lo, hi = min(h.score for h in hits), max(h.score for h in hits)
+    rel = {id(h): (h.score - lo) / (hi - lo) if hi > lo else 1.0 for h in hits}
+
+    picked: List[Hit] = []
+    per_path: Dict[str, int] = {}
+    pool = list(hits)
+    while pool and len(picked) < k:
+        best, best_val = None, -np.inf
+        for h in pool:
+            if per_path.get(h.path, 0) >= max_per_path:
+                continue
+            redundancy = max((float(h.embedding @ p.embedding) for p in picked), default=0.0)
+            val = lambda_ * rel[id(h)] - (1.0 - lambda_) * redundancy
+            if val > best_val:
+                best, best_val = h, val
+        if best is None:
+            break
+        picked.append(best)
+        per_path[best.path] = per_path.get(best.path, 0) + 1
+        pool.remove(best)
+    return picked
+
+
+class CrossEncoderReranker:
+    """
+    Optional local CPU reranker (sentence-transformers CrossEncoder, e.g. cross-encoder/ms-marco-MiniLM-L-6-v2).
+    Loaded on first use; if the model cannot be loaded, reranking is disabled for the process.
+    """
+
+    def __init__(self, model_name: str, max_chars: int = 2000):
+        self.model_name = model_name
+        self.max_chars = max_chars
+        self._model = None
+        self._failed = False
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._model is None and not self._failed:
+                try:
+                    from sentence_transformers import CrossEncoder
+                    self._model = CrossEncoder(self.model_name, device="cpu")
+                except Exception as e:
+                    logger.warning("Reranker %s unavailable, using embedding scores: %s", self.model_name, e)
+                    self._failed = True
+        return self._model
+
+    def rerank(self, query: str, hits: List[Hit]) -> List[Hit]:
+        model = self._load()
+        if model is None or not hits:
+            return hits
+        scores = model.predict([(query, h.text[: self.max_chars]) for h in hits])
+        for h, s in zip(hits, scores):
+            h.score = float(s)
+        return sorted(hits, key=lambda h: -h.score)
@@ -0,0 +1,148 @@
+import re
+from fnmatch import fnmatch
+from pathlib import PurePosixPath
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+# Chunk metadata is flat (Chroma only stores scalars): directory prefixes are stored one per depth,
+# so "src/main/java/**" becomes {"dir3": "src/main/java"} and is filtered inside the vector query.
+DIR_DEPTH = 6
+
+LANGUAGES = {
+    ".java": "java", ".kt": "kotlin", ".groovy": "groovy", ".gradle": "gradle",
+    ".xml": "xml", ".properties": "properties", ".yml": "yaml", ".yaml": "yaml", ".sql": "sql",
+    ".ts": "typescript", ".tsx": "typescript", ".js": "javascript", ".jsx": "javascript", ".mjs": "javascript",
+    ".html": "html", ".scss": "css", ".css": "css",
+    ".json": "json", ".toml": "toml", ".md": "markdown", ".txt": "text", ".py": "python",
+}
+
+_TEST_DIRS = {"test", "tests", "__tests__", "testing", "e2e", "it"}
+_TEST_NAME = re.compile(
+    r"(Tests?|IT|Spec)\.(java|kt|groovy)$|\.(spec|test)\.[jt]sx?$|^test_.*\.py$|_test\.py$|^conftest\.py$"
+)
+_WILDCARD = re.compile(r"[*?\[]")
+
+# profile name -> (include globs, exclude globs), from rag_config.yaml
+Profiles = Dict[str, Tuple[List[str], List[str]]]
+
+
+def is_test_path(rel: str) -> bool:
+    p = PurePosixPath(rel)
+    return any(part.lower() in _TEST_DIRS for part in p.parts[:-1]) or bool(_TEST_NAME.search(p.name))
+
+
+def path_metadata(rel: str, profiles: Optional[Profiles] = None) -> Dict:
+    """Filterable metadata of one repo-relative path (stored on each of its chunks)."""
+    p = PurePosixPath(rel)
+    ext = p.suffix.lower()
+    meta = {
+        "rel": rel,
+        "ext": ext,
+        "lang": LANGUAGES.get(ext, "other"),
+        "is_test": is_test_path(rel),
+    }
+    dirs = p.parts[:-1]
+    for depth in range(1, DIR_DEPTH + 1):
+        meta[f"dir{depth}"] = "/".join(dirs[:depth]) if len(dirs) >= depth else ""
+    for name, (include, exclude) in (profiles or {}).items():
+        meta[name] = any(fnmatch(rel, g) for g in include) and not any(fnmatch(rel, g) for g in exclude)
+    return meta
+
+
+def glob_prefix(glob: str) -> Tuple[str, bool]:
+    """
+    Static directory prefix of a glob + whether the prefix alone is exact (glob == "<prefix>/**").
+    "src/main/java/**" -> ("src/main/java", True); "src/**/*Service.java" -> ("src", False); "**/*.ts" -> ("", False)
+    """
+    parts = glob.replace("\\", "/").strip("/").split("/")
+    static = []
+    for part in parts[:-1]:
+        if _WILDCARD.search(part):
+            break
+        static.append(part)
+    rest = parts[len(static):]
+    return "/".join(static), rest == ["**"]
+
+
+def _prefix_clause(prefix: str, negate: bool = False) -> Optional[Dict]:
+    depth = prefix.count("/") + 1
+    if not prefix or depth > DIR_DEPTH:
+        return None
+    return {f"dir{depth}": {"$ne" if negate else "$eq": prefix}}
+
+
+def _combine(op: str, clauses: List[Dict]) -> Optional[Dict]:
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {op: clauses}
+
+
+def build_where(
+        path_globs: Optional[List[str]] = None,
+        exclude_globs: Optional[List[str]] = None,
+        extensions: Optional[List[str]] = None,
+        languages: Optional[List[str]] = None,
+        profile: Optional[str] = None,
+        include_tests: bool = True,
+) -> Optional[Dict]:
+    """
+    Chroma `where` filter for the given scope (None = unfiltered).
+    Globs are pushed down through their directory prefix; the rest of a glob is checked by post_filter().
+    """
+    clauses: List[Dict] = []
+    if extensions:
+        exts = sorted({e.lower() if e.startswith(".") else f".{e.lower()}" for e in extensions})
+        clauses.append({"ext": {"$in": exts}})
+    if languages:
+        clauses.append({"lang": {"$in": sorted({lang.lower() for lang in languages})}})
+    if profile:
+        clauses.append({profile: True})
+    if not include_tests:
+        clauses.append({"is_test": False})
+
+    if path_globs:
+        prefixes = [_prefix_clause(glob_prefix(g)[0]) for g in path_globs]
+        # Only when EVERY glob has a prefix, otherwise the $or would drop valid matches
+        if all(prefixes):
+            clauses.append(_combine("$or", prefixes))
+    for g in exclude_globs or []:
+        prefix, exact = glob_prefix(g)
+        clause = _prefix_clause(prefix, negate=True) if exact else None
+        if clause:
+            clauses.append(clause)
+
+    return _combine("$and", clauses)
+
+
+def post_filter(rel: str, path_globs: Optional[List[str]] = None, exclude_globs: Optional[List[str]] = None) -> bool:
+    """Exact glob check for what build_where could only approximate."""
+    if path_globs and not any(fnmatch(rel, g) for g in path_globs):
+        return False
+    return not any(fnmatch(rel, g) for g in exclude_globs or [])
+
+
+class UnknownProfile(ValueError):
+    """A search scope names a profile that rag_config.yaml does not define."""
+
+
+class SearchScope(BaseModel):
+    """The filter arguments of one search: pushed down via where(), checked exactly per path via matches()."""
+    path_globs: Optional[List[str]] = None
+    exclude_globs: Optional[List[str]] = None
+    extensions: Optional[List[str]] = None
+    profile: Optional[str] = None
+    include_tests: bool = True
+
+    def where(self) -> Optional[Dict]:
+        return build_where(self.path_globs, self.exclude_globs, self.extensions, profile=self.profile, include_tests=self.include_tests)
+
+    def matches(self, rel: str, profiles: Optional[Profiles] = None) -> bool:
+        if not post_filter(rel, self.path_globs, self.exclude_globs):
+            return False
+        meta = path_metadata(rel, profiles)
+        if self.extensions and meta["ext"] not in {e.lower() if e.startswith(".") else f".{e.lower()}" for e in self.extensions}:
+            return False
+        if self.profile and not meta.get(self.profile):
+            return False
+        return self.include_tests or not meta["is_test"]
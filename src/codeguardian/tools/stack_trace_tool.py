@@ -0,0 +1,40 @@
+from pathlib import Path
+from typing import Type
+
+from pydantic import BaseModel, Field, PrivateAttr
+from crewai.tools import BaseTool
+
+from codeguardian.context_pack import ContextPacker
+from codeguardian.tools.symbol_index import SymbolIndex
+
+
+class StackTraceResolverInput(BaseModel):
+    """Input schema for StackTraceResolverTool."""
+    trace: str = Field(..., description="The stack trace (or log excerpt) exactly as it appears in the log. Java, JS/TS and Python frames are supported.")
+    max_tokens: int = Field(default=4000, ge=500, le=12000, description="Maximum size of the returned snippets (tokens).")
+
+
+class StackTraceResolverTool(BaseTool):
+    name: str = "resolve_stack_trace"
+    description: str = (
+        "Resolves every project frame of a stack trace to its exact source in ONE call: "
+        "repo-relative path, line span and the line-numbered enclosing method. "
+        "Library frames are skipped. Uses the symbol index (no semantic search). "
+        "Use this before local_directory_rag_search whenever the log contains a stack trace."
+    )
+    args_schema: Type[BaseModel] = StackTraceResolverInput
+    project_path: str
+
+    _symbols: SymbolIndex = PrivateAttr()
+
+    def __init__(self, symbols: SymbolIndex, **kwargs):
+        super().__init__(**kwargs)
+        self._symbols = symbols
+
+    def _run(self, trace: str, max_tokens: int = 4000) -> str:
+        try:
+            packer = ContextPacker(Path(self.project_path), symbols=self._symbols, max_tokens=int(max_tokens))
+            out = packer.pack(trace)
+        except Exception as e:
+            return f"Error resolving stack trace: {str(e)}"
+        return out or "No project frames found (only library frames, or files that are not indexed)."
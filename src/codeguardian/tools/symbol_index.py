@@ -0,0 +1,397 @@
+import ast
+import posixpath
+import re
+import sqlite3
+import threading
+from pathlib import Path, PurePosixPath
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from codeguardian.context_pack import (
+    StackFrame,
+    block_end_braces,
+    candidate_suffixes,
+    code_only,
+    declared_name,
+)
+
+
+class Symbol(BaseModel):
+    name: str         # fully qualified: com.x.Foo / com.x.Foo.bar / OrderComponent.load / app.service.handle
+    kind: str         # class | method | function
+    path: str         # repo-relative, forward slashes
+    start: int        # 1-based, inclusive
+    end: int
+    signature: str = ""  # declaration without body, e.g. 'public Order create(String name)'
+
+
+# -------------------------
+# Extraction (no parsing libraries, line based)
+# -------------------------
+_PACKAGE = re.compile(r"^\s*package\s+([\w.]+)\s*;")
+_TYPE_DECL = re.compile(r"\b(class|interface|enum|record)\s+([A-Za-z_$][\w$]*)")
+_TS_FUNCTION = re.compile(r"^\s*(?:export\s+)?(?:default\s+)?(?:async\s+)?function\s*\*?\s*([\w$]+)\s*[(<]")
+_TS_ARROW = re.compile(r"^\s*(?:export\s+)?(?:const|let)\s+([\w$]+)\s*(?::[^=]+)?=\s*(?:async\s*)?(?:\([^)]*\)|[\w$]+)\s*(?::[^=]+)?=>")
+_JAVA_IMPORT = re.compile(r"^\s*import\s+(static\s+)?([\w.]+?)(\.\*)?\s*;?\s*$")
+_TYPE_REF = re.compile(r"\b([A-Z][A-Za-z0-9_]*)\b")
+_PY_IMPORT = re.compile(r"^\s*import\s+(.+)$")
+_PY_FROM = re.compile(r"^\s*from\s+(\.*)([\w.]*)\s+import\s+\(?([^#)]*)")
+_TS_IMPORT = re.compile(r"(?:\bfrom\s+|\bimport\s*\(?\s*|\brequire\s*\(\s*)['\"]([^'\"]+)['\"]")
+_SCRIPT_EXT = re.compile(r"\.(ts|tsx|js|jsx|mjs)$")
+MAX_SIGNATURE_CHARS = 160
+MAX_TYPE_REFS = 300
+
+
+def _signature(lines: List[str], i: int) -> str:
+    """Declaration starting at line `i` up to its body (at most 4 lines), whitespace collapsed."""
+    parts = []
+    for line in lines[i: i + 4]:
+        code = code_only(line)
+        cut = min((code.find(c) for c in "{;" if c in code), default=-1)
+        parts.append(code[:cut] if cut >= 0 else code)
+        if cut >= 0:
+            break
+    text = " ".join(" ".join(parts).split())
+    return text if len(text) <= MAX_SIGNATURE_CHARS else text[: MAX_SIGNATURE_CHARS - 1] + "…"
+
+
+def _line_depths(lines: List[str]) -> List[int]:
+    """Brace depth at the START of every line."""
+    depths, depth = [], 0
+    for line in lines:
+        depths.append(depth)
+        code = code_only(line)
+        depth += code.count("{") - code.count("}")
+    return depths
+
+
+def _brace_symbols(rel: str, lines: List[str], prefix: str) -> List[Symbol]:
+    """Types + methods of brace languages (Java, Kotlin-ish, TS/JS)."""
+    depths = _line_depths(lines)
+    types: List[Tuple[str, int, int, int]] = []  # (qualified name, start, end, body depth)
+    out: List[Symbol] = []
+
+    def owner(i: int) -> Optional[Tuple[str, int, int, int]]:
+        inner = None
+        for t in types:
+            if t[1] <= i <= t[2] and (inner is None or t[1] >= inner[1]):
+                inner = t
+        return inner
+
+    for i, line in enumerate(lines):
+        code = code_only(line)
+        m = _TYPE_DECL.search(code)
+        if m and not code.lstrip().startswith(("*", "/*", "import ")):
+            parent = owner(i)
+            name = f"{parent[0]}.{m.group(2)}" if parent else (f"{prefix}.{m.group(2)}" if prefix else m.group(2))
+            end = block_end_braces(lines, i)
+            types.append((name, i, end, depths[i] + 1))
+            out.append(Symbol(name=name, kind="class", path=rel, start=i + 1, end=end + 1, signature=_signature(lines, i)))
+            continue
+
+        parent = owner(i)
+        mname = declared_name(line) if parent and depths[i] == parent[3] else None
+        if mname:
+            end = block_end_braces(lines, i)
+            out.append(Symbol(name=f"{parent[0]}.{mname}", kind="method", path=rel, start=i + 1, end=end + 1, signature=_signature(lines, i)))
+            if mname == parent[0].rsplit(".", 1)[-1]:
+                out.append(Symbol(name=f"{parent[0]}.<init>", kind="method", path=rel, start=i + 1, end=end + 1))
+            continue
+
+        if depths[i] == 0:
+            fm = _TS_FUNCTION.match(code) or _TS_ARROW.match(code)
+            if fm:
+                end = block_end_braces(lines, i)
+                out.append(Symbol(name=fm.group(1), kind="function", path=rel, start=i + 1, end=end + 1, signature=_signature(lines, i)))
+    return out
+
+
+def _python_module(rel: str) -> str:
+    module = rel[:-3].replace("/", ".")
+    return module[: -len(".__init__")] if module.endswith(".__init__") else module
+
+
+def _python_signature(node) -> str:
+    if isinstance(node, ast.ClassDef):
+        bases = ", ".join(ast.unparse(b) for b in node.bases)
+        text = f"class {node.name}({bases})" if bases else f"class {node.name}"
+    else:
+        prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+        returns = f" -> {ast.unparse(node.returns)}" if node.returns else ""
+        text = f"{prefix} {node.name}({ast.unparse(node.args)}){returns}"
+    return text if len(text) <= MAX_SIGNATURE_CHARS else text[: MAX_SIGNATURE_CHARS - 1] + "…"
+
+
+def _python_symbols(rel: str, text: str) -> List[Symbol]:
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return []
+    module = _python_module(rel)
+    out: List[Symbol] = []
+
+    def walk(node, qual: str):
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+                name = f"{qual}.{child.name}"
+                kind = "class" if isinstance(child, ast.ClassDef) else ("method" if isinstance(node, ast.ClassDef) else "function")
+                out.append(Symbol(
+                    name=name, kind=kind, path=rel, start=child.lineno, end=child.end_lineno or child.lineno,
+                    signature=_python_signature(child),
+                ))
+                walk(child, name)
+
+    walk(tree, module)
+    return out
+
+
+def _java_package(lines: List[str]) -> str:
+    for line in lines[:200]:
+        m = _PACKAGE.match(line)
+        if m:
+            return m.group(1)
+    return ""
+
+
+def extract_symbols(rel: str, text: str) -> List[Symbol]:
+    """Symbols (with line spans) declared in one file. Unknown languages -> []."""
+    suffix = Path(rel).suffix.lower()
+    if suffix == ".py":
+        return _python_symbols(rel, text)
+    lines = text.replace("\r\n", "\n").split("\n")
+    if suffix in (".java", ".kt", ".groovy", ".scala"):
+        return _brace_symbols(rel, lines, _java_package(lines))
+    if suffix in (".ts", ".tsx", ".js", ".jsx", ".mjs"):
+        return _brace_symbols(rel, lines, "")
+    return []
+
+
+def extract_imports(rel: str, text: str) -> List[str]:
+    """
+    What one file depends on, as keys the files of the project provide (see repo_map):
+      java:com.x.Foo     imported class, or a capitalized name used in the file's own package
+      javapkg:com.x      wildcard import
+      py:a.b.c           imported module or module member (relative imports made absolute)
+      ts:src/app/foo     relative import, extension dropped
+    JDK / library imports are kept too (they match no project file); npm package imports are dropped.
+    """
+    suffix = Path(rel).suffix.lower()
+    lines = text.replace("\r\n", "\n").split("\n")
+    out: List[str] = []
+    if suffix in (".java", ".kt", ".groovy", ".scala"):
+        package = _java_package(lines)
+        refs = set()
+        for line in lines:
+            m = _JAVA_IMPORT.match(line)
+            if m:
+                name = m.group(2).rsplit(".", 1)[0] if m.group(1) and not m.group(3) else m.group(2)
+                out.append(f"javapkg:{name}" if m.group(3) and not m.group(1) else f"java:{name}")
+            elif package and not line.lstrip().startswith(("package ", "*", "//", "/*")):
+                refs.update(_TYPE_REF.findall(code_only(line)))
+        # Same-package classes are used without an import
+        own = Path(rel).stem
+        out.extend(f"java:{package}.{name}" for name in sorted(refs - {own})[:MAX_TYPE_REFS])
+    elif suffix == ".py":
+        module = _python_module(rel).split(".")
+        package = module if rel.endswith("__init__.py") else module[:-1]
+        for line in lines:
+            m = _PY_FROM.match(line)
+            if m:
+                dots, base, names = m.groups()
+                if dots:
+                    up = package[: len(package) - (len(dots) - 1)] if len(dots) - 1 <= len(package) else []
+                    base = ".".join([*up, base] if base else up)
+                names = [n.split(" as ")[0].strip() for n in names.split(",")]
+                out.extend(f"py:{base}.{n}" if base else f"py:{n}" for n in names if n and n != "*")
+                if base and not any(n and n != "*" for n in names):
+                    out.append(f"py:{base}")  # `import *` or a name list continued on the next lines
+                continue
+            m = _PY_IMPORT.match(line)
+            if m:
+                out.extend(f"py:{n.split(' as ')[0].strip()}" for n in m.group(1).split("#")[0].split(",") if n.strip())
+    elif suffix in (".ts", ".tsx", ".js", ".jsx", ".mjs"):
+        folder = PurePosixPath(rel).parent
+        for m in _TS_IMPORT.finditer(text):
+            spec = m.group(1)
+            if not spec.startswith("."):
+                continue
+            target = posixpath.normpath((folder / spec).as_posix())
+            out.append("ts:" + _SCRIPT_EXT.sub("", target))
+    return list(dict.fromkeys(out))
+
+
+# -------------------------
+# Store
+# -------------------------
+class SymbolIndex:
+    """
+    Fully qualified names -> (path, line span), persisted in SQLite next to the vector store.
+    Kept up to date file by file by LocalDirectoryRagTool.index_paths (no embeddings involved),
+    together with each file's imports (the edges of the repo map).
+    """
+
+    def __init__(self, db_path: Path):
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, name TEXT NOT NULL, sig TEXT NOT NULL);
+            CREATE INDEX IF NOT EXISTS files_name ON files(name);
+            CREATE TABLE IF NOT EXISTS symbols (name TEXT NOT NULL, kind TEXT NOT NULL, path TEXT NOT NULL, start INTEGER NOT NULL, end INTEGER NOT NULL);
+            CREATE INDEX IF NOT EXISTS symbols_name ON symbols(name);
+            CREATE INDEX IF NOT EXISTS symbols_path ON symbols(path);
+            CREATE TABLE IF NOT EXISTS imports (path TEXT NOT NULL, target TEXT NOT NULL);
+            CREATE INDEX IF NOT EXISTS imports_path ON imports(path);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+            INSERT OR IGNORE INTO meta(key, value) VALUES ('revision', 0);
+            """
+        )
+        columns = {r[1] for r in self._db.execute("PRAGMA table_info(symbols)")}
+        if "signature" not in columns:
+            # Index from before the repo map: re-extract every file on the next run (no re-embedding)
+            with self._db:
+                self._db.execute("ALTER TABLE symbols ADD COLUMN signature TEXT NOT NULL DEFAULT ''")
+                self._db.execute("UPDATE files SET sig = ''")
+
+    # ---- writes
+    def _bump(self) -> None:
+        self._db.execute("UPDATE meta SET value = value + 1 WHERE key = 'revision'")
+
+    def needs_update(self, rel: str, sig: str) -> bool:
+        with self._lock:
+            row = self._db.execute("SELECT sig FROM files WHERE path = ?", (rel,)).fetchone()
+        return row is None or row[0] != sig
+
+    def update_file(self, rel: str, sig: str, text: str) -> int:
+        symbols = extract_symbols(rel, text)
+        imports = extract_imports(rel, text)
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM symbols WHERE path = ?", (rel,))
+            self._db.execute("DELETE FROM imports WHERE path = ?", (rel,))
+            self._db.execute("INSERT OR REPLACE INTO files(path, name, sig) VALUES (?, ?, ?)", (rel, Path(rel).name, sig))
+            self._db.executemany(
+                "INSERT INTO symbols(name, kind, path, start, end, signature) VALUES (?, ?, ?, ?, ?, ?)",
+                [(s.name, s.kind, s.path, s.start, s.end, s.signature) for s in symbols],
+            )
+            self._db.executemany("INSERT INTO imports(path, target) VALUES (?, ?)", [(rel, t) for t in imports])
+            self._bump()
+        return len(symbols)
+
+    def remove_file(self, rel: str) -> None:
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM symbols WHERE path = ?", (rel,))
+            self._db.execute("DELETE FROM imports WHERE path = ?", (rel,))
+            self._db.execute("DELETE FROM files WHERE path = ?", (rel,))
+            self._bump()
+
+    def clear(self) -> None:
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM symbols")
+            self._db.execute("DELETE FROM imports")
+            self._db.execute("DELETE FROM files")
+            self._bump()
+
+    # ---- reads
+    @property
+    def revision(self) -> int:
+        """
+        Bumped by every write, stored with the index: a process caching derived data per revision (the repo map)
+        also sees the writes of other processes, e.g. a parallel crew updating the index.
+        """
+        with self._lock:
+            return self._db.execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()[0]
+
+    def files(self) -> List[str]:
+        with self._lock:
+            return [r[0] for r in self._db.execute("SELECT path FROM files ORDER BY path")]
+
+    def has_files(self) -> bool:
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM files LIMIT 1").fetchone() is not None
+
+    def lookup(self, name: str) -> List[Symbol]:
+        with self._lock:
+            rows = self._db.execute("SELECT name, kind, path, start, end FROM symbols WHERE name = ?", (name,)).fetchall()
+        return [Symbol(name=r[0], kind=r[1], path=r[2], start=r[3], end=r[4]) for r in rows]
+
+    def lookup_suffix(self, name: str) -> List[Symbol]:
+        """Symbols named `name` or ending in `.name` (e.g. 'OrderService.cancel' for com.x.OrderService.cancel)."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT name, kind, path, start, end FROM symbols WHERE name = ? OR name LIKE ? ESCAPE '\\'",
+                (name, "%." + name.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")),
+            ).fetchall()
+        # LIKE ignores case
+        return [Symbol(name=r[0], kind=r[1], path=r[2], start=r[3], end=r[4]) for r in rows if r[0] == name or r[0].endswith("." + name)]
+
+    def file_symbols(self, rel: str) -> List[Symbol]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT name, kind, path, start, end, signature FROM symbols WHERE path = ? ORDER BY start, end DESC", (rel,)
+            ).fetchall()
+        return [Symbol(name=r[0], kind=r[1], path=r[2], start=r[3], end=r[4], signature=r[5]) for r in rows]
+
+    def classes(self) -> List[Tuple[str, str]]:
+        """(qualified name, path) of every class / interface / enum."""
+        with self._lock:
+            return self._db.execute("SELECT name, path FROM symbols WHERE kind = 'class'").fetchall()
+
+    def imports(self) -> Dict[str, List[str]]:
+        """path -> import keys (see extract_imports)."""
+        out: Dict[str, List[str]] = {}
+        with self._lock:
+            for path, target in self._db.execute("SELECT path, target FROM imports"):
+                out.setdefault(path, []).append(target)
+        return out
+
+    def files_named(self, name: str) -> List[str]:
+        with self._lock:
+            return [r[0] for r in self._db.execute("SELECT path FROM files WHERE name = ?", (name,)).fetchall()]
+
+    def enclosing(self, rel: str, line: int) -> Optional[Symbol]:
+        """Innermost method/function of `rel` containing `line`."""
+        with self._lock:
+            r = self._db.execute(
+                "SELECT name, kind, path, start, end FROM symbols "
+                "WHERE path = ? AND kind != 'class' AND start <= ? AND end >= ? ORDER BY end - start LIMIT 1",
+                (rel, line, line),
+            ).fetchone()
+        return Symbol(name=r[0], kind=r[1], path=r[2], start=r[3], end=r[4]) if r else None
+
+    def resolve_frame(self, frame: StackFrame) -> Optional[Tuple[str, Optional[Tuple[int, int]]]]:
+        """
+        Frame -> (repo-relative path, 1-based method span or None).
+        Java: exact FQN lookup; others: file name lookup + enclosing symbol.
+        """
+        symbol = frame.symbol.replace("$", ".")
+        if frame.file.endswith(".java") and symbol:
+            candidates = self.lookup(symbol) or self.lookup(re.sub(r"\.lambda\.(\w+)\.\d+$", r".\1", symbol))
+            for s in candidates:
+                if frame.line is None or s.start <= frame.line <= s.end:
+                    return s.path, (s.start, s.end)
+            owner = self.lookup(symbol.rsplit(".", 1)[0])
+            if owner:
+                rel = owner[0].path
+                inner = self.enclosing(rel, frame.line) if frame.line else None
+                return rel, ((inner.start, inner.end) if inner else None)
+
+        for suffix in candidate_suffixes(frame):
+            hits = [p for p in self.files_named(suffix.rsplit("/", 1)[-1]) if p == suffix or p.endswith("/" + suffix)]
+            if hits:
+                hits.sort(key=lambda r: ("/test/" in r or ".spec." in r, len(r)))
+                rel = hits[0]
+                inner = self.enclosing(rel, frame.line) if frame.line else None
+                return rel, ((inner.start, inner.end) if inner else None)
+        return None
+
+    # ---- maintenance
+    def integrity_errors(self) -> List[str]:
+        with self._lock:
+            rows = [r[0] for r in self._db.execute("PRAGMA quick_check")]
+        return [] if rows == ["ok"] else rows
+
+    def vacuum(self) -> None:
+        with self._lock:
+            self._db.execute("VACUUM")
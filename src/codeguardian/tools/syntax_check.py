@@ -0,0 +1,348 @@
+import json
+import os
+import re
+import subprocess
+import time
+import xml.etree.ElementTree as ET
+from bisect import bisect_right
+from pathlib import Path, PurePosixPath
+from typing import Dict, List, Optional, Type
+
+import yaml
+from pydantic import BaseModel, Field
+from crewai.tools import BaseTool
+
+from codeguardian.tools.git_blobs import changed_files
+
+CHECKED_EXTENSIONS = {".java", ".ts", ".tsx", ".py", ".json", ".yml", ".yaml", ".xml"}
+# JSON with comments (tsc / VS Code / eslint read them leniently)
+_JSONC = re.compile(r"^(tsconfig.*|jsconfig.*|\.eslintrc|settings|launch|extensions)\.json$")
+_TSC_LINE = re.compile(r"^(?P<file>.+?)\((?P<line>\d+),(?P<col>\d+)\): error (?P<code>TS\d+): (?P<msg>.*)$")
+_PAIRS = {")": "(", "]": "[", "}": "{"}
+# After these, a "/" in TypeScript starts a regex literal, not a division
+_REGEX_PREV = set("(,=:[!&|?{};+-*%<>~^") | {"", "return", "typeof", "case", "in", "of", "delete", "void", "throw", "yield", "await"}
+MAX_ISSUES_PER_FILE = 3
+
+
+class SyntaxIssue(BaseModel):
+    path: str
+    line: int
+    col: int
+    message: str
+
+    def __str__(self) -> str:
+        return f"{self.path}:{self.line}:{self.col}: {self.message}"
+
+
+class _Positions:
+    """Offset -> (line, col), both 1-based."""
+
+    def __init__(self, text: str):
+        self.starts = [0] + [m.end() for m in re.finditer("\n", text)]
+
+    def __call__(self, offset: int):
+        line = bisect_right(self.starts, offset)
+        return line, offset - self.starts[line - 1] + 1
+
+
+def _bracket_issues(rel: str, text: str, ts: bool) -> List[SyntaxIssue]:
+    """
+    Java / TypeScript structure without a full parser: strings, char and template literals, comments
+    (and regex literals in TS) are skipped, then (), [] and {} must pair up. Catches what a truncated or
+    mis-merged edit typically breaks, in a few milliseconds per file.
+    """
+    pos = _Positions(text)
+    issues: List[SyntaxIssue] = []
+    stack: List[tuple] = []  # (opener, offset); "${" = template literal expression
+    n = len(text)
+    prev = ""
+
+    def issue(offset: int, message: str) -> None:
+        line, col = pos(offset)
+        issues.append(SyntaxIssue(path=rel, line=line, col=col, message=message))
+
+    def template(i: int) -> Optional[int]:
+        """Scans a template literal body from `i`; returns the offset after "`" (closed) or after "${" (pushed)."""
+        while i < n:
+            c = text[i]
+            if c == "\\":
+                i += 2
+            elif c == "`":
+                return i + 1
+            elif text.startswith("${", i):
+                stack.append(("${", i))
+                return i + 2
+            else:
+                i += 1
+        return None
+
+    i = 0
+    while i < n and len(issues) < MAX_ISSUES_PER_FILE:
+        c = text[i]
+        if c.isspace():
+            i += 1
+        elif text.startswith("//", i):
+            j = text.find("\n", i)
+            i = n if j < 0 else j
+        elif text.startswith("/*", i):
+            j = text.find("*/", i + 2)
+            if j < 0:
+                issue(i, "unterminated block comment")
+                return issues
+            i = j + 2
+        elif not ts and text.startswith('"""', i):
+            j = text.find('"""', i + 3)
+            if j < 0:
+                issue(i, "unterminated text block")
+                return issues
+            i, prev = j + 3, '"'
+        elif ts and c == "`":
+            start, i = i, template(i + 1)
+            if i is None:
+                issue(start, "unterminated template literal")
+                return issues
+            prev = "`"
+        elif c in "\"'" or (ts and c == "/" and prev in _REGEX_PREV and not text.startswith("/", i + 1)):
+            j, in_class = i + 1, False
+            while j < n and text[j] != "\n":
+                if text[j] == "\\":
+                    j += 2
+                    continue
+                if c == "/" and text[j] in "[]":
+                    in_class = text[j] == "["
+                elif text[j] == c and not in_class:
+                    break
+                j += 1
+            if j >= n or text[j] == "\n":
+                issue(i, "unterminated regular expression" if c == "/" else "unterminated string literal")
+                i = j
+                continue
+            i, prev = j + 1, c
+        elif c.isalnum() or c in "_$":
+            j = i
+            while j < n and (text[j].isalnum() or text[j] in "_$"):
+                j += 1
+            prev, i = text[i:j], j
+        else:
+            if c in "([{":
+                stack.append((c, i))
+            elif c in _PAIRS:
+                if not stack:
+                    issue(i, f"unexpected '{c}' (nothing to close)")
+                elif stack[-1][0] == "${" and c == "}":
+                    stack.pop()
+                    start, i = i, template(i + 1)
+                    if i is None:
+                        issue(start, "unterminated template literal")
+                        return issues
+                    prev = "`"
+                    continue
+                else:
+                    opener, at = stack.pop()
+                    if opener != _PAIRS[c]:
+                        issue(i, f"'{c}' does not match '{opener}' opened at line {pos(at)[0]}")
+            prev = c
+            i += 1
+
+    for opener, at in stack[: MAX_ISSUES_PER_FILE - len(issues)]:
+        issue(at, f"'{'{' if opener == '${' else opener}' is never closed")
+    return issues
+
+
+def check_text(rel: str, text: str) -> List[SyntaxIssue]:
+    """Syntax issues of one file's content (empty = OK or not a checked type)."""
+    name = PurePosixPath(rel).name
+    ext = PurePosixPath(rel).suffix.lower()
+    try:
+        if ext == ".py":
+            compile(text, rel, "exec", dont_inherit=True)
+        elif ext == ".json" and not _JSONC.match(name):
+            json.loads(text)
+        elif ext in (".yml", ".yaml"):
+            for _ in yaml.compose_all(text, Loader=yaml.SafeLoader):  # syntax only: custom tags are fine
+                pass
+        elif ext == ".xml":
+            ET.fromstring(text.encode("utf-8"))
+        elif ext == ".java":
+            return _bracket_issues(rel, text, ts=False)
+        elif ext == ".ts":
+            return _bracket_issues(rel, text, ts=True)
+        # .tsx: JSX text breaks the lexer; checked by tsc only
+    except ET.ParseError as e:  # a SyntaxError subclass
+        line, col = e.position
+        return [SyntaxIssue(path=rel, line=line, col=col + 1, message=str(e).split(":")[0])]
+    except SyntaxError as e:
+        return [SyntaxIssue(path=rel, line=e.lineno or 1, col=e.offset or 1, message=e.msg)]
+    except json.JSONDecodeError as e:
+        return [SyntaxIssue(path=rel, line=e.lineno, col=e.colno, message=e.msg)]
+    except yaml.MarkedYAMLError as e:
+        mark = e.problem_mark or e.context_mark
+        line, col = (mark.line + 1, mark.column + 1) if mark else (1, 1)
+        return [SyntaxIssue(path=rel, line=line, col=col, message=" ".join(filter(None, [e.context, e.problem])))]
+    except Exception as e:
+        return [SyntaxIssue(path=rel, line=1, col=1, message=str(e))]
+    return []
+
+
+def check_files(root: Path, rels: List[str]) -> List[SyntaxIssue]:
+    issues: List[SyntaxIssue] = []
+    for rel in rels:
+        if PurePosixPath(rel).suffix.lower() not in CHECKED_EXTENSIONS:
+            continue
+        try:
+            text = (Path(root) / rel).read_bytes().decode("utf-8", errors="replace")
+        except OSError:
+            continue
+        issues.extend(check_text(rel, text))
+    return issues
+
+
+def _tsc_binary(start: Path, root: Path) -> Optional[Path]:
+    for d in [start, *start.parents]:
+        for name in ("tsc.cmd", "tsc") if os.name == "nt" else ("tsc",):
+            candidate = d / "node_modules" / ".bin" / name
+            if candidate.exists():
+                return candidate
+        if d == root:
+            break
+    return None
+
+
+def _tsconfig_dir(path: Path, root: Path) -> Optional[Path]:
+    for d in path.parents:
+        if (d / "tsconfig.json").exists():
+            return d
+        if d == root:
+            break
+    return None
+
+
+def run_tsc(root: Path, rels: List[str], timeout_s: int = 180) -> Optional[List[SyntaxIssue]]:
+    """
+    Incremental `tsc --noEmit` of every TypeScript project containing one of `rels` (the .tsbuildinfo is kept under
+    node_modules/.cache, so repeated checks only re-check what changed). Errors in the given files are reported.
+    None = no TypeScript file, no tsconfig.json or no local tsc.
+    """
+    root = Path(root).resolve()
+    wanted = {(root / rel).resolve() for rel in rels if PurePosixPath(rel).suffix.lower() in (".ts", ".tsx")}
+    projects: Dict[Path, Path] = {}
+    for path in wanted:
+        project = _tsconfig_dir(path, root)
+        tsc = _tsc_binary(project, root) if project else None
+        if tsc:
+            projects[project] = tsc
+    if not projects:
+        return None
+
+    issues: List[SyntaxIssue] = []
+    for project, tsc in projects.items():
+        cache = project / "node_modules" / ".cache" / "codeguardian" / "tsc.tsbuildinfo"
+        cache.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            result = subprocess.run(
+                [str(tsc), "--noEmit", "--incremental", "--tsBuildInfoFile", str(cache), "-p", str(project), "--pretty", "false"],
+                cwd=project, capture_output=True, text=True, timeout=timeout_s,
+            )
+        except (OSError, subprocess.TimeoutExpired) as e:
+            issues.append(SyntaxIssue(path=str(project.relative_to(root)), line=1, col=1, message=f"tsc did not run: {e}"))
+            continue
+        for line in result.stdout.splitlines():
+            m = _TSC_LINE.match(line.strip())
+            if not m:
+                continue
+            path = (project / m.group("file")).resolve()
+            if path in wanted:
+                issues.append(SyntaxIssue(
+                    path=path.relative_to(root).as_posix(),
+                    line=int(m.group("line")), col=int(m.group("col")),
+                    message=f"{m.group('code')}: {m.group('msg')}",
+                ))
+    return issues
+
+
+def format_issues(issues: List[SyntaxIssue], checked: int, elapsed_ms: float) -> str:
+    if not issues:
+        return f"SYNTAX OK: {checked} changed file(s) checked in {elapsed_ms:.0f} ms."
+    lines = [f"SYNTAX ERRORS ({len(issues)}) in changed files, found in {elapsed_ms:.0f} ms:"]
+    lines += [f"- {issue}" for issue in issues[:30]]
+    return "\n".join(lines)
+
+
+def _signatures(root: Path, rels: List[str]) -> Dict[str, tuple]:
+    sigs = {}
+    for rel in rels:
+        try:
+            st = (root / rel).stat()
+        except OSError:
+            continue
+        sigs[rel] = (st.st_mtime_ns, st.st_size)
+    return sigs
+
+
+class WorkingTreeBaseline:
+    """
+    The changed files (git status) of a checkout at one point in time, with their mtime and size.
+    since() lists the files changed after it: the agents' edits, not changes the checkout already had.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.files = _signatures(self.root, changed_files(self.root))
+
+    def since(self) -> List[str]:
+        return [rel for rel, sig in _signatures(self.root, changed_files(self.root)).items() if self.files.get(rel) != sig]
+
+
+def precheck(root: Path, rels: Optional[List[str]] = None, baseline: Optional[WorkingTreeBaseline] = None) -> Optional[str]:
+    """
+    In-process checks of the changed files (no tsc): an error report, or None when they parse.
+    With a `baseline`, only files changed since it are checked.
+    """
+    if rels is None:
+        rels = baseline.since() if baseline is not None else changed_files(root)
+    t0 = time.perf_counter()
+    issues = check_files(root, rels)
+    if not issues:
+        return None
+    return format_issues(issues, len(rels), (time.perf_counter() - t0) * 1000)
+
+
+class SyntaxCheckInput(BaseModel):
+    """Input schema for SyntaxCheckTool."""
+    files: Optional[List[str]] = Field(None, description="Files to check, relative to the project root. Default: every changed file (git status).")
+    typecheck: bool = Field(True, description="Also run an incremental `tsc --noEmit` for changed TypeScript files (if the project has tsc).")
+
+
+class SyntaxCheckTool(BaseTool):
+    name: str = "syntax_check_tool"
+    description: str = (
+        "Checks the syntax of the changed Java, TypeScript, Python, YAML, JSON and XML files in milliseconds "
+        "(plus an incremental tsc type check for TypeScript). Run it after editing, BEFORE build_project_tool: "
+        "it reports file:line:col of syntax errors without a full build."
+    )
+    args_schema: Type[BaseModel] = SyntaxCheckInput
+    project_path: Optional[str] = None  # defaults to PROJECT_PATH (set per workspace in batch runs)
+
+    def _run(self, files: Optional[List[str]] = None, typecheck: bool = True) -> str:
+        project_path = self.project_path or os.getenv("PROJECT_PATH")
+        if not project_path:
+            return "Error: PROJECT_PATH environment variable not set."
+        root = Path(project_path)
+        rels = [f.replace("\\", "/").lstrip("/") for f in files] if files else changed_files(root)
+        rels = [rel for rel in rels if PurePosixPath(rel).suffix.lower() in CHECKED_EXTENSIONS]
+        if not rels:
+            return "SYNTAX OK: no changed Java/TS/Python/YAML/JSON/XML files."
+
+        t0 = time.perf_counter()
+        issues = check_files(root, rels)
+        report = format_issues(issues, len(rels), (time.perf_counter() - t0) * 1000)
+        if typecheck:
+            t1 = time.perf_counter()
+            ts_issues = run_tsc(root, rels)
+            if ts_issues is not None:
+                seconds = time.perf_counter() - t1
+                report += (
+                    f"\nTYPES OK (tsc --noEmit, {seconds:.1f}s)." if not ts_issues
+                    else f"\nTYPE ERRORS (tsc --noEmit, {seconds:.1f}s):\n" + "\n".join(f"- {i}" for i in ts_issues[:30])
+                )
+        return report
@@ -0,0 +1,272 @@
+import os
+import sys
+import uuid
+import shutil
+import logging
+import threading
+import subprocess
+from pathlib import Path
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+from codeguardian.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Workspace(BaseModel):
+    """
+    Where one crew run reads its bug report and writes its changes.
+    Default: the configured PROJECT_PATH / INPUTS_PATH.
+    """
+    name: str = Field(default="default", description="Ticket / run identifier")
+    project_path: Path = Field(..., description="Checkout the agents read and modify")
+    bug_desc_path: Path = Field(..., description="Bug description file")
+    bug_log_path: Path = Field(..., description="Bug log file")
+    isolated: bool = Field(default=False, description="True if project_path is a disposable worktree")
+    base: str = Field(default="", description="Commit the worktree was checked out at (isolated workspaces)")
+
+    @classmethod
+    def default(cls) -> "Workspace":
+        return cls(
+            project_path=settings.project_path,
+            bug_desc_path=settings.bug_desc_path,
+            bug_log_path=settings.bug_log_path,
+        )
+
+
+# -------------------------
+# Git worktrees
+# -------------------------
+def _git(repo: Path, *args: str) -> str:
+    return subprocess.check_output(
+        ["git", "-C", str(repo), *args],
+        stderr=subprocess.STDOUT,
+        text=True,
+    )
+
+
+def create_worktree(repo: Path, dest: Path, ref: str = "HEAD") -> Path:
+    """
+    Creates a detached git worktree of `repo` at `dest` (checked out at `ref`).
+    Worktrees share the object store, so this only costs the checkout itself.
+    Raises FileExistsError if `dest` exists: it may hold another run's changes.
+    """
+    dest = dest.resolve()
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    dest.mkdir()  # atomic claim of the directory, git checks out into the empty dir
+    try:
+        _git(repo, "worktree", "add", "--detach", str(dest), ref)
+    except BaseException:
+        shutil.rmtree(dest, ignore_errors=True)
+        raise
+    return dest
+
+
+def remove_worktree(repo: Path, dest: Path) -> None:
+    """Removes a worktree created by create_worktree (including uncommitted changes)."""
+    try:
+        _git(repo, "worktree", "remove", "--force", str(dest))
+    except subprocess.CalledProcessError:
+        # Not registered anymore (e.g. manual delete) -> just drop the admin entry
+        _git(repo, "worktree", "prune")
+
+
+def discard_worktree(repo: Path, dest: Path) -> None:
+    """
+    O(1) removal: the worktree is renamed into the trash (same filesystem), git forgets it,
+    and the files are deleted by a background thread.
+    """
+    dest = Path(dest)
+    if not dest.exists():
+        _git(repo, "worktree", "prune")
+        return
+    trash = _trash_dir()
+    trash.mkdir(parents=True, exist_ok=True)
+    target = trash / f"{dest.name}-{uuid.uuid4().hex[:8]}"
+    try:
+        os.replace(dest, target)
+    except OSError:
+        # Different filesystem / locked files (Windows) -> regular (slow) removal
+        remove_worktree(repo, dest)
+        return
+    _git(repo, "worktree", "prune")
+    threading.Thread(target=shutil.rmtree, args=(target,), kwargs={"ignore_errors": True}, daemon=True).start()
+
+
+def empty_trash() -> None:
+    """Deletes leftovers of discard_worktree (e.g. process exited before the background delete finished)."""
+    shutil.rmtree(_trash_dir(), ignore_errors=True)
+
+
+def worktree_diff(worktree: Path) -> str:
+    """Uncommitted changes of a worktree (including new files, excluding seeded caches) as a patch."""
+    caches = tuple(f"{d}/" for d in _cache_dirs())
+    untracked = [
+        f for f in _git(worktree, "ls-files", "--others", "--exclude-standard", "-z").split("\0")
+        if f and not f.startswith(caches)
+    ]
+    if untracked:
+        _git(worktree, "add", "--intent-to-add", "--", *untracked)
+    return _git(worktree, "diff", "--binary", "HEAD")
+
+
+def workspaces_dir() -> Path:
+    return settings.workspaces_dir.resolve()
+
+
+def _trash_dir() -> Path:
+    return workspaces_dir() / ".trash"
+
+
+# -------------------------
+# Copy-on-write seeding of untracked build caches
+# -------------------------
+_FICLONE = 0x40049409  # Linux ioctl: share extents (btrfs, XFS, bcachefs, ...)
+
+
+def _reflink(src: str, dst: str) -> bool:
+    if not sys.platform.startswith("linux"):
+        return False
+    try:
+        import fcntl
+        with open(src, "rb") as fs, open(dst, "wb") as fd:
+            fcntl.ioctl(fd.fileno(), _FICLONE, fs.fileno())
+        shutil.copystat(src, dst)
+        return True
+    except (OSError, ImportError):
+        try:
+            os.unlink(dst)
+        except OSError:
+            pass
+        return False
+
+
+def clone_file(src: str, dst: str, mode: str = "auto") -> str:
+    """
+    Copies one file as cheaply as possible. Returns the method used.
+    mode:
+      - auto:     reflink, else full copy
+      - hardlink: reflink, else hardlink (fastest, but the cache files are SHARED with the main checkout)
+      - copy:     always a full copy
+    """
+    if mode != "copy" and _reflink(src, dst):
+        return "reflink"
+    if mode == "hardlink":
+        try:
+            os.link(src, dst)
+            return "hardlink"
+        except OSError:
+            pass
+    shutil.copy2(src, dst)
+    return "copy"
+
+
+def clone_tree(src: Path, dst: Path, mode: str = "auto") -> None:
+    shutil.copytree(
+        src,
+        dst,
+        symlinks=True,
+        dirs_exist_ok=True,
+        copy_function=lambda s, d: clone_file(s, d, mode),
+    )
+
+
+def _cache_dirs() -> List[str]:
+    return [d.strip().replace("\\", "/") for d in settings.workspace_cache_dirs.split(",") if d.strip()]
+
+
+def seed_build_caches(repo: Path, worktree: Path, mode: Optional[str] = None) -> List[str]:
+    """
+    Clones untracked build caches (node_modules, .gradle, ...) from the main checkout into a worktree,
+    so the first build there does not start cold. Returns the seeded directories.
+    """
+    mode = mode or settings.workspace_link_mode
+    seeded = []
+    for rel in _cache_dirs():
+        src = repo / rel
+        if not src.is_dir() or (worktree / rel).exists():
+            continue
+        clone_tree(src, worktree / rel, mode)
+        seeded.append(rel)
+    return seeded
+
+
+# -------------------------
+# Workspaces
+# -------------------------
+def open_workspace(name: str, bug_desc_path: Path, bug_log_path: Path, ref: str = "HEAD") -> Workspace:
+    """
+    Isolated workspace for one run: a git worktree of PROJECT_PATH (at `ref`) seeded with the build caches.
+    The RAG index is not copied: all workspaces share the one built for PROJECT_PATH (read-only,
+    search results are repo-relative).
+    If a worktree named `name` exists (a kept worktree, another run), the workspace is named `name-2`, `name-3`, ...
+    """
+    repo = settings.project_path
+    base, n = name, 1
+    while True:
+        try:
+            worktree = create_worktree(repo, workspaces_dir() / name, ref)
+            break
+        except FileExistsError:
+            n += 1
+            name = f"{base}-{n}"
+    seeded = seed_build_caches(repo, worktree)
+    if seeded:
+        logger.info("Workspace %s: seeded %s", name, ", ".join(seeded))
+    return Workspace(
+        name=name,
+        project_path=worktree,
+        bug_desc_path=bug_desc_path,
+        bug_log_path=bug_log_path,
+        isolated=True,
+        base=_git(worktree, "rev-parse", "HEAD").strip(),
+    )
+
+
+def save_workspace_changes(ws: Workspace, patch: str, directory: Path) -> None:
+    """Base commit and changes of a finished worktree run (<directory>/workspace.{base,patch}), see resume_workspace."""
+    if not ws.isolated:
+        return
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / "workspace.patch").write_text(patch, encoding="utf-8")
+    (directory / "workspace.base").write_text(ws.base, encoding="utf-8")
+
+
+def resume_workspace(name: str, directory: Path, bug_desc_path: Path, bug_log_path: Path) -> Workspace:
+    """
+    Workspace of a resumed run: the previous run's worktree, rebuilt at its base commit with its saved changes
+    (save_workspace_changes), so the resumed tasks see the files the earlier tasks wrote.
+    """
+    base, patch = directory / "workspace.base", directory / "workspace.patch"
+    if not base.is_file():
+        raise ValueError(
+            f"Cannot resume in WORKSPACE_MODE=worktree: no saved worktree changes in {directory} "
+            "(the previous run did not use a worktree). Run without RESUME_FROM."
+        )
+    ws = open_workspace(name, bug_desc_path, bug_log_path, ref=base.read_text(encoding="utf-8").strip())
+    changes = patch.read_text(encoding="utf-8") if patch.is_file() else ""
+    if changes.strip():
+        try:
+            subprocess.run(
+                ["git", "-C", str(ws.project_path), "apply", "--binary", "--whitespace=nowarn", "-"],
+                input=changes, text=True, capture_output=True, check=True,
+            )
+        except subprocess.CalledProcessError:
+            close_workspace(ws)
+            raise
+        logger.info("Workspace %s: restored the changes of the previous run", ws.name)
+    return ws
+
+
+def close_workspace(ws: Workspace, keep: bool = False) -> str:
+    """Returns the workspace changes as a patch and discards the worktree (unless keep=True)."""
+    if not ws.isolated:
+        return ""
+    try:
+        patch = worktree_diff(ws.project_path)
+    finally:
+        if not keep:
+            discard_worktree(settings.project_path, ws.project_path)
+    return patch
@@ -0,0 +1,33 @@
+import pytest
+
+
+class FakeEmbedder:
+    """
+    Deterministic stand-in for OllamaEmbedder (no server): vectors from keywords and the text length,
+    `dim` values long. Records the texts of embed_many (indexing / sync), not single query embeddings,
+    and the size of each embed_many request.
+    """
+
+    def __init__(self, model="fake-embed", dim=4):
+        self.model, self.dim = model, dim
+        self.embedded = []
+        self.requests = []
+
+    def vector(self, text):
+        lower = text.lower()
+        head = [float("junit" in lower), float("jasmine" in lower), float(text.count("class")), 1.0]
+        return (head + [float(len(text) % (i + 2)) + 1.0 for i in range(max(0, self.dim - len(head)))])[: self.dim]
+
+    def embed(self, text):
+        return self.vector(text)
+
+    def embed_many(self, texts):
+        self.embedded.extend(texts)
+        self.requests.append(len(texts))
+        return [self.vector(t) for t in texts]
+
+
+@pytest.fixture
+def fake_embedder():
+    """The FakeEmbedder class (tests construct as many as they need)."""
+    return FakeEmbedder
@@ -0,0 +1,86 @@
+import json
+import subprocess
+from types import SimpleNamespace
+
+from codeguardian import batch
+from codeguardian.batch import load_tickets
+from codeguardian.config.settings import settings
+
+
+def test_jsonl_tickets_are_materialized(tmp_path):
+    src = tmp_path / "tickets.jsonl"
+    src.write_text(
+        json.dumps({"id": "BUG 1", "description": "NPE on /orders", "log": "at Foo.bar(Foo.java:1)"}) + "\n\n"
+        + json.dumps({"description": "no id"}) + "\n",
+        encoding="utf-8",
+    )
+    tickets = load_tickets(src, tmp_path / "out")
+    assert [t.id for t in tickets] == ["BUG_1", "ticket-3"]
+    assert tickets[0].bug_desc_path.read_text(encoding="utf-8") == "NPE on /orders"
+    assert tickets[0].bug_log_path.read_text(encoding="utf-8") == "at Foo.bar(Foo.java:1)"
+
+def test_directory_tickets_need_a_description(tmp_path):
+    (tmp_path / "T-1").mkdir()
+    (tmp_path / "T-1" / "bug-desc.txt").write_text("desc", encoding="utf-8")
+    (tmp_path / "empty").mkdir()
+    tickets = load_tickets(tmp_path, tmp_path / "out")
+    assert [t.id for t in tickets] == ["T-1"]
+
+def test_colliding_ids_get_a_suffix(tmp_path):
+    src = tmp_path / "tickets.jsonl"
+    src.write_text(
+        "\n".join(json.dumps({"id": i, "description": i}) for i in ("a/b", "a_b", "a/b", "A_B")) + "\n",
+        encoding="utf-8",
+    )
+    tickets = load_tickets(src, tmp_path / "out")
+    assert [t.id for t in tickets] == ["a_b", "a_b-2", "a_b-3", "A_B-4"]
+    assert [t.bug_desc_path.read_text(encoding="utf-8") for t in tickets] == ["a/b", "a_b", "a/b", "A_B"]
+
+
+def test_run_batch_runs_each_ticket_in_its_own_worktree(tmp_path, monkeypatch):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    git = ["git", "-C", str(repo), "-c", "user.email=t@t", "-c", "user.name=t"]
+    subprocess.run(git + ["init", "-q"], check=True)
+    (repo / "App.java").write_text("class App {}\n", encoding="utf-8")
+    subprocess.run(git + ["add", "."], check=True)
+    subprocess.run(git + ["commit", "-qm", "init"], check=True)
+    monkeypatch.setattr(settings, "project_path", repo)
+    monkeypatch.setattr(settings, "workspaces_dir", tmp_path / "ws")
+    monkeypatch.setattr(settings, "resume_from", "implementation")
+
+    class StubCrew:
+        def __init__(self, workspace, check_index, resume_from):
+            assert resume_from == ""  # RESUME_FROM would skip tasks the fresh worktree never saw
+            self.ws = workspace
+
+        def crew(self):
+            return self
+
+        def kickoff(self):
+            desc = self.ws.bug_desc_path.read_text(encoding="utf-8")
+            if desc == "boom":
+                raise RuntimeError("agent failed")
+            (self.ws.project_path / "App.java").write_text(f"class App {{ /* {desc} */ }}\n", encoding="utf-8")
+            return SimpleNamespace(raw=f"fixed {desc}", token_usage=SimpleNamespace(total_tokens=10))
+
+    monkeypatch.setattr(batch, "Codeguardian", StubCrew)
+    monkeypatch.setattr(batch, "ensure_repo_indexed", lambda: "Index up to date.")
+    for name in ("directory_search_tool", "knowledge_store", "ollama_scheduler"):
+        monkeypatch.setattr(batch, name, lambda: None)
+
+    src = tmp_path / "tickets.jsonl"
+    src.write_text(
+        "\n".join(json.dumps({"id": i, "description": d}) for i, d in (("T/1", "one"), ("T_1", "two"), ("T-3", "boom"))),
+        encoding="utf-8",
+    )
+    out = tmp_path / "out"
+    summary = batch.run_batch(src, out, workers=3)
+
+    assert (summary["tickets"], summary["succeeded"], summary["failed"], summary["total_tokens"]) == (3, 2, 1, 20)
+    assert [(r["id"], r["status"]) for r in summary["results"]] == [("T-3", "failed"), ("T_1", "success"), ("T_1-2", "success")]
+    assert "+class App { /* one */ }" in (out / "T_1" / "changes.patch").read_text(encoding="utf-8")
+    assert "+class App { /* two */ }" in (out / "T_1-2" / "changes.patch").read_text(encoding="utf-8")
+    assert (out / "T_1-2" / "result.md").read_text(encoding="utf-8") == "fixed two"
+    assert json.loads((out / "summary.json").read_text(encoding="utf-8"))["failed"] == 1
+    assert (repo / "App.java").read_text(encoding="utf-8") == "class App {}\n"
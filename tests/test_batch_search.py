@@ -0,0 +1,54 @@
+from codeguardian.tools.batch_search_tool import RagBatchSearchTool
+from codeguardian.tools.local_rag_tool import LocalDirectoryRagTool
+
+
+def _rag(tmp_path, fake_embedder, **kwargs):
+    repo = tmp_path / "repo"
+    (repo / "src").mkdir(parents=True)
+    (repo / "src" / "OrderService.java").write_text("class OrderService { int total() { return 0; } }\n", encoding="utf-8")
+    (repo / "src" / "OrderServiceTest.java").write_text("import org.junit.Test;\nclass OrderServiceTest {}\n", encoding="utf-8")
+    tool = LocalDirectoryRagTool(directory=str(repo), persist_directory=str(tmp_path / ".chroma"), max_per_path=1, **kwargs)
+    tool._embedder = fake_embedder()
+    tool.index_paths(include_globs=["src/**"])
+    tool._embedder.requests.clear()
+    return tool
+
+
+def test_query_embeddings_are_batched_and_cached(tmp_path, fake_embedder):
+    rag = _rag(tmp_path, fake_embedder)
+    embs = rag._embed_queries(["order total", "junit test", "order total"])
+    assert rag._embedder.requests == [2]  # one request for the distinct misses
+    assert embs[0] == embs[2] == rag._embedder.vector("order total")
+
+    results = rag.search_many(["order total", "junit test", "class"], k=2)
+    assert rag._embedder.requests == [2]  # "class" alone: a single embed, the others cached
+    assert [len(hits) for hits in results] == [2, 2, 2]
+    assert results[1][0].path.endswith("OrderServiceTest.java")  # the junit keyword
+    assert rag.search_many([], k=2) == []
+
+
+def test_batch_search_dedupes_queries_and_repeated_chunks(tmp_path, fake_embedder, monkeypatch):
+    rag = _rag(tmp_path, fake_embedder)
+    calls = []
+    search_many = LocalDirectoryRagTool.search_many
+    monkeypatch.setattr(
+        LocalDirectoryRagTool, "search_many",
+        lambda self, queries, k, scope: calls.append(list(queries)) or search_many(self, queries, k, scope),
+    )
+
+    out = RagBatchSearchTool(rag)._run(queries=["order total", " order total ", "junit test", ""], k=2)
+    assert calls == [["order total", "junit test"]]
+    assert out.count("## Query") == 2 and '## Query 2: "junit test"' in out
+    # Both queries hit both files: the second query only references them
+    assert out.count("### 2.") == 2 and out.count("same as 1.") == 2
+    files = out.split("DISTINCT FILES:\n")[1].split("\n")
+    assert sorted(files) == ["- src/OrderService.java", "- src/OrderServiceTest.java"]
+    assert RagBatchSearchTool(rag)._run(queries=[" "]) == "No queries."
+
+
+def test_unknown_profiles_are_rejected_by_both_search_tools(tmp_path, fake_embedder):
+    rag = _rag(tmp_path, fake_embedder, profiles={"backend": (["src/**"], [])})
+    expected = "Unknown profile 'backnd'. Available: backend."
+    assert RagBatchSearchTool(rag)._run(queries=["order total"], profile="backnd") == expected
+    assert rag._run("order total", profile="backnd") == expected
+    assert "OrderService.java" in RagBatchSearchTool(rag)._run(queries=["order total"], profile="backend")
@@ -0,0 +1,66 @@
+import requests
+
+from codeguardian import benchmark
+from codeguardian.benchmark import ScriptedLLMServer, make_synthetic_project, reset_project
+from codeguardian.config.settings import settings
+from codeguardian.tools.build_tools import BuildTool
+
+TRANSCRIPT = {"scripts": [{"task": "plan", "match": "You are the Planner", "turns": [
+    {"tool": "Project File Reader", "input": {"file_path": "A.java"}},
+    {"final": "PLAN"},
+]}]}
+
+
+def test_server_replays_turns_per_task_and_counts():
+    with ScriptedLLMServer(TRANSCRIPT) as server:
+        def chat(*messages, **extra):
+            body = {"model": "x", "messages": list(messages), **extra}
+            return requests.post(f"{server.url}/v1/chat/completions", json=body).json()["choices"][0]
+
+        task = {"role": "user", "content": "You are the Planner. Plan it."}
+        first = chat(task)["message"]["content"]
+        assert first.splitlines()[1:] == ["Action: Project File Reader", 'Action Input: {"file_path": "A.java"}']
+        done = chat(task, {"role": "assistant", "content": first + "\nObservation: class A {}"})
+        assert done["message"]["content"].endswith("Final Answer: PLAN")
+
+        native = chat(task, tools=[{"type": "function", "function": {"name": "project_file_reader", "parameters": {}}}])
+        assert native["finish_reason"] == "tool_calls" and native["message"]["tool_calls"][0]["function"]["name"] == "project_file_reader"
+        assert chat({"role": "user", "content": "Something else"})["message"]["content"].endswith("Final Answer: Done.")
+
+        vectors = requests.post(f"{server.url}/v1/embeddings", json={"input": ["order total", "order total"]}).json()["data"]
+        assert vectors[0]["embedding"] == vectors[1]["embedding"] and len(vectors[0]["embedding"]) == 64
+
+    stats = server.tasks["plan"]
+    assert (stats.requests, stats.tool_calls) == (3, {"Project File Reader": 2})
+    assert stats.max_prompt_tokens > 10 and server.tasks["(unmatched)"].requests == 1
+    assert server.embedded_texts == 2
+
+
+def test_synthetic_project_builds_and_resets(tmp_path):
+    project = make_synthetic_project(tmp_path, services=3, build_seconds=0)
+    assert "OrderService.total(OrderService.java:14)" in project.bug_log
+    service = project.project_path / project.service_path
+    assert service.read_text(encoding="utf-8").splitlines()[13].strip().startswith("return orders.stream()")
+
+    assert BuildTool(project_path=str(project.project_path))._run().startswith("BUILD SUCCESS")
+    service.write_text("changed", encoding="utf-8")
+    (project.project_path / "New.java").write_text("class New {}", encoding="utf-8")
+    reset_project(project)
+    assert "class OrderService" in service.read_text(encoding="utf-8")
+    assert not (project.project_path / "New.java").exists()
+
+
+def test_benchmark_ignores_the_developers_cache_and_resume_settings(tmp_path, monkeypatch):
+    project = make_synthetic_project(tmp_path, services=1, build_seconds=0)
+    for name, value in settings.model_dump().items():
+        monkeypatch.setattr(settings, name, value)  # restored after the test
+    monkeypatch.setattr(settings, "llm_cache", True)
+    monkeypatch.setattr(settings, "resume_from", "implementation")
+    for name in ("PROJECT_PATH", "INPUTS_PATH", "CREWAI_TRACING_ENABLED", "ANONYMIZED_TELEMETRY",
+                 "CREWAI_DISABLE_TELEMETRY", "OTEL_SDK_DISABLED"):
+        monkeypatch.setenv(name, "unchanged")
+
+    benchmark._configure(project, tmp_path / "work", "http://127.0.0.1:1")
+    assert not settings.llm_cache and settings.resume_from == ""
+    assert settings.runs_dir == tmp_path / "work" / "runs"
+    assert settings.llm_cache_dir == tmp_path / "work" / "llm_cache"
@@ -0,0 +1,47 @@
+from codeguardian.tools.chunk_store import ChunkRefs, chunk_id
+
+
+def test_chunk_refs_track_shared_chunks(tmp_path):
+    refs = ChunkRefs(tmp_path / "chunks.sqlite")
+    header, body_a, body_b = chunk_id("// generated header"), chunk_id("a"), chunk_id("b")
+    assert chunk_id("// generated header") == header != body_a
+
+    refs.set_file("web/a.ts", "1:10", [header, body_a])
+    refs.set_file("web/b.ts", "1:10", [header, body_b])
+    assert refs.paths(header) == [("web/a.ts", 0), ("web/b.ts", 0)]
+    assert refs.stats() == {"files": 2, "chunk_refs": 4, "unique_chunks": 3}
+    assert refs.file_sig("web/a.ts") == "1:10" and refs.file_sig("web/c.ts") is None
+
+    # a.ts changes: its old body is no longer referenced, the shared header still is
+    refs.set_file("web/a.ts", "2:12", [header, chunk_id("a2")])
+    assert refs.referenced([header, body_a]) == {header}
+
+    refs.remove_file("web/b.ts")
+    assert refs.paths(header) == [("web/a.ts", 0)]
+    assert refs.hashes_of("web/a.ts") == [header, chunk_id("a2")]
+
+
+def test_chunk_texts_read_ranges_and_detect_changes(tmp_path):
+    from codeguardian.tools.chunk_text import ChunkTexts
+    from codeguardian.tools.chunking import ChunkProfile, byte_ranges
+    from codeguardian.tools.git_blobs import decode_text, git_blob_sha
+
+    raw = "  // Grüße\r\nclass A {\r\n  void run() {}\r\n}\r\n".encode("utf-8")
+    (tmp_path / "A.java").write_bytes(raw)
+    text = decode_text(raw)
+    profile = ChunkProfile(chunk_chars=16, overlap=4)
+    spans = profile.spans(text)
+    chunks = [text[s:e] for s, e in spans]
+    assert chunks == profile.split(text)
+
+    refs = ChunkRefs(tmp_path / "chunks.sqlite")
+    hashes = [chunk_id(c) for c in chunks]
+    refs.set_file("A.java", f"{git_blob_sha(raw)}:x", hashes, ranges=byte_ranges(text, spans))
+    texts = ChunkTexts(tmp_path, refs)
+    assert [texts.read(h, "A.java", i) for i, h in enumerate(hashes)] == [(c, False) for c in chunks]
+
+    (tmp_path / "A.java").write_bytes(raw.replace(b"run", b"go!"))
+    assert texts.read(hashes[1], "A.java", 1)[1] is True  # stale: shows the current text
+    (tmp_path / "A.java").unlink()
+    assert texts.read(hashes[1], "A.java", 1) == (None, True)  # not in git
+    texts.close()
@@ -0,0 +1,45 @@
+import json
+from types import SimpleNamespace
+
+from codeguardian.config.settings import settings
+from codeguardian.tools import chunk_tuning
+from codeguardian.tools.chunk_tuning import evaluate, tune_chunking
+
+
+def test_evaluate_scores_recall_hit_and_mrr():
+    ranking = {
+        "npe": [("src/A.java", ["src/B.java"]), ("src/C.java", [])],
+        "total": [("src/C.java", []), ("src/D.java", [])],
+    }
+    tool = SimpleNamespace(
+        search=lambda query, k: [SimpleNamespace(path=f"/repo/{p}", also=also) for p, also in ranking[query][:k]],
+        display_path=lambda path: path[len("/repo/"):],
+    )
+    cases = [{"query": "npe", "relevant": ["src/B.java", "src/X.java"]}, {"query": "total", "relevant": ["src\\D.java"]}]
+    # npe: B found at rank 2 (via "also"), X missing; total: D at rank 2
+    assert evaluate(tool, cases, k=2) == {"recall": 0.75, "hit": 1.0, "mrr": 0.5}
+    assert evaluate(tool, cases, k=1) == {"recall": 0.25, "hit": 0.5, "mrr": 0.25}
+
+
+def test_tune_chunking_reports_cost_and_quality_per_candidate(tmp_path, monkeypatch, fake_embedder):
+    repo = tmp_path / "repo"
+    (repo / "src/main/java").mkdir(parents=True)
+    body = "".join(f"    int f{i}() {{ return {i}; }}\n" for i in range(60))
+    (repo / "src/main/java/OrderService.java").write_text(f"class OrderService {{\n{body}}}\n", encoding="utf-8")
+    (repo / "src/main/java/OrderTest.java").write_text("// junit\nclass OrderTest {}\n", encoding="utf-8")
+    monkeypatch.setattr(settings, "project_path", repo)
+    inner = fake_embedder()
+    monkeypatch.setattr(chunk_tuning, "OllamaEmbedder", lambda *a, **k: inner)
+    corpus = tmp_path / "bench.jsonl"
+    corpus.write_text(json.dumps({"query": "junit test", "relevant": ["src/main/java/OrderTest.java"]}) + "\n", encoding="utf-8")
+
+    current, small = tune_chunking(corpus, k=1, names=["small", "current"])
+    assert (current["candidate"], small["candidate"]) == ("current", "small")
+    assert current["files"] == small["files"] == 2
+    assert small["chunks"] > current["chunks"] and small["chunks_by_ext"] == {".java": small["chunks"]}
+    assert (current["embedded_chunks"], small["embedded_chunks"]) == (current["chunks"], small["chunks"])
+    assert current["embedded_chars"] > len(body)
+    assert current["recall"] == current["hit"] == current["mrr"] == 1.0
+    # The vector cache is shared: a chunk both candidates produce is embedded once
+    assert inner.embedded.count("// junit\nclass OrderTest {}") == 1
+    assert len(inner.embedded) == len(set(inner.embedded))
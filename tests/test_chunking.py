@@ -0,0 +1,36 @@
+from codeguardian.tools.chunking import ChunkingConfig, ChunkProfile
+from codeguardian.tools.local_rag_tool import LocalDirectoryRagTool
+
+
+def test_extension_profiles_cap_and_skip_bulk_files():
+    cfg = ChunkingConfig.from_config(
+        {"default": {"chunk_chars": 100, "overlap": 10}, "extensions": {"json": {"max_chunks": 3, "skip_above_bytes": 10_000}}},
+        default=ChunkProfile(chunk_chars=1800, overlap=200),
+    )
+    java, json_ = cfg.for_path("src/A.java"), cfg.for_path("data/Fixtures.JSON")
+    assert (java.chunk_chars, java.max_chunks) == (100, 0)
+    assert (json_.chunk_chars, json_.overlap, json_.max_chunks) == (100, 10, 3)
+    assert java.fingerprint() != json_.fingerprint()
+
+    text = "".join(f"line {i:04d}\n" for i in range(200))  # ~2000 chars -> 23 chunks
+    assert len(java.chunk(text)) == len(java.split(text)) > 3
+    positions = [pos for pos, _ in json_.chunk(text)]
+    assert positions == [0, len(json_.split(text)) // 2, len(json_.split(text)) - 1]  # head, middle, tail
+    assert json_.skips(20_000) and not json_.skips(5_000) and not java.skips(10**9)
+
+
+def test_file_growing_past_the_skip_limit_loses_its_symbols(tmp_path, fake_embedder):
+    repo = tmp_path / "repo"
+    (repo / "src").mkdir(parents=True)
+    data = repo / "src" / "Data.java"
+    data.write_text("class Data {}\n", encoding="utf-8")
+    cfg = ChunkingConfig.from_config({"extensions": {".java": {"skip_above_bytes": 1000}}}, default=ChunkProfile(chunk_chars=400, overlap=0))
+    tool = LocalDirectoryRagTool(directory=str(repo), persist_directory=str(tmp_path / ".chroma"), chunking=cfg)
+    tool._embedder = fake_embedder()
+    tool.index_paths(include_globs=["src/**"])
+    assert [s.path for s in tool.symbols.lookup("Data")] == ["src/Data.java"]
+
+    data.write_text("class Bulk {}\n" + "// row\n" * 400, encoding="utf-8")
+    tool.index_paths(include_globs=["src/**"])
+    assert tool.symbols.lookup("Data") == [] and tool.symbols.lookup("Bulk") == []
+    assert tool.chunks_per_file() == {"src/Data.java": 0}
@@ -0,0 +1,71 @@
+from crewai.tasks.task_output import TaskOutput
+
+from codeguardian.context_budget import ContextCompressor, compress_output, compress_text
+from codeguardian.context_pack import estimate_tokens
+
+PLAN = '---PATCH_PLAN_JSON_START---\n{"target_files": [{"path": "src/main/java/a/OrderService.java"}]}\n---PATCH_PLAN_JSON_END---'
+DESIGN = "ROOT CAUSE ANALYSIS\n" + "".join(f"{i}. The total is computed from a null list.\n" for i in range(200)) + PLAN + "\nCHANGE PLAN\n- guard the list\n"
+IMPLEMENTATION = """IMPLEMENTATION SUMMARY
+- Technical Design Approach: null guard
+- Changed files:
+  - src/main/java/a/OrderService.java: null check
+  - src/test/java/a/OrderServiceTest.java: new test
+- Test Strategy
+""" + "".join(f"Edge case {i} considered.\n" for i in range(200))
+BUILD = """BUILD REPORT
+- Status: FAILURE
+- Build Logs (snippet)
+```
+""" + "\n".join(f"> Task :compile{i}" for i in range(100)) + """
+OrderServiceTest > totalOfEmptyOrders() FAILED
+```
+- Test Results
+[ERROR] Tests run: 3, Failures: 1, Errors: 0, Skipped: 0
+"""
+
+
+def _out(name, raw):
+    return TaskOutput(description=name, name=name, raw=raw, agent="x")
+
+
+def test_structured_parts_survive_compression():
+    design = compress_output(_out("analysis_and_design", DESIGN), 150)
+    assert PLAN in design and design.startswith("OUTPUT OF analysis_and_design")
+    assert "ROOT CAUSE ANALYSIS" in design and "guard the list" in design and estimate_tokens(design) <= 160
+
+    impl = compress_output(_out("implementation", IMPLEMENTATION), 120)
+    assert "CHANGED FILES:\n- src/main/java/a/OrderService.java\n- src/test/java/a/OrderServiceTest.java" in impl
+
+    build = compress_output(_out("build_and_test", BUILD), 150)
+    assert "STATUS: FAILURE" in build
+    assert "FAILING TESTS:\n- OrderServiceTest > totalOfEmptyOrders() FAILED\n- Tests run: 3, Failures: 1" in build
+    assert "[... 89 lines omitted ...]" in compress_text(BUILD, 1000)
+
+
+def test_small_outputs_pass_unchanged_and_give_their_share_to_large_ones():
+    compressor = ContextCompressor(600)
+    plan, design = _out("qa_test_plan", "QA TEST PLAN\n- AC1"), _out("analysis_and_design", DESIGN)
+    assert compressor([plan]) == "QA TEST PLAN\n- AC1"
+    context = compressor([design, plan])
+    first, second = context.split("\n\n----------\n\n")
+    assert second == "QA TEST PLAN\n- AC1" and PLAN in first
+    assert 500 < estimate_tokens(first) <= 600
+
+
+def test_over_budget_structured_parts_drop_failing_tests_then_changed_files(caplog):
+    files = "".join(f"  - src/main/java/a/Service{i}.java: change\n" for i in range(30))
+    tests = "".join(f"OrderServiceTest > case{i}() FAILED\n" for i in range(20))
+    raw = "BUILD REPORT\n- Status: FAILURE\n- Changed files:\n" + files + "```\n" + tests + "```\n" + "noise\n" * 400
+    out = compress_output(_out("build_and_test", raw), 200)
+    assert estimate_tokens(out) <= 200
+    # Every failing test is cut before the first changed file
+    assert "STATUS: FAILURE" in out and "FAILING TESTS:\n- ... 20 more" in out
+    assert "Service0.java" in out and "Service29.java" not in out and "CHANGED FILES:" in out
+
+    out = compress_output(_out("build_and_test", raw), 500)
+    assert estimate_tokens(out) <= 500 and "case0()" in out and "Service29.java" in out
+
+    # The patch plan is never cut: logged instead
+    big_plan = PLAN.replace('"}]', '"}' + ', {"path": "x"}' * 200 + "]")
+    out = compress_output(_out("analysis_and_design", DESIGN.replace(PLAN, big_plan)), 100)
+    assert big_plan in out and "over its budget" in caplog.text
@@ -0,0 +1,69 @@
+from codeguardian.context_pack import ContextPacker, parse_stack_frames, enclosing_method
+
+LOG = """\
+2024-05-02 ERROR o.a.c.c.C.[.[.[/].[dispatcherServlet] Servlet.service() threw exception
+java.lang.NullPointerException: Cannot invoke "String.trim()" because "name" is null
+\tat com.acme.orders.OrderService.normalize(OrderService.java:9)
+\tat com.acme.orders.OrderService.create(OrderService.java:4)
+\tat com.acme.orders.OrderController.post(OrderController.java:3)
+\tat org.springframework.web.servlet.FrameworkServlet.service(FrameworkServlet.java:897)
+\tat java.base/java.lang.Thread.run(Thread.java:833)
+"""
+
+SERVICE = """\
+package com.acme.orders;
+public class OrderService {
+    public Order create(String name) {
+        return new Order(normalize(name));
+    }
+
+    private String normalize(String name) {
+        // "{" in a comment must not confuse brace matching
+        return name.trim();
+    }
+}
+"""
+
+CONTROLLER = """\
+package com.acme.orders;
+public class OrderController {
+    public Order post(String n) { return service.create(n); }
+}
+"""
+
+
+def _project(tmp_path):
+    pkg = tmp_path / "src" / "main" / "java" / "com" / "acme" / "orders"
+    pkg.mkdir(parents=True)
+    (pkg / "OrderService.java").write_text(SERVICE, encoding="utf-8")
+    (pkg / "OrderController.java").write_text(CONTROLLER, encoding="utf-8")
+    return [pkg / "OrderService.java", pkg / "OrderController.java"]
+
+def test_parse_frames_java_js_python():
+    frames = parse_stack_frames(
+        LOG
+        + "    at OrderComponent.load (src/app/order.component.ts:42:13)\n"
+        + '  File "app/service.py", line 12, in handle\n'
+    )
+    assert [f.method for f in frames][:3] == ["normalize", "create", "post"]
+    assert frames[0].file == "OrderService.java" and frames[0].line == 9
+    assert (frames[-2].file, frames[-2].line, frames[-2].method) == ("src/app/order.component.ts", 42, "load")
+    assert (frames[-1].file, frames[-1].line, frames[-1].method) == ("app/service.py", 12, "handle")
+
+def test_enclosing_method_uses_braces():
+    lines = SERVICE.splitlines()
+    assert enclosing_method(lines, 9, "normalize") == (6, 9)
+    assert enclosing_method(lines, None, "create") == (2, 4)
+
+def test_pack_resolves_frames_and_skips_libraries(tmp_path):
+    packer = ContextPacker(tmp_path, _project(tmp_path), max_tokens=2000)
+    pack = packer.pack(LOG)
+    assert "### src/main/java/com/acme/orders/OrderService.java:7-10" in pack
+    assert "### src/main/java/com/acme/orders/OrderController.java:3-3" in pack
+    assert "FrameworkServlet" not in pack
+    assert pack.index("normalize") < pack.index("OrderController")
+
+def test_pack_respects_budget(tmp_path):
+    packer = ContextPacker(tmp_path, _project(tmp_path), max_tokens=120)
+    pack = packer.pack(LOG)
+    assert 0 < len(pack) // 4 <= 120
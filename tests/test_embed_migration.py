@@ -0,0 +1,30 @@
+from codeguardian.tools.local_rag_tool import LocalDirectoryRagTool, collection_name_for
+
+
+def test_collections_per_model_and_vector_reuse(tmp_path, fake_embedder):
+    repo = tmp_path / "repo"
+    (repo / "src").mkdir(parents=True)
+    for name in ("A", "B"):
+        (repo / "src" / f"{name}.java").write_text(f"class {name} {{}}\n", encoding="utf-8")
+    assert collection_name_for("codeguardian", "nomic-embed-text:latest") == "codeguardian-nomic-embed-text-latest"
+
+    def build(gen, model, dim):
+        embedder = fake_embedder(model, dim)
+        tool = LocalDirectoryRagTool(directory=str(repo), persist_directory=str(tmp_path / gen), embed_model=model, embedder=embedder)
+        return tool, embedder
+
+    small, small_emb = build("gen-1", "small", 8)
+    small.index_paths(include_globs=["src/**"])
+    assert (small.embed_dim, len(small_emb.embedded)) == (8, 2)
+
+    # Another model: own collection and dimension, nothing to copy from the old generation
+    big, big_emb = build("gen-2", "big", 12)
+    assert not big.reuse_vectors_from(small)
+    big.index_paths(include_globs=["src/**"])
+    assert (big.embed_dim, len(big_emb.embedded)) == (12, 2)
+
+    # Same model again (e.g. rolling back the migration): vectors are copied, not re-embedded
+    again, again_emb = build("gen-3", "small", 8)
+    assert again.reuse_vectors_from(small)
+    again.index_paths(include_globs=["src/**"])
+    assert again_emb.embedded == [] and again.index_stats()["stored_chunks"] == 2
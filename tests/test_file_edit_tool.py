@@ -0,0 +1,88 @@
+import pytest
+
+from codeguardian.tools import file_edit_tool
+from codeguardian.tools.file_edit_tool import ProjectFileEditTool, resolve_project_file
+
+JAVA = "".join(f"    int f{i}() {{ return {i}; }}\n" for i in range(1, 41))
+
+
+def test_diff_applies_with_offset_and_whitespace_fuzz(tmp_path):
+    path = tmp_path / "src/A.java"
+    path.parent.mkdir()
+    path.write_bytes(("class A {\r\n" + JAVA + "}\r\n").replace("\n", "\r\n").replace("\r\r\n", "\r\n").encode())
+    tool = ProjectFileEditTool(project_path=str(tmp_path))
+
+    # Header says line 10, the lines are at 21-23; context indentation is off
+    diff = (
+        "--- a/src/A.java\n+++ b/src/A.java\n@@ -10,3 +10,3 @@\n"
+        "  int f20() { return 20; }\n-    int f21() { return 21; }\n+    int f21() { return -21; }\n"
+        "     int f22() { return 22; }\n"
+    )
+    out = tool._run(diff=diff)
+    assert out.startswith("Edited src/A.java: +1 -1 lines") and "applied at line 21" in out
+    text = path.read_bytes().decode()
+    assert "return -21;" in text and "return 21;" not in text
+    assert text.count("\r\n") == text.count("\n")  # CRLF kept
+
+
+def test_search_replace_conflicts_write_nothing(tmp_path):
+    path = tmp_path / "A.java"
+    path.write_text("class A {\n" + JAVA + "}\n", encoding="utf-8")
+    before = path.read_text(encoding="utf-8")
+    tool = ProjectFileEditTool(project_path=str(tmp_path))
+
+    out = tool._run(file_path="A.java", edits=[
+        {"search": "int f1() { return 1; }", "replace": "int f1() { return 100; }"},
+        {"search": "int f7() { return 8; }", "replace": "x"},
+    ])
+    assert out.startswith("Conflict:") and "Closest region: lines 8-8" in out and "int f7() { return 7; }" in out
+    assert path.read_text(encoding="utf-8") == before
+
+    assert "ambiguous" in tool._run(file_path="A.java", edits=[{"search": "return", "replace": "x"}])
+    assert "outside project path" in tool._run(file_path="../B.java", edits=[{"search": "", "replace": "x"}])
+
+    out = tool._run(file_path="A.java", edits=[{"search": "    int f3() { return 3; }\n", "replace": ""}])
+    assert out.startswith("Edited A.java: +0 -1 lines")
+    assert tool._run(file_path="new/B.java", edits=[{"search": "", "replace": "class B {}"}]).startswith("Edited")
+    assert (tmp_path / "new/B.java").read_text(encoding="utf-8") == "class B {}\n"
+
+
+def test_multi_file_diffs_are_all_or_nothing(tmp_path, monkeypatch):
+    (tmp_path / "A.java").write_text("class A {\n    int a;\n}\n", encoding="utf-8")
+    (tmp_path / "B.java").write_text("class B {\n    int b;\n}\n", encoding="utf-8")
+    tool = ProjectFileEditTool(project_path=str(tmp_path))
+    a_diff = "--- a/A.java\n+++ b/A.java\n@@ -2,1 +2,1 @@\n-    int a;\n+    long a;\n"
+    b_diff = "--- a/B.java\n+++ b/B.java\n@@ -2,1 +2,1 @@\n-    int b;\n+    long b;\n"
+
+    # The second file does not apply: the first one is not written either
+    assert tool._run(diff=a_diff + b_diff.replace("int b", "int c")).startswith("Conflict:")
+    assert "int a;" in (tmp_path / "A.java").read_text(encoding="utf-8")
+
+    # A rename failing halfway restores the files already replaced
+    real_replace, calls = file_edit_tool.os.replace, []
+
+    def replace(src, dst):
+        calls.append(dst)
+        if len(calls) == 2:
+            raise OSError("disk full")
+        real_replace(src, dst)
+
+    monkeypatch.setattr(file_edit_tool.os, "replace", replace)
+    assert "disk full" in tool._run(diff=a_diff + b_diff)
+    monkeypatch.undo()
+    assert "int a;" in (tmp_path / "A.java").read_text(encoding="utf-8")
+    assert "int b;" in (tmp_path / "B.java").read_text(encoding="utf-8")
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["A.java", "B.java"]  # no temp files left
+
+    # Two patches of one file: the second applies to the result of the first
+    second = "--- a/A.java\n+++ b/A.java\n@@ -2,1 +2,1 @@\n-    long a;\n+    double a;\n"
+    assert tool._run(diff=a_diff + second).count("Edited A.java") == 2
+    assert "double a;" in (tmp_path / "A.java").read_text(encoding="utf-8")
+
+
+def test_absolute_paths_outside_the_project_are_rejected(tmp_path):
+    (tmp_path / "etc").mkdir()
+    assert resolve_project_file(tmp_path, str(tmp_path / "etc/A.java")) == tmp_path / "etc/A.java"
+    assert resolve_project_file(tmp_path, "etc/A.java") == tmp_path / "etc/A.java"
+    with pytest.raises(PermissionError):
+        resolve_project_file(tmp_path / "etc", "/etc/passwd")
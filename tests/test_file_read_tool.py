@@ -0,0 +1,49 @@
+from codeguardian.tools.file_cache import FileCache, file_cache
+from codeguardian.tools.file_edit_tool import ProjectFileEditTool
+from codeguardian.tools.file_read_tool import ProjectFileReadTool
+
+JAVA = """package com.x;
+
+public class OrderService {
+    public void cancel(String id) {
+        log(id);
+    }
+
+    public void ship() {
+    }
+}
+"""
+
+
+def test_ranges_symbols_and_invalidation_by_the_edit_tool(tmp_path):
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src/OrderService.java").write_text(JAVA, encoding="utf-8")
+    reader = ProjectFileReadTool(project_path=str(tmp_path), max_lines=3)
+
+    out = reader._run(file_path="src/OrderService.java")
+    assert out.splitlines()[0] == "src/OrderService.java (lines 1-3 of 10)"
+    assert out.endswith("[... 7 more lines; read on with start_line=4]")
+
+    out = reader._run(file_path="src/OrderService.java", symbol="OrderService.cancel")
+    assert out.splitlines()[0] == "src/OrderService.java — method com.x.OrderService.cancel (lines 4-6 of 10)"
+    assert out.splitlines()[2] == "5 |         log(id);"
+    assert "outside project path" in reader._run(file_path="../x.java")
+
+    hits = file_cache.stats()["hits"]
+    reader._run(file_path="src/OrderService.java", start_line=8, end_line=9)
+    assert file_cache.stats()["hits"] > hits
+
+    ProjectFileEditTool(project_path=str(tmp_path))._run(
+        file_path="src/OrderService.java", edits=[{"search": "log(id);", "replace": "audit(id);"}]
+    )
+    assert "audit(id);" in reader._run(file_path="src/OrderService.java", start_line=5, end_line=5)
+
+
+def test_large_files_are_sliced_through_mmap(tmp_path):
+    path = tmp_path / "big.txt"
+    path.write_bytes(b"".join(b"line %d\r\n" % i for i in range(1, 5001)) + b"tail")
+    cache = FileCache(mmap_threshold=1024)
+    assert cache.line_count(path) == 5001
+    assert cache.lines(path, 4999, 6000) == ["line 4999", "line 5000", "tail"]
+    assert cache.byte_range(path, 0, 6) == b"line 1"
+    assert cache.stats()["bytes"] < path.stat().st_size  # only the line index is kept
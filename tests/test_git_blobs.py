@@ -0,0 +1,70 @@
+import os
+import subprocess
+
+from codeguardian.tools.git_blobs import FileVersions, git_blob_sha
+
+
+def _git(root, *args):
+    subprocess.run(["git", "-C", str(root), *args], check=True, capture_output=True)
+
+
+def test_versions_follow_content_not_mtime(tmp_path):
+    _git(tmp_path, "init", "-q")
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src/A.java").write_text("class A {}\r\n", encoding="utf-8")
+    (tmp_path / "B.java").write_text("class B {}\n", encoding="utf-8")
+    _git(tmp_path, "add", ".")
+    _git(tmp_path, "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-qm", "init")
+
+    with FileVersions(tmp_path) as v:
+        assert v.is_git
+        a = v.sha("src/A.java", tmp_path / "src/A.java")
+        assert a == git_blob_sha(b"class A {}\r\n")
+        assert v.read("src/A.java", tmp_path / "src/A.java") == "class A {}\n"  # from the object store
+        assert not v.updated  # nothing hashed
+
+    os.utime(tmp_path / "src/A.java", (1, 1))  # touched, same content
+    (tmp_path / "B.java").write_text("class C {}\n", encoding="utf-8")  # same size, new content
+    (tmp_path / "N.java").write_text("class N {}\n", encoding="utf-8")
+    with FileVersions(tmp_path) as v:
+        assert v.sha("src/A.java", tmp_path / "src/A.java") == a
+        assert v.sha("B.java", tmp_path / "B.java") == git_blob_sha(b"class C {}\n")
+        assert v.sha("N.java", tmp_path / "N.java") == git_blob_sha(b"class N {}\n")
+        assert set(v.updated) == {"B.java", "N.java"}
+
+
+def test_outside_git_hashes_once_per_stat(tmp_path):
+    f = tmp_path / "A.java"
+    f.write_text("class A {}\n", encoding="utf-8")
+    with FileVersions(tmp_path) as v:
+        assert not v.is_git
+        sha = v.sha("A.java", f)
+        cache = dict(v.updated)
+
+    f.write_text("class Z {}\n", encoding="utf-8")
+    st = f.stat()
+    os.utime(f, ns=(st.st_atime_ns, int(cache["A.java"][0].split(":")[0])))  # same stat key as before
+    with FileVersions(tmp_path, cache) as v:
+        assert v.sha("A.java", f) == sha  # trusted the cache, file not read
+    os.utime(f, (1, 1))
+    with FileVersions(tmp_path, cache) as v:
+        assert v.sha("A.java", f) == git_blob_sha(b"class Z {}\n")
+
+
+def test_filtered_files_are_read_from_the_work_tree(tmp_path):
+    _git(tmp_path, "init", "-q")
+    _git(tmp_path, "config", "filter.rot13.clean", "tr a-z n-za-m")
+    _git(tmp_path, "config", "filter.rot13.smudge", "tr a-z n-za-m")
+    (tmp_path / ".gitattributes").write_text("*.secret filter=rot13\n", encoding="utf-8")
+    (tmp_path / "key.secret").write_text("class key {}\n", encoding="utf-8")
+    (tmp_path / "A.java").write_text("class A {}\n", encoding="utf-8")
+    _git(tmp_path, "add", ".")
+    _git(tmp_path, "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-qm", "init")
+
+    with FileVersions(tmp_path) as v:
+        # The index holds the cleaned blob, the work tree the smudged text
+        assert v.sha("key.secret", tmp_path / "key.secret") == git_blob_sha(b"pynff xrl {}\n")
+        v.sha("A.java", tmp_path / "A.java")
+        assert v.read("key.secret", tmp_path / "key.secret") == "class key {}\n"
+        assert v.read("A.java", tmp_path / "A.java") == "class A {}\n"
+        assert not v.updated
@@ -0,0 +1,158 @@
+import sqlite3
+import subprocess
+import threading
+
+import pytest
+
+from codeguardian.config.settings import settings
+from codeguardian.tools import index_maintenance, local_rag_tool, tools
+from codeguardian.tools.index_generations import IndexGenerations
+
+
+def test_generations_swap_prune_and_rollback(tmp_path):
+    gens = IndexGenerations(tmp_path, keep=1)
+    assert gens.current() is None and gens.current_dir() == tmp_path  # pre-generation layout
+
+    names = []
+    for i in range(3):
+        name, path = gens.create()
+        (path / "index.meta.json").write_text(str(i), encoding="utf-8")
+        # readers still see the previous generation while this one is being built
+        assert gens.current() == (names[-1] if names else None)
+        gens.publish(name)
+        names.append(name)
+
+    assert gens.current_dir() == tmp_path / names[-1]
+    assert gens.names() == names[1:]  # keep=1: only one previous generation survives
+
+    # a build in progress (newer than the live one) is never pruned
+    building, _ = gens.create()
+    gens.prune()
+    assert gens.names() == names[1:] + [building]
+    gens.discard(building)
+
+    assert gens.rollback() == names[1]
+    assert gens.current() == names[1]
+    assert gens.rollback() is None
+
+
+def test_clone_store_reports_its_cost_and_keeps_pending_sqlite_writes(tmp_path):
+    gens = IndexGenerations(tmp_path)
+    _, live_dir = gens.create()
+    (live_dir / "segment").mkdir()
+    (live_dir / "segment" / "data.bin").write_bytes(b"x" * 1000)
+    db = sqlite3.connect(str(live_dir / "chroma.sqlite3"))
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA wal_autocheckpoint=0")
+    with db:
+        db.execute("CREATE TABLE t (v TEXT)")
+        db.execute("INSERT INTO t VALUES ('in the WAL only')")
+
+    _, dest = gens.create()
+    cost = gens.clone_store(live_dir, dest)
+    db.close()
+    assert cost["reflink"] + cost["copy"] == 1000 and cost["sqlite backup"] > 0
+    copy = sqlite3.connect(str(dest / "chroma.sqlite3"))
+    assert copy.execute("SELECT v FROM t").fetchall() == [("in the WAL only",)]
+    copy.close()
+
+
+@pytest.fixture
+def indexed_repo(tmp_path, monkeypatch, fake_embedder):
+    """PROJECT_PATH / CHROMA_DIR in tmp_path, a git repo with one Java file, embeddings faked."""
+    repo = tmp_path / "repo"
+    (repo / "src/main/java").mkdir(parents=True)
+    (repo / "src/main/java/A.java").write_text("class A {}\n", encoding="utf-8")
+    _commit(repo, init=True)
+    monkeypatch.setattr(settings, "project_path", repo)
+    monkeypatch.setattr(settings, "chroma_dir", tmp_path / ".chroma")
+    monkeypatch.setattr(local_rag_tool, "OllamaEmbedder", lambda *args, **kwargs: fake_embedder())
+    caches = (tools.index_generations, tools.index_write_lock, tools.index_build_lock, tools._search_tool_for)
+    for cached in caches:
+        cached.cache_clear()
+    yield repo
+    for cached in caches:
+        cached.cache_clear()
+
+
+def _commit(repo, init=False):
+    git = ["git", "-C", str(repo), "-c", "user.name=t", "-c", "user.email=t@t"]
+    if init:
+        subprocess.run(git + ["init", "-q"], check=True)
+    subprocess.run(git + ["add", "-A"], check=True)
+    subprocess.run(git + ["commit", "-qm", "change"], check=True)
+
+
+def test_search_during_an_incremental_update_sees_the_old_generation(indexed_repo, monkeypatch):
+    assert tools.ensure_repo_indexed() == "Index created (first run)."
+    before = tools.index_generations().current()
+    (indexed_repo / "src/main/java/B.java").write_text("class B {}\n", encoding="utf-8")
+    _commit(indexed_repo)
+
+    seen = []
+    index_backend = tools._index_backend
+
+    def index_and_search(tool):
+        index_backend(tool)  # the update has embedded B.java, but is not published yet
+        live = tools.directory_search_tool()
+        seen.append((tools.index_generations().current(), live.indexed_files(), live.search_paths("class", 5)))
+
+    monkeypatch.setattr(tools, "_index_backend", index_and_search)
+    assert tools.ensure_repo_indexed().startswith("Index updated.")
+    assert seen == [(before, ["src/main/java/A.java"], ["src/main/java/A.java"])]
+
+    assert tools.index_generations().current() != before
+    assert tools.directory_search_tool().indexed_files() == ["src/main/java/A.java", "src/main/java/B.java"]
+
+
+def test_background_migration_leaves_the_write_lock_free(indexed_repo, monkeypatch):
+    tools.ensure_repo_indexed()
+    old_model = settings.embed_model
+    monkeypatch.setattr(settings, "embed_model", "other-embed")
+    started, resume = threading.Event(), threading.Event()
+    build = tools._build_generation_locked
+
+    def slow_build(head):
+        started.set()
+        resume.wait(10)
+        build(head)
+
+    monkeypatch.setattr(tools, "_build_generation_locked", slow_build)
+    try:
+        assert "running in the background" in tools.ensure_repo_indexed()
+        assert started.wait(10)
+        # Other processes still get their index check while the new model's generation is built
+        with tools.index_write_lock().exclusive(timeout_s=0):
+            pass
+        assert tools.read_meta()["settings"]["embed_model"] == old_model
+    finally:
+        resume.set()
+        tools._migration_thread.join(30)
+    assert not tools._migration_thread.daemon  # the process finishes the build before it exits
+    assert tools.read_meta()["settings"]["embed_model"] == "other-embed"
+
+
+def test_maintenance_cleans_a_copy_and_leaves_the_live_generation_alone(indexed_repo, monkeypatch):
+    (indexed_repo / "src/main/java/B.java").write_text("class B {}\n", encoding="utf-8")
+    _commit(indexed_repo)
+    tools.ensure_repo_indexed()
+    before = tools.index_generations().current()
+    (indexed_repo / "src/main/java/B.java").unlink()
+
+    seen = []
+
+    def compact(persist_dir):
+        live = tools.directory_search_tool()
+        with live.index_lock.shared(timeout_s=0):  # a search would not wait
+            seen.append((persist_dir.name != before, live.indexed_files()))
+        return "stub"
+
+    monkeypatch.setattr(index_maintenance, "compact_chroma", compact)
+    report = index_maintenance.maintain_index()
+    assert report["orphaned_files"] == ["src/main/java/B.java"] and report["deleted_chunks"] == 1
+
+    # While the copy was cleaned and compacted, the live generation still served B.java and was not locked
+    assert seen == [(True, ["src/main/java/A.java", "src/main/java/B.java"])]
+    assert tools.index_generations().current() != before
+    assert tools.directory_search_tool().indexed_files() == ["src/main/java/A.java"]
+    assert tools.read_meta()["git_head"] == tools.read_meta(tools.index_generations().root / before)["git_head"]
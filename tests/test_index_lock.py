@@ -0,0 +1,17 @@
+import pytest
+
+from codeguardian.tools.index_lock import IndexLock, IndexLockTimeout
+
+
+def test_shared_holders_block_exclusive_until_released(tmp_path):
+    lock = IndexLock(tmp_path / "index.lock", timeout_s=0)
+    with lock.shared(), lock.shared():
+        with pytest.raises(IndexLockTimeout):
+            with lock.exclusive():
+                pass
+    with lock.exclusive():
+        with pytest.raises(IndexLockTimeout):
+            with lock.shared(timeout_s=0.2):
+                pass
+    with lock.shared():
+        pass
@@ -0,0 +1,31 @@
+from codeguardian.tools.local_rag_tool import LocalDirectoryRagTool
+
+
+def test_remove_paths_and_repair_keep_index_consistent(tmp_path, fake_embedder):
+    repo = tmp_path / "repo"
+    (repo / "src").mkdir(parents=True)
+    header = "// generated header, identical in every file\n"
+    for name in ("A", "B", "C"):
+        (repo / "src" / f"{name}.java").write_text(f"{header}\n\nclass {name} {{}}\n", encoding="utf-8")
+
+    tool = LocalDirectoryRagTool(directory=str(repo), persist_directory=str(tmp_path / ".chroma"), chunk_chars=60, chunk_overlap=0)
+    tool._embedder = fake_embedder()
+    tool.index_paths(include_globs=["src/**"])
+    assert tool.index_stats()["files"] == 3
+
+    # B is deleted: its own chunk goes, the shared header stays for A and C
+    (repo / "src" / "B.java").unlink()
+    before = tool.index_stats()["stored_chunks"]
+    assert tool.remove_paths(["src/B.java"]) == {"files": 1, "chunks": 1}
+    assert tool.index_stats()["stored_chunks"] == before - 1
+    assert tool.indexed_files() == ["src/A.java", "src/C.java"]
+    assert not any(tool.check_consistency().values())
+
+    # A chunk lost from the vector store: the file is re-indexed on the next run
+    lost = tool._refs.hashes_of("src/C.java")[-1]
+    tool._collection.delete(ids=[lost])
+    report = tool.check_consistency()
+    assert report["files_missing_chunks"] == ["src/C.java"]
+    tool.repair(report)
+    tool.index_paths(include_globs=["src/**"])
+    assert not any(tool.check_consistency().values())
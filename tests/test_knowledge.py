@@ -0,0 +1,79 @@
+import os
+
+import pytest
+
+from codeguardian import knowledge
+from codeguardian.knowledge import KnowledgeStore, PrecomputedKnowledgeStorage, chunk_document
+
+
+def test_chunk_document_keeps_paragraphs_together():
+    text = "A" * 50 + "\n\n" + "B" * 50 + "\n\n" + "C" * 300
+    chunks = chunk_document(text, chunk_chars=120, overlap=20)
+    assert chunks[0] == "A" * 50 + "\n\n" + "B" * 50
+    assert all(len(c) <= 120 for c in chunks)
+    assert "".join(chunks[1:]).count("C") >= 300
+
+
+def test_store_embeds_once_and_only_changed_files(tmp_path, fake_embedder):
+    docs = tmp_path / "knowledge"
+    (docs / "fe").mkdir(parents=True)
+    (docs / "be.txt").write_text("Use JUnit 5 and Gherkin names.", encoding="utf-8")
+    (docs / "fe" / "jasmine.md").write_text("Use Jasmine spies.", encoding="utf-8")
+    (docs / "fe" / "image.png").write_bytes(b"\x89PNG")
+
+    embedder = fake_embedder()
+    store = KnowledgeStore(tmp_path / "store", embedder)
+    assert "embedded=2" in store.sync([docs])
+    assert len(store) == 2
+
+    # Fresh process: loaded from disk (memory-mapped), nothing re-embedded
+    embedder = fake_embedder()
+    store = KnowledgeStore(tmp_path / "store", embedder)
+    assert "embedded=0, reused=2" in store.sync([docs])
+    assert embedder.embedded == []
+    assert store.search("junit tests", k=1)[0]["metadata"]["source"].endswith("be.txt")
+
+    # Touched but same content -> hash matches, no embedding; edited -> only that file
+    be = docs / "be.txt"
+    os.utime(be, (1, 1))
+    store.sync([docs])
+    assert embedder.embedded == []
+    be.write_text("Use JUnit 5, AssertJ and Gherkin names.", encoding="utf-8")
+    assert "embedded=1, reused=1" in store.sync([docs])
+    assert embedder.embedded == ["Use JUnit 5, AssertJ and Gherkin names."]
+
+    (docs / "fe" / "jasmine.md").unlink()
+    store.sync([docs])
+    assert len(store) == 1
+
+    # Runtime sources (Knowledge.add_sources) are ignored, not an error
+    storage = PrecomputedKnowledgeStorage(store)
+    storage.save(["ad-hoc text"])
+    assert len(store) == 1 and storage.search(["junit"], limit=1, score_threshold=0)[0]["metadata"]["source"].endswith("be.txt")
+
+
+def test_an_interrupted_save_keeps_the_previous_store(tmp_path, fake_embedder, monkeypatch):
+    docs = tmp_path / "knowledge"
+    docs.mkdir()
+    (docs / "be.txt").write_text("Use JUnit 5.", encoding="utf-8")
+    store = KnowledgeStore(tmp_path / "store", fake_embedder())
+    store.sync([docs])
+
+    # A second process on the same store: its own temp files, the manifest names its vectors
+    other = KnowledgeStore(tmp_path / "store", fake_embedder())
+    (docs / "fe.md").write_text("Use Jasmine spies.", encoding="utf-8")
+    assert "embedded=1, reused=1" in other.sync([docs])
+    assert [p.name for p in (tmp_path / "store").iterdir() if p.suffix == ".npy"] == [other._manifest["vectors"]]
+
+    # Crash before the manifest is replaced: the previous manifest and its vectors still load together
+    (docs / "ops.md").write_text("Deploy with Helm.", encoding="utf-8")
+    def crash(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(knowledge.os, "replace", crash)
+    with pytest.raises(OSError):
+        other.sync([docs])
+    monkeypatch.undo()
+    assert sorted(p.name for p in (tmp_path / "store").iterdir()) == ["manifest.json", other._manifest["vectors"]]
+    embedder = fake_embedder()
+    assert "embedded=1, reused=2" in KnowledgeStore(tmp_path / "store", embedder).sync([docs])
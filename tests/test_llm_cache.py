@@ -0,0 +1,54 @@
+import pytest
+from crewai import Task
+from crewai.tasks.task_output import TaskOutput
+
+from codeguardian.llm_cache import CompletionCache, cache_completions
+from codeguardian.scheduler import DagCrew, TaskOutputStore, run_key
+
+
+class FakeLLM:
+    model = "openai/test"
+    temperature = 0.2
+    stop = None
+
+    def __init__(self):
+        self.calls = 0
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None, from_task=None, from_agent=None, response_model=None):
+        self.calls += 1
+        return f"answer {self.calls}"
+
+
+def test_identical_calls_are_replayed_from_disk(tmp_path):
+    llm = cache_completions(FakeLLM(), CompletionCache(tmp_path / "c.sqlite"))
+    messages = [{"role": "user", "content": "fix it"}]
+    assert llm.call(messages) == "answer 1"
+    assert llm.call(messages) == "answer 1"
+    llm.stop = ["\nObservation:"]
+    assert llm.call(messages) == "answer 2"
+    assert llm.call([{"role": "user", "content": "fix that"}]) == "answer 3"
+    assert llm.call(messages, available_functions={"f": print}) == "answer 4"
+    assert llm.calls == 4
+
+    # A new process sees the same entries
+    reopened = cache_completions(FakeLLM(), CompletionCache(tmp_path / "c.sqlite"))
+    reopened.stop = ["\nObservation:"]
+    assert reopened.call(messages) == "answer 2" and reopened.calls == 0
+
+
+def test_resume_loads_outputs_of_earlier_tasks(tmp_path):
+    (tmp_path / "bug-desc.txt").write_text("NPE", encoding="utf-8")
+    key = run_key(tmp_path, tmp_path / "bug-desc.txt")
+    (tmp_path / "bug-desc.txt").write_text("NPE in total", encoding="utf-8")
+    assert run_key(tmp_path, tmp_path / "bug-desc.txt") != key
+
+    store = TaskOutputStore(tmp_path / "runs")
+    store.save("design", TaskOutput(description="d", raw="PATCH_PLAN_JSON: {}", agent="architect"))
+    assert store.load("design").raw == "PATCH_PLAN_JSON: {}" and store.load("build") is None
+
+    tasks = [Task(description=n, expected_output="x", name=n) for n in ("design", "impl", "build")]
+    crew = DagCrew.model_construct(output_store=store, resume_from="impl")
+    assert {i: o.raw for i, o in crew._resumed_outputs(tasks).items()} == {0: "PATCH_PLAN_JSON: {}"}
+    crew.resume_from = "build"
+    with pytest.raises(ValueError, match="no saved output of 'impl'"):
+        crew._resumed_outputs(tasks)
@@ -0,0 +1,104 @@
+import sqlite3
+
+from codeguardian.tools.repo_map import RepoMap, bug_seeds
+from codeguardian.tools.symbol_index import SymbolIndex, extract_imports
+
+FILES = {
+    "src/main/java/com/acme/orders/OrderService.java": """\
+package com.acme.orders;
+
+import com.acme.common.Money;
+
+public class OrderService {
+    private final OrderRepository repo;
+
+    public Order create(String name,
+                        Money price) {
+        return repo.save(new Order(name));
+    }
+}
+""",
+    "src/main/java/com/acme/orders/OrderRepository.java": "package com.acme.orders;\n\npublic interface OrderRepository {\n    Order save(Order o);\n}\n",
+    "src/main/java/com/acme/orders/Order.java": "package com.acme.orders;\n\npublic class Order {\n}\n",
+    "src/main/java/com/acme/common/Money.java": "package com.acme.common;\n\npublic class Money {\n}\n",
+    "src/main/java/com/acme/web/OrderController.java": """\
+package com.acme.web;
+
+import com.acme.orders.*;
+
+public class OrderController {
+    public Order post(String name) { return service.create(name, null); }
+}
+""",
+    "src/main/java/com/acme/web/HealthController.java": "package com.acme.web;\n\npublic class HealthController {\n}\n",
+}
+
+
+def test_imports_of_each_language():
+    assert extract_imports("src/pkg/a/b.py", "from . import c\nfrom ..d import e as f\nimport os, yaml  # x\n") == [
+        "py:src.pkg.a.c", "py:src.pkg.d.e", "py:os", "py:yaml",
+    ]
+    ts = "import { A } from './a.service';\nexport * from '../shared';\nconst m = import('./lazy');\nimport x from 'rxjs';\n"
+    assert extract_imports("src/app/x.ts", ts) == ["ts:src/app/a.service", "ts:src/shared", "ts:src/app/lazy"]
+    java = extract_imports("src/main/java/com/acme/orders/OrderService.java", FILES["src/main/java/com/acme/orders/OrderService.java"])
+    assert java[0] == "java:com.acme.common.Money" and "java:com.acme.orders.OrderRepository" in java
+
+
+def test_map_is_ranked_by_imports_and_bug_and_fits_the_budget(tmp_path):
+    symbols = SymbolIndex(tmp_path / "symbols.sqlite")
+    for rel, text in FILES.items():
+        symbols.update_file(rel, "v1", text)
+    repo_map = RepoMap(symbols)
+
+    service = "src/main/java/com/acme/orders/OrderService.java"
+    assert set(repo_map.edges()[service]) == {
+        "src/main/java/com/acme/common/Money.java",
+        "src/main/java/com/acme/orders/OrderRepository.java",
+        "src/main/java/com/acme/orders/Order.java",
+    }
+    ranked = [rel for rel, _ in repo_map.rank()]
+    assert ranked[0] == "src/main/java/com/acme/orders/Order.java"  # imported by everything
+    assert repo_map.outline(service) == [
+        "  public class OrderService",
+        "    public Order create(String name, Money price)",
+    ]
+
+    log = "java.lang.NullPointerException\n\tat com.acme.web.OrderController.post(OrderController.java:6)\n"
+    seeds = bug_seeds(symbols, log)
+    assert max(seeds, key=seeds.get) == "src/main/java/com/acme/web/OrderController.java"
+    text = repo_map.render(60, seeds)
+    assert text.startswith("src/main/java/com/acme/web/OrderController.java *\n  public class OrderController")
+    assert "HealthController" not in text and len(text) // 4 <= 60
+
+    # Cached per index revision
+    graph = repo_map.edges()
+    assert repo_map.edges() is graph
+    symbols.remove_file("src/main/java/com/acme/common/Money.java")
+    assert "src/main/java/com/acme/common/Money.java" not in repo_map.edges()[service]
+
+
+def test_index_from_before_the_repo_map_is_re_extracted(tmp_path):
+    db = sqlite3.connect(str(tmp_path / "symbols.sqlite"))
+    db.executescript(
+        "CREATE TABLE files (path TEXT PRIMARY KEY, name TEXT NOT NULL, sig TEXT NOT NULL);"
+        "CREATE TABLE symbols (name TEXT NOT NULL, kind TEXT NOT NULL, path TEXT NOT NULL, start INTEGER NOT NULL, end INTEGER NOT NULL);"
+        "INSERT INTO files VALUES ('A.java', 'A.java', 'v1');"
+    )
+    db.commit()
+    db.close()
+    assert SymbolIndex(tmp_path / "symbols.sqlite").needs_update("A.java", "v1")
+
+
+def test_repo_map_sees_index_writes_of_other_processes(tmp_path):
+    symbols = SymbolIndex(tmp_path / "symbols.sqlite")
+    for rel, text in FILES.items():
+        symbols.update_file(rel, "v1", text)
+    repo_map = RepoMap(symbols)
+    service = "src/main/java/com/acme/orders/OrderService.java"
+    assert "src/main/java/com/acme/common/Money.java" in repo_map.edges()[service]
+
+    # Another process (its own connection) drops a file: the cached graph is rebuilt
+    other = SymbolIndex(tmp_path / "symbols.sqlite")
+    other.remove_file("src/main/java/com/acme/common/Money.java")
+    assert symbols.revision == other.revision
+    assert "src/main/java/com/acme/common/Money.java" not in repo_map.edges()[service]
@@ -0,0 +1,143 @@
+import threading
+import time
+from contextlib import contextmanager
+
+import pytest
+
+from codeguardian import crew
+from codeguardian.config.settings import settings
+from codeguardian.tools import embeddings
+from codeguardian.tools.request_scheduler import (
+    Priority,
+    RequestQueueFull,
+    RequestScheduler,
+    request_priority,
+    same_server,
+)
+
+
+def _wait_queued(scheduler, priority, n):
+    deadline = time.monotonic() + 5
+    while scheduler.stats()[priority.name.lower()]["queued"] < n:
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_free_slot_goes_to_the_most_urgent_waiter():
+    scheduler = RequestScheduler(max_concurrent=1)
+    order = []
+
+    def request(priority):
+        with scheduler.slot(priority):
+            order.append(priority)
+
+    scheduler.acquire(Priority.BULK)
+    threads = []
+    for priority in (Priority.BULK, Priority.AGENT, Priority.INTERACTIVE):
+        threads.append(threading.Thread(target=request, args=(priority,)))
+        threads[-1].start()
+        _wait_queued(scheduler, priority, 1)
+    time.sleep(0.01)
+    scheduler.release(Priority.BULK)
+    for t in threads:
+        t.join(5)
+
+    assert order == [Priority.INTERACTIVE, Priority.AGENT, Priority.BULK]
+    stats = scheduler.stats()
+    assert stats["bulk"]["requests"] == 2 and stats["bulk"]["max_queue_seconds"] >= 0.01
+    assert stats["interactive"]["active"] == 0 and stats["interactive"]["queued"] == 0
+
+
+def test_class_limits_and_backpressure():
+    scheduler = RequestScheduler(max_concurrent=3, limits={Priority.BULK: 1}, max_queued=1, queue_timeout_s=0.05)
+    scheduler.acquire(Priority.BULK)
+    waiter = threading.Thread(target=scheduler.acquire, args=(Priority.BULK,))
+    waiter.start()
+    _wait_queued(scheduler, Priority.BULK, 1)
+
+    # Bulk is at its limit, other classes still get the free slots
+    scheduler.acquire(Priority.INTERACTIVE)
+    scheduler.acquire(Priority.AGENT)
+    with pytest.raises(RequestQueueFull):
+        scheduler.acquire(Priority.BULK)
+    assert scheduler.stats()["bulk"]["rejected"] == 1
+
+    scheduler.release(Priority.BULK)
+    waiter.join(5)
+    assert scheduler.stats()["bulk"]["active"] == 1
+
+    assert same_server("http://localhost:11434/v1", "http://localhost:11434")
+    assert not same_server("https://llm.example.com/v1", "http://localhost:11434")
+
+
+class _RecordingScheduler:
+    def __init__(self):
+        self.priorities = []
+
+    @contextmanager
+    def slot(self, priority):
+        self.priorities.append(priority)
+        yield
+
+
+class _Response:
+    status_code = 200
+
+    def __init__(self, texts):
+        self.texts = texts
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"data": [{"embedding": [1.0, 0.0], "index": i} for i in range(len(self.texts))]}
+
+
+def test_embeddings_are_scheduled_by_request_class(monkeypatch):
+    def post(url, json, **kwargs):
+        texts = json["input"]
+        return _Response(texts if isinstance(texts, list) else [texts])
+
+    monkeypatch.setattr(embeddings.requests, "post", post)
+    scheduler = _RecordingScheduler()
+    embedder = embeddings.OllamaEmbedder(batch_size=2, scheduler=scheduler)
+
+    embedder.embed("query")
+    assert scheduler.priorities == [Priority.INTERACTIVE]
+
+    # Indexing: every batch is bulk, also the single-text fallback
+    scheduler.priorities.clear()
+    assert len(embedder.embed_many(["a", "b", "c"])) == 3
+    assert scheduler.priorities == [Priority.BULK, Priority.BULK]
+
+    # A search embeds its queries in one batch, ahead of indexing
+    scheduler.priorities.clear()
+    with request_priority(Priority.INTERACTIVE):
+        embedder.embed_many(["q1", "q2"])
+    assert scheduler.priorities == [Priority.INTERACTIVE]
+
+
+def test_agent_llm_calls_are_scheduled_only_on_the_ollama_server(monkeypatch):
+    class FakeLLM:
+        def __init__(self, model, base_url, api_key):
+            self.model = model
+
+        def call(self, messages, **kwargs):
+            return "answer"
+
+    scheduler = _RecordingScheduler()
+    monkeypatch.setattr(crew, "LLM", FakeLLM)
+    monkeypatch.setattr(crew, "ollama_scheduler", lambda: scheduler)
+    monkeypatch.setattr(settings, "llm_cache", False)
+    monkeypatch.setattr(settings, "ollama_base_url", "http://localhost:11434")
+
+    monkeypatch.setattr(settings, "openai_api_base", "http://localhost:11434/v1")
+    assert crew._llm().call("hi") == "answer"
+    assert scheduler.priorities == [Priority.AGENT]
+
+    # The model name alone does not route a call: only API_BASE does
+    scheduler.priorities.clear()
+    monkeypatch.setattr(settings, "openai_model_name", "ollama/llama3")
+    monkeypatch.setattr(settings, "openai_api_base", "https://llm.example.com/v1")
+    assert crew._llm().call("hi") == "answer"
+    assert scheduler.priorities == []
@@ -0,0 +1,31 @@
+from codeguardian.tools.rerank import collapse_hits, merge_overlapping, mmr
+
+
+def test_merge_overlapping_drops_shared_text():
+    a = "public void save() {\n  repo.save(order);\n}"
+    b = "repo.save(order);\n}\npublic void load() {}"
+    assert merge_overlapping(a, b, max_overlap=40) == a + "\npublic void load() {}"
+    assert merge_overlapping("abc", "xyz", max_overlap=40) == "abc\nxyz"
+
+
+def test_adjacent_chunks_collapse_and_mmr_diversifies():
+    q = [1.0, 0.0, 0.0]
+    docs = ["OrderService.save(order) part 1", "save(order) part 1 and part 2", "OrderService copy", "OrderController", "README"]
+    metas = [
+        {"path": "/r/OrderService.java", "chunk": 0},
+        {"path": "/r/OrderService.java", "chunk": 1},
+        {"path": "/r/OrderServiceCopy.java", "chunk": 3},
+        {"path": "/r/OrderController.java", "chunk": 0},
+        {"path": "/r/README.md", "chunk": 0},
+    ]
+    embs = [[1.0, 0.1, 0.0], [1.0, 0.12, 0.0], [1.0, 0.11, 0.0], [0.9, 0.0, 0.3], [0.0, 1.0, 0.0]]
+
+    hits = collapse_hits(q, docs, metas, embs, max_overlap=20)
+    assert [h.path for h in hits].count("/r/OrderService.java") == 1
+    merged = next(h for h in hits if h.path == "/r/OrderService.java")
+    assert merged.chunks == [0, 1] and merged.text == "OrderService.save(order) part 1 and part 2"
+
+    # Pure relevance would return the near-duplicate copy second; MMR prefers the different file
+    picked = mmr(hits, k=2)
+    assert picked[0].path == "/r/OrderService.java"
+    assert picked[1].path == "/r/OrderController.java"
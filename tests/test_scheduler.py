@@ -0,0 +1,114 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from crewai import Crew, Task
+from crewai.tasks.task_output import TaskOutput
+
+from codeguardian.scheduler import DagCrew, task_dependencies
+
+
+def _task(name, context=None):
+    if context is None:
+        return Task(description=name, expected_output="x", name=name)
+    return Task(description=name, expected_output="x", name=name, context=context)
+
+def test_dependencies_follow_context():
+    """QA planning only waits for the architect, QA verification joins everything."""
+    t1 = _task("design")
+    plan = _task("plan", [t1])
+    t2 = _task("impl", [t1])
+    t3 = _task("build", [t2])
+    t4 = _task("verify", [t1, plan, t3])
+    deps = task_dependencies([t1, plan, t2, t3, t4])
+    assert deps == {0: [], 1: [0], 2: [0], 3: [2], 4: [0, 1, 3]}
+
+def test_tasks_without_context_chain_sequentially():
+    tasks = [_task("a"), _task("b"), _task("c")]
+    assert task_dependencies(tasks) == {0: [], 1: [0], 2: [1]}
+
+def test_context_outside_crew_is_rejected():
+    stray = _task("stray")
+    with pytest.raises(ValueError):
+        task_dependencies([_task("a", [stray])])
+
+
+class _StubTask(Task):
+    """Sleeps instead of calling an agent; records when it ran and the context it got."""
+
+    def execute_sync(self, agent=None, context=None, tools=None):
+        log, lock = self.callback  # (events, lock) shared by the test
+        with lock:
+            log.append(("start", self.name, context))
+        time.sleep(0.05)
+        with lock:
+            log.append(("end", self.name, None))
+        self.output = TaskOutput(description=self.name, name=self.name, raw=f"out {self.name}", agent=agent.role)
+        return self.output
+
+
+class _StubCrew(DagCrew):
+    """DagCrew without the agent plumbing: each task's agent is a plain namespace."""
+
+    def _get_agent_to_use(self, task):
+        return task.agent
+
+    def _prepare_tools(self, agent, task, tools):
+        return tools
+
+    def _log_task_start(self, task, role=None):
+        pass
+
+    def _process_task_result(self, task, output):
+        pass
+
+    def _store_execution_log(self, task, output, task_index, was_replayed=False):
+        pass
+
+    def _create_crew_output(self, task_outputs):
+        return task_outputs
+
+
+def test_dag_runs_independent_tasks_concurrently_up_to_the_limit():
+    events, lock = [], threading.Lock()
+    agents = {}
+
+    def task(name, role, context=()):
+        agent = agents.setdefault(role, SimpleNamespace(role=role, tools=[]))
+        return _StubTask.model_construct(
+            description=name, expected_output="x", name=name, agent=agent, context=list(context), callback=(events, lock),
+        )
+
+    design = task("design", "architect")
+    plan, impl, docs = task("plan", "qa", [design]), task("impl", "dev", [design]), task("docs", "writer", [design])
+    build = task("build", "dev", [impl])
+    verify = task("verify", "qa", [plan, build])
+    crew = _StubCrew.model_construct(tasks=[design, plan, impl, docs, build, verify], max_parallel_tasks=2)
+
+    outputs = crew._run_sequential_process()
+    assert [o.raw for o in outputs] == [f"out {t}" for t in ("design", "plan", "impl", "docs", "build", "verify")]
+
+    running, peak, order = set(), 0, {}
+    for n, (kind, name, context) in enumerate(events):
+        order[(kind, name)] = n
+        if kind == "start":
+            running.add(name)
+            peak = max(peak, len(running))
+        else:
+            running.discard(name)
+    assert peak == 2  # plan / impl / docs are independent, capped at max_parallel_tasks
+    # A task starts only once its context is done, and gets exactly that context
+    for name, needs in {"plan": ["design"], "impl": ["design"], "docs": ["design"], "build": ["impl"], "verify": ["plan", "build"]}.items():
+        assert all(order[("end", dep)] < order[("start", name)] for dep in needs)
+    contexts = {name: context for kind, name, context in events if kind == "start"}
+    assert contexts["design"] == "" and contexts["build"] == "out impl"
+    assert "out plan" in contexts["verify"] and "out build" in contexts["verify"] and "out docs" not in contexts["verify"]
+
+
+def test_async_tasks_fall_back_to_the_sequential_process(monkeypatch):
+    monkeypatch.setattr(Crew, "_run_sequential_process", lambda self: "sequential")
+    tasks = [_task("a"), Task(description="b", expected_output="x", name="b", async_execution=True)]
+    assert _StubCrew.model_construct(tasks=tasks)._run_sequential_process() == "sequential"
+    with pytest.raises(ValueError, match="Cannot resume"):
+        _StubCrew.model_construct(tasks=tasks, resume_from="b")._run_sequential_process()
@@ -0,0 +1,36 @@
+from codeguardian.tools.search_filters import build_where, glob_prefix, path_metadata, post_filter
+
+
+def test_path_metadata():
+    meta = path_metadata(
+        "src/test/java/com/acme/OrderServiceTest.java",
+        profiles={"backend": (["src/**"], []), "frontend": (["src/app/**"], [])},
+    )
+    assert meta["ext"] == ".java" and meta["lang"] == "java" and meta["is_test"] is True
+    assert meta["dir2"] == "src/test" and meta["dir6"] == ""
+    assert meta["backend"] is True and meta["frontend"] is False
+    assert path_metadata("src/app/order.component.spec.ts")["is_test"] is True
+    assert path_metadata("src/app/order.component.ts")["is_test"] is False
+
+
+def test_build_where_pushes_down_prefixes():
+    assert glob_prefix("src/main/java/**") == ("src/main/java", True)
+    assert glob_prefix("**/*.ts") == ("", False)
+    assert build_where() is None
+
+    where = build_where(
+        path_globs=["src/main/java/**", "src/main/resources/*.yml"],
+        exclude_globs=["src/main/java/generated/**", "**/*Dto.java"],
+        extensions=["java", ".YML"],
+        include_tests=False,
+    )
+    assert where == {"$and": [
+        {"ext": {"$in": [".java", ".yml"]}},
+        {"is_test": False},
+        {"$or": [{"dir3": {"$eq": "src/main/java"}}, {"dir3": {"$eq": "src/main/resources"}}]},
+        {"dir4": {"$ne": "src/main/java/generated"}},
+    ]}
+    # A glob without directory prefix cannot be pushed down: checked after the query instead
+    assert build_where(path_globs=["**/*Service.java", "src/**"]) is None
+    assert post_filter("src/main/OrderService.java", ["**/*Service.java"], ["**/*Dto.java"])
+    assert not post_filter("src/main/OrderDto.java", ["src/**"], ["**/*Dto.java"])
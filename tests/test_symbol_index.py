@@ -0,0 +1,72 @@
+from codeguardian.context_pack import ContextPacker, parse_stack_frames
+from codeguardian.tools.symbol_index import SymbolIndex, extract_symbols
+
+JAVA = """\
+package com.acme.orders;
+
+@Service
+public class OrderService {
+    public OrderService(Repo repo) {
+        this.repo = repo;
+    }
+
+    public Order create(String name) {
+        if (name == null) { throw new IllegalArgumentException("{"); }
+        return repo.save(new Order(name));
+    }
+
+    static class Validator {
+        boolean valid(Order o) { return o != null; }
+    }
+}
+"""
+
+TS = """\
+export class OrderComponent implements OnInit {
+  ngOnInit(): void {
+    this.load('1');
+  }
+
+  load(id: string) {
+    return this.http.get(`/orders/${id}`);
+  }
+}
+
+export function formatOrder(o: Order): string {
+  return o.name;
+}
+"""
+
+
+def test_extract_java_symbols():
+    spans = {s.name: (s.start, s.end) for s in extract_symbols("src/main/java/com/acme/orders/OrderService.java", JAVA)}
+    assert spans["com.acme.orders.OrderService"] == (4, 17)
+    assert spans["com.acme.orders.OrderService.<init>"] == (5, 7)
+    assert spans["com.acme.orders.OrderService.create"] == (9, 12)
+    assert spans["com.acme.orders.OrderService.Validator.valid"] == (15, 15)
+
+def test_extract_ts_and_python_symbols():
+    ts = {s.name: (s.start, s.end) for s in extract_symbols("src/app/order.component.ts", TS)}
+    assert ts["OrderComponent.load"] == (6, 8)
+    assert ts["formatOrder"] == (11, 13)
+    py = {s.name for s in extract_symbols("app/service.py", "class A:\n    def run(self):\n        pass\n")}
+    assert py == {"app.service.A", "app.service.A.run"}
+
+def test_resolve_frames_without_embeddings(tmp_path):
+    rel = "src/main/java/com/acme/orders/OrderService.java"
+    (tmp_path / rel).parent.mkdir(parents=True)
+    (tmp_path / rel).write_text(JAVA, encoding="utf-8")
+    idx = SymbolIndex(tmp_path / "symbols.sqlite")
+    idx.update_file(rel, "sig", JAVA)
+    assert not idx.needs_update(rel, "sig") and idx.needs_update(rel, "other")
+
+    trace = "\tat com.acme.orders.OrderService.create(OrderService.java:10)\n\tat com.acme.orders.OrderService$Validator.valid(OrderService.java:15)\n"
+    frames = parse_stack_frames(trace)
+    assert idx.resolve_frame(frames[0]) == (rel, (9, 12))
+    assert idx.resolve_frame(frames[1]) == (rel, (15, 15))
+
+    pack = ContextPacker(tmp_path, symbols=idx, max_tokens=1000).pack(trace)
+    assert f"### {rel}:9-12" in pack
+
+    idx.remove_file(rel)
+    assert idx.resolve_frame(frames[0]) is None
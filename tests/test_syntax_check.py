@@ -0,0 +1,59 @@
+import subprocess
+from types import SimpleNamespace
+
+from codeguardian.tools import build_tools
+from codeguardian.tools.build_tools import BuildTool, UnitTestTool
+from codeguardian.tools.syntax_check import check_text, precheck
+
+JAVA = """class A {
+    String s = "}{";  char c = '{';
+    /* } */ void run() { if (x) { call(); } }
+}
+"""
+
+
+def test_parsers_report_positions():
+    assert check_text("A.java", JAVA) == []
+    broken = check_text("A.java", JAVA.replace("call(); }", "call(); "))
+    assert [str(i) for i in broken] == ["A.java:1:9: '{' is never closed"]
+    assert str(check_text("A.java", 'class A { String s = "x; }\n')[0]) == "A.java:1:22: unterminated string literal"
+
+    ts = "const re = /[)}]/g;\nconst t = `a ${f({x: 1})} }`;\nconst half = total / 2;\n"
+    assert check_text("a.ts", ts) == []
+    assert "does not match" in check_text("a.ts", "f(a];\n")[0].message
+
+    assert check_text("m.py", "def f(:\n    pass\n")[0].line == 1
+    assert (check_text("a.json", '{"a": 1,}')[0].line, check_text("tsconfig.json", "{// c\n}")) == (1, [])
+    assert check_text("a.yml", "a: !Ref x\nb: [1, 2\n")[0].line == 3
+    assert check_text("pom.xml", "<project>\n<a></b>\n</project>")[0].line == 2
+
+
+def test_build_is_skipped_while_a_changed_file_does_not_parse(tmp_path, monkeypatch):
+    subprocess.run(["git", "init", "-q", str(tmp_path)], check=True)
+    (tmp_path / "package.json").write_text("{}", encoding="utf-8")
+    (tmp_path / "Old.java").write_text("class Old {\n", encoding="utf-8")  # broken before the run: not ours
+    tool = BuildTool(project_path=str(tmp_path))
+    tests = UnitTestTool(project_path=str(tmp_path))
+    builds, real_run = [], subprocess.run
+
+    def run(cmd, **kwargs):
+        if not kwargs.get("shell"):
+            return real_run(cmd, **kwargs)  # git status of the precheck
+        builds.append(cmd)
+        return SimpleNamespace(returncode=0, stdout="ok", stderr="")
+
+    monkeypatch.setattr(build_tools.subprocess, "run", run)
+
+    assert tool._run().startswith("BUILD SUCCESS") and builds == ["npm install && npm run build"]
+    (tmp_path / "A.java").write_text("class A {\n", encoding="utf-8")
+    assert "A.java:1:9: '{' is never closed" in precheck(tmp_path)
+    assert "Old.java" not in tool._run()
+    assert len(builds) == 1  # skipped: no build process started
+    assert tests._run().startswith("TESTS SKIPPED") and len(builds) == 1
+    assert tests._run(command="npm test").startswith("TESTS PASSED")  # explicit commands are not gated
+    assert len(builds) == 2
+
+    assert not tool._run().startswith("BUILD SKIPPED")  # asked again unchanged: runs
+    assert len(builds) == 3
+    (tmp_path / "A.java").write_text("class A {}\n", encoding="utf-8")
+    assert precheck(tmp_path, baseline=tool._baseline) is None
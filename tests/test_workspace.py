@@ -0,0 +1,100 @@
+import os
+import subprocess
+
+import pytest
+
+from codeguardian.config.settings import settings
+from codeguardian.tools.file_writer_tool import WorkspaceFileWriterTool
+from codeguardian.workspace import (
+    clone_file, close_workspace, open_workspace, resume_workspace, save_workspace_changes,
+)
+
+
+def _git(repo, *args):
+    subprocess.run(["git", "-C", str(repo), *args], check=True, capture_output=True)
+
+def test_clone_file_hardlink_shares_inode(tmp_path):
+    src = tmp_path / "a.bin"
+    src.write_bytes(b"cache")
+    dst = tmp_path / "b.bin"
+    method = clone_file(str(src), str(dst), mode="hardlink")
+    assert dst.read_bytes() == b"cache"
+    if method == "reflink":
+        pytest.skip("the filesystem supports reflinks: clone_file does not fall back to a hardlink")
+    assert method == "hardlink"
+    assert os.stat(src).st_ino == os.stat(dst).st_ino
+
+
+def test_workspace_writer_resolves_directories_in_the_workspace(tmp_path, monkeypatch):
+    main, ws = tmp_path / "main", tmp_path / "ws"
+    main.mkdir()
+    ws.mkdir()
+    monkeypatch.setattr(settings, "project_path", main)
+    monkeypatch.chdir(tmp_path)
+    writer = WorkspaceFileWriterTool(project_path=str(ws))
+
+    writer._run(filename="A.java", directory="src/main", content="class A {}", overwrite=True)
+    writer._run(filename="B.java", directory=str(main / "src"), content="class B {}", overwrite=True)
+    assert (ws / "src/main/A.java").read_text() == "class A {}" and not (tmp_path / "src").exists()
+    assert (ws / "src/B.java").read_text() == "class B {}" and not (main / "src").exists()
+    assert writer._run(filename="x", directory=str(tmp_path), content="x", overwrite=True).startswith("Error")
+
+def test_workspace_isolates_changes(tmp_path, monkeypatch):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    _git(repo, "init", "-q")
+    (repo / ".gitignore").write_text("node_modules/\n", encoding="utf-8")
+    (repo / "App.java").write_text("class App {}\n", encoding="utf-8")
+    (repo / "node_modules" / "lib").mkdir(parents=True)
+    (repo / "node_modules" / "lib" / "index.js").write_text("x", encoding="utf-8")
+    _git(repo, "add", ".")
+    _git(repo, "-c", "user.email=t@t", "-c", "user.name=t", "commit", "-qm", "init")
+
+    monkeypatch.setattr(settings, "project_path", repo)
+    monkeypatch.setattr(settings, "workspaces_dir", tmp_path / "ws")
+
+    ws = open_workspace("T-1", tmp_path / "desc.txt", tmp_path / "log.txt")
+    assert ws.isolated and ws.project_path != repo
+    assert (ws.project_path / "node_modules" / "lib" / "index.js").read_text(encoding="utf-8") == "x"
+
+    # An existing worktree (kept, or another run's) is never replaced
+    other = open_workspace("T-1", tmp_path / "desc.txt", tmp_path / "log.txt")
+    assert other.name == "T-1-2" and other.project_path.name == "T-1-2"
+    close_workspace(other)
+
+    (ws.project_path / "App.java").write_text("class App { int x; }\n", encoding="utf-8")
+    patch = close_workspace(ws)
+
+    assert "+class App { int x; }" in patch
+    assert "node_modules" not in patch
+    assert not ws.project_path.exists()
+    assert (repo / "App.java").read_text(encoding="utf-8") == "class App {}\n"
+
+def test_resumed_run_continues_in_the_previous_worktree_state(tmp_path, monkeypatch):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    _git(repo, "init", "-q")
+    (repo / "App.java").write_text("class App {}\n", encoding="utf-8")
+    _git(repo, "add", ".")
+    _git(repo, "-c", "user.email=t@t", "-c", "user.name=t", "commit", "-qm", "init")
+    monkeypatch.setattr(settings, "project_path", repo)
+    monkeypatch.setattr(settings, "workspaces_dir", tmp_path / "ws")
+    run_dir = tmp_path / "runs" / "key"
+
+    with pytest.raises(ValueError, match="no saved worktree changes"):
+        resume_workspace("run-2", run_dir, tmp_path / "desc.txt", tmp_path / "log.txt")
+
+    ws = open_workspace("run-1", tmp_path / "desc.txt", tmp_path / "log.txt")
+    (ws.project_path / "App.java").write_text("class App { int x; }\n", encoding="utf-8")
+    (ws.project_path / "AppTest.java").write_text("class AppTest {}\n", encoding="utf-8")
+    save_workspace_changes(ws, close_workspace(ws), run_dir)
+
+    # HEAD moved since: the changes are restored at the commit they were made on
+    (repo / "App.java").write_text("class App { int y; }\n", encoding="utf-8")
+    _git(repo, "-c", "user.email=t@t", "-c", "user.name=t", "commit", "-qam", "later")
+
+    resumed = resume_workspace("run-2", run_dir, tmp_path / "desc.txt", tmp_path / "log.txt")
+    assert resumed.base == ws.base
+    assert (resumed.project_path / "App.java").read_text(encoding="utf-8") == "class App { int x; }\n"
+    assert (resumed.project_path / "AppTest.java").read_text(encoding="utf-8") == "class AppTest {}\n"
+    close_workspace(resumed)